@@ -0,0 +1,94 @@
+"""
+벤치마크용 백엔드 서버
+
+main.app을 그대로 띄우되, StorageService의 BlobServiceClient를 인메모리 백엔드로 교체한다.
+--storage local이면 임시 디렉토리를 쓰는 LocalStorageService로 실행한다.
+Azure OpenAI 엔드포인트는 환경 변수(AZURE_OPENAI_ENDPOINT)로 가짜 서버를 가리키게 한다.
+"""
+import argparse
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import uvicorn
+
+from benchmarks.fake_blob import InMemoryBlobServiceClient, FakeBlobProperties, _ContentSettings
+
+SEED_PAYLOAD_SIZE = 512
+
+
+def seed_name(index: int, days: int) -> str:
+    """시드 이미지 이름 (run_benchmark와 공유하는 규칙)"""
+    day = datetime(2024, 1, 1) + timedelta(days=index % days)
+    return f"{day.strftime('%Y%m%d')}/seed-{index:07d}.png"
+
+
+def seed_blobs(client: InMemoryBlobServiceClient, container_name: str, count: int, days: int):
+    container = client.get_container_client(container_name)
+    container._created = True
+    payload = b"\0" * SEED_PAYLOAD_SIZE
+    for i in range(count):
+        name = seed_name(i, days)
+        created = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(days=i % days, seconds=i)
+        props = FakeBlobProperties(
+            name=name,
+            size=len(payload),
+            creation_time=created,
+            last_modified=created,
+            etag=f'"seed-{i}"',
+            content_settings=_ContentSettings(content_type="image/png"),
+        )
+        container._blobs[name] = (props, payload)
+
+
+def seed_files(root: str, count: int, days: int):
+    """LocalStorageService의 샤딩 규칙에 맞춰 시드 파일 생성"""
+    payload = b"\0" * SEED_PAYLOAD_SIZE
+    for i in range(count):
+        partition, file_name = seed_name(i, days).split("/")
+        shard_dir = os.path.join(root, partition, file_name[:2])
+        os.makedirs(shard_dir, exist_ok=True)
+        with open(os.path.join(shard_dir, file_name), "wb") as f:
+            f.write(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 백엔드 서버")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--seed", type=int, default=0, help="미리 채워 둘 이미지 수")
+    parser.add_argument("--seed-days", type=int, default=30, help="시드 이미지를 분산할 날짜 수")
+    parser.add_argument("--storage", choices=["memory", "local"], default="memory", help="스토리지 백엔드")
+    args = parser.parse_args()
+
+    if args.storage == "local":
+        os.environ["STORAGE_BACKEND"] = "local"
+        os.environ.setdefault("LOCAL_STORAGE_PATH", tempfile.mkdtemp(prefix="artelligence-bench-"))
+
+    os.environ.setdefault(
+        "AZURE_STORAGE_CONNECTION_STRING",
+        "DefaultEndpointsProtocol=http;AccountName=benchaccount;AccountKey=YmVuY2g=;"
+        "BlobEndpoint=http://127.0.0.1:10000/benchaccount;",
+    )
+
+    # 부하 발생기는 한 IP에서 요청하므로 기본적으로 요청 제한을 끔 (측정하려면 환경 변수로 켬)
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    import main as app_module
+    from config import settings
+
+    # 요청마다 남는 INFO 로그가 측정값을 왜곡하지 않도록 함
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.storage == "local":
+        seed_files(settings.LOCAL_STORAGE_PATH, args.seed, args.seed_days)
+    else:
+        fake_client = InMemoryBlobServiceClient()
+        seed_blobs(fake_client, settings.AZURE_STORAGE_CONTAINER_NAME, args.seed, args.seed_days)
+        app_module.storage_service.blob_service_client = fake_client
+
+    uvicorn.run(app_module.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+인메모리 Blob 백엔드
+
+StorageService가 사용하는 azure.storage.blob.aio API의 부분집합을 메모리에서 흉내 낸다.
+"""
+import hashlib
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+
+
+@dataclass
+class _ContentSettings:
+    content_type: Optional[str] = None
+    cache_control: Optional[str] = None
+
+
+@dataclass
+class FakeBlobProperties:
+    name: str
+    size: int
+    creation_time: datetime
+    last_modified: datetime
+    etag: str
+    content_settings: _ContentSettings = field(default_factory=_ContentSettings)
+    metadata: Dict[str, str] = field(default_factory=dict)
+    blob_tier: str = "Hot"
+    last_accessed_on: Optional[datetime] = None
+
+
+class FakeBlobPrefix:
+    def __init__(self, name: str):
+        self.name = name
+        self.prefix = name
+
+
+class _Downloader:
+    def __init__(self, data: bytes, chunk_size: int = 4 * 1024 * 1024):
+        self._data = data
+        self._chunk_size = chunk_size
+        self.size = len(data)
+
+    async def readall(self) -> bytes:
+        return self._data
+
+    async def chunks(self):
+        for start in range(0, len(self._data), self._chunk_size):
+            yield self._data[start:start + self._chunk_size]
+
+
+class _BatchPartResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+class _AsyncList:
+    def __init__(self, items: list):
+        self._items = items
+
+    async def __aiter__(self):
+        for item in self._items:
+            yield item
+
+
+class _FakeLease:
+    def __init__(self, container: "InMemoryContainerClient", name: str):
+        self._container = container
+        self._name = name
+
+    async def renew(self, **kwargs):
+        pass
+
+    async def release(self, **kwargs):
+        self._container._leases.discard(self._name)
+
+
+def _check_condition(props: FakeBlobProperties, etag: Optional[str], match_condition) -> None:
+    """etag + MatchConditions.IfNotModified 조건부 요청 (불일치 시 412)"""
+    if match_condition == MatchConditions.IfNotModified and etag != props.etag:
+        raise ResourceModifiedError("ConditionNotMet")
+
+
+class InMemoryBlobClient:
+    def __init__(self, container: "InMemoryContainerClient", name: str):
+        self._container = container
+        self.blob_name = name
+        self.url = f"{container.url}/{name}"
+
+    async def upload_blob(self, data, overwrite: bool = False, content_settings=None, metadata=None, **kwargs):
+        if not overwrite and self.blob_name in self._container._blobs:
+            raise ResourceExistsError("BlobAlreadyExists")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        data = bytes(data)
+        now = datetime.now(timezone.utc)
+        settings = _ContentSettings(
+            content_type=getattr(content_settings, "content_type", None),
+            cache_control=getattr(content_settings, "cache_control", None),
+        )
+        props = FakeBlobProperties(
+            name=self.blob_name,
+            size=len(data),
+            creation_time=now,
+            last_modified=now,
+            etag=f'"{hashlib.md5(data).hexdigest()}"',
+            content_settings=settings,
+            metadata=dict(metadata or {}),
+        )
+        self._container._blobs[self.blob_name] = (props, data)
+        return {"etag": props.etag, "last_modified": now}
+
+    async def exists(self) -> bool:
+        return self.blob_name in self._container._blobs
+
+    async def get_blob_properties(self, **kwargs) -> FakeBlobProperties:
+        try:
+            return self._container._blobs[self.blob_name][0]
+        except KeyError:
+            raise ResourceNotFoundError("BlobNotFound")
+
+    async def download_blob(self, offset: Optional[int] = None, length: Optional[int] = None, **kwargs):
+        # 실제 SDK와 같은 인자 검사
+        if offset is None and length is not None:
+            raise ValueError("Offset value must not be None if length is set.")
+        try:
+            data = self._container._blobs[self.blob_name][1]
+        except KeyError:
+            raise ResourceNotFoundError("BlobNotFound")
+        start = offset or 0
+        end = len(data) if length is None else start + length
+        return _Downloader(data[start:end])
+
+    async def set_blob_metadata(self, metadata=None, etag: Optional[str] = None, match_condition=None, **kwargs):
+        props = await self.get_blob_properties()
+        _check_condition(props, etag, match_condition)
+        props.metadata = dict(metadata or {})
+        props.etag = f'"{uuid.uuid4().hex}"'
+        props.last_modified = datetime.now(timezone.utc)
+        return {"etag": props.etag, "last_modified": props.last_modified}
+
+    async def delete_blob(self, etag: Optional[str] = None, match_condition=None, **kwargs):
+        props = await self.get_blob_properties()
+        _check_condition(props, etag, match_condition)
+        del self._container._blobs[self.blob_name]
+
+    async def acquire_lease(self, lease_duration: int = -1, **kwargs) -> _FakeLease:
+        if self.blob_name in self._container._leases:
+            error = HttpResponseError("LeaseAlreadyPresent")
+            error.status_code = 409
+            raise error
+        self._container._leases.add(self.blob_name)
+        return _FakeLease(self._container, self.blob_name)
+
+    async def close(self):
+        pass
+
+
+class InMemoryContainerClient:
+    def __init__(self, service: "InMemoryBlobServiceClient", name: str):
+        self._service = service
+        self.container_name = name
+        self.url = f"{service.url}/{name}"
+        self._blobs: Dict[str, tuple] = {}
+        self._leases = set()
+        self._created = False
+
+    async def exists(self) -> bool:
+        return self._created
+
+    async def create_container(self):
+        if self._created:
+            raise ResourceExistsError("ContainerAlreadyExists")
+        self._created = True
+
+    def get_blob_client(self, blob: str) -> InMemoryBlobClient:
+        return InMemoryBlobClient(self, blob)
+
+    async def list_blobs(self, name_starts_with: Optional[str] = None, include=None, **kwargs):
+        for name in sorted(self._blobs):
+            if name_starts_with and not name.startswith(name_starts_with):
+                continue
+            yield self._blobs[name][0]
+
+    async def walk_blobs(self, name_starts_with: Optional[str] = None, delimiter: str = "/", include=None, **kwargs):
+        prefix = name_starts_with or ""
+        seen = set()
+        for name in sorted(self._blobs):
+            if not name.startswith(prefix):
+                continue
+            rest = name[len(prefix):]
+            if delimiter in rest:
+                sub = prefix + rest.split(delimiter, 1)[0] + delimiter
+                if sub not in seen:
+                    seen.add(sub)
+                    yield FakeBlobPrefix(sub)
+            else:
+                yield self._blobs[name][0]
+
+    async def delete_blobs(self, *blobs, **kwargs):
+        responses = []
+        for blob in blobs:
+            name = getattr(blob, "name", blob)
+            responses.append(_BatchPartResponse(202 if self._blobs.pop(name, None) else 404))
+        return _AsyncList(responses)
+
+    async def set_standard_blob_tier_blobs(self, standard_blob_tier, *blobs, **kwargs):
+        responses = []
+        for blob in blobs:
+            name = getattr(blob, "name", blob)
+            item = self._blobs.get(name)
+            if item is not None:
+                item[0].blob_tier = standard_blob_tier
+            responses.append(_BatchPartResponse(200 if item is not None else 404))
+        return _AsyncList(responses)
+
+    async def close(self):
+        pass
+
+
+class InMemoryBlobServiceClient:
+    """BlobServiceClient 대체용 인메모리 구현"""
+
+    def __init__(self, account_name: str = "benchaccount"):
+        self.account_name = account_name
+        self.url = f"http://127.0.0.1:10000/{account_name}"
+        self._containers: Dict[str, InMemoryContainerClient] = {}
+
+    def get_container_client(self, container: str) -> InMemoryContainerClient:
+        if container not in self._containers:
+            self._containers[container] = InMemoryContainerClient(self, container)
+        return self._containers[container]
+
+    def get_blob_client(self, container: str, blob: str) -> InMemoryBlobClient:
+        return self.get_container_client(container).get_blob_client(blob)
+
+    async def close(self):
+        pass
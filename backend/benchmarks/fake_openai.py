@@ -0,0 +1,133 @@
+"""
+로컬 가짜 Azure OpenAI 이미지 엔드포인트
+
+DALL-E 호출 대신 설정 가능한 지연/429 비율/페이로드 크기로 응답한다.
+단독 실행: python -m benchmarks.fake_openai --port 9100 --latency 2.0 --rate-429 0.05
+--reject-keyword를 주면 그 단어가 들어간 프롬프트는 지연 후 콘텐츠 필터 거부(400)로 응답한다.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+
+class FakeOpenAIServer:
+    """가짜 images/generations 및 이미지 다운로드 서버"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9100,
+        latency: float = 1.0,
+        latency_jitter: float = 0.2,
+        rate_429: float = 0.0,
+        payload_size: int = 1_500_000,
+        reject_keyword: str = "",
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_429 = rate_429
+        self.payload_size = payload_size
+        self.reject_keyword = reject_keyword
+        # 매 요청마다 새로 만들지 않도록 미리 생성
+        self._payload = os.urandom(payload_size)
+        self._runner = None
+        self.stats = {"generate": 0, "throttled": 0, "rejected": 0, "download": 0}
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/openai/deployments/{deployment}/images/generations", self._generate)
+        app.router.add_get("/images/{name}", self._download)
+        return app
+
+    async def _generate(self, request: web.Request) -> web.Response:
+        body = await request.json()
+
+        if self.rate_429 and random.random() < self.rate_429:
+            self.stats["throttled"] += 1
+            return web.json_response(
+                {"error": {"code": "429", "message": "Rate limit exceeded"}},
+                status=429,
+                headers={"retry-after-ms": "100"},
+            )
+
+        delay = self.latency * random.uniform(1 - self.latency_jitter, 1 + self.latency_jitter)
+        await asyncio.sleep(max(0.0, delay))
+
+        if self.reject_keyword and self.reject_keyword in body.get("prompt", ""):
+            self.stats["rejected"] += 1
+            return web.json_response(
+                {"error": {
+                    "code": "content_policy_violation",
+                    "message": "Your request was rejected as a result of our safety system.",
+                    "inner_error": {
+                        "code": "ResponsibleAIPolicyViolation",
+                        "content_filter_results": {
+                            "violence": {"filtered": True, "severity": "high"},
+                            "sexual": {"filtered": False, "severity": "safe"},
+                        },
+                    },
+                }},
+                status=400,
+            )
+
+        self.stats["generate"] += 1
+
+        return web.json_response({
+            "created": int(time.time()),
+            "data": [{
+                "url": f"{self.endpoint}/images/{uuid.uuid4()}.png",
+                "revised_prompt": body.get("prompt", ""),
+            }],
+        })
+
+    async def _download(self, request: web.Request) -> web.Response:
+        self.stats["download"] += 1
+        return web.Response(body=self._payload, content_type="image/png")
+
+    async def start(self):
+        self._runner = web.AppRunner(self._app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(args):
+    server = FakeOpenAIServer(
+        port=args.port,
+        latency=args.latency,
+        rate_429=args.rate_429,
+        payload_size=args.payload_size,
+        reject_keyword=args.reject_keyword,
+    )
+    await server.start()
+    print(f"Fake Azure OpenAI listening on {server.endpoint}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 Azure OpenAI 이미지 엔드포인트")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=1.0, help="생성 지연 (초)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429 응답 비율 (0~1)")
+    parser.add_argument("--payload-size", type=int, default=1_500_000, help="이미지 바이트 크기")
+    parser.add_argument("--reject-keyword", default="", help="이 단어가 들어간 프롬프트는 콘텐츠 필터 거부로 응답")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,305 @@
+"""
+오프라인 부하 테스트 / 벤치마크 하네스
+
+가짜 Azure OpenAI 서버와 인메모리 Blob 백엔드로 백엔드를 띄우고,
+generate / list / metadata / delete / websocket 시나리오를 동시성을 높여 가며 실행한다.
+결과(p50/p95/p99 지연, 처리량, 서버 RSS)는 JSON으로 저장하며 기준 결과와 비교할 수 있다.
+
+사용 예:
+    cd backend
+    python -m benchmarks.run_benchmark --concurrency 1,8,32 --requests 200 --output bench.json
+    python -m benchmarks.run_benchmark --baseline bench.json --threshold 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.bench_server import seed_name
+
+SCENARIOS = ["generate", "list", "metadata", "delete", "websocket"]
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """프로세스 RSS (MB), /proc이 없는 환경에서는 None"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class BenchmarkRunner:
+    def __init__(self, base_url: str, server_pid: int, seed: int, seed_days: int):
+        self.base_url = base_url
+        self.ws_url = base_url.replace("http://", "ws://")
+        self.server_pid = server_pid
+        self.seed = seed
+        self.seed_days = seed_days
+        self._delete_cursor = 0
+        self._ws_counter = 0
+
+    async def _generate(self, session: aiohttp.ClientSession) -> bool:
+        payload = {"prompt": f"벤치마크 장면 {random.random()}", "size": "1024x1024"}
+        async with session.post(f"{self.base_url}/api/v1/generate", json=payload) as resp:
+            await resp.read()
+            return resp.status == 200
+
+    async def _list(self, session: aiohttp.ClientSession) -> bool:
+        params = {"limit": 20, "offset": random.randint(0, 100)}
+        async with session.get(f"{self.base_url}/api/v1/images", params=params) as resp:
+            await resp.read()
+            return resp.status == 200
+
+    async def _metadata(self, session: aiohttp.ClientSession) -> bool:
+        name = seed_name(random.randrange(max(1, self.seed)), self.seed_days)
+        async with session.get(f"{self.base_url}/api/v1/images/{name}") as resp:
+            await resp.read()
+            return resp.status == 200
+
+    async def _delete(self, session: aiohttp.ClientSession) -> bool:
+        if self._delete_cursor >= self.seed:
+            return False
+        name = seed_name(self._delete_cursor, self.seed_days)
+        self._delete_cursor += 1
+        async with session.delete(f"{self.base_url}/api/v1/images/{name}") as resp:
+            await resp.read()
+            return resp.status == 200
+
+    async def _websocket(self, session: aiohttp.ClientSession) -> bool:
+        self._ws_counter += 1
+        url = f"{self.ws_url}/ws/bench-{self._ws_counter}"
+        async with session.ws_connect(url) as ws:
+            await ws.send_json({"action": "generate", "prompt": f"웹소켓 장면 {random.random()}"})
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    return False
+                data = json.loads(msg.data)
+                if data.get("status") == "completed":
+                    return True
+                if data.get("status") == "error":
+                    return False
+        return False
+
+    async def run_level(self, scenario: str, concurrency: int, total: int) -> Dict:
+        op = getattr(self, f"_{scenario}")
+        latencies: List[float] = []
+        errors = 0
+        remaining = total
+        peak_rss = read_rss_mb(self.server_pid)
+
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=300)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+
+            async def worker():
+                nonlocal remaining, errors
+                while remaining > 0:
+                    remaining -= 1
+                    started = time.perf_counter()
+                    try:
+                        ok = await op(session)
+                    except Exception:
+                        ok = False
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    if not ok:
+                        errors += 1
+
+            async def sample_rss(stop: asyncio.Event):
+                nonlocal peak_rss
+                while not stop.is_set():
+                    rss = read_rss_mb(self.server_pid)
+                    if rss is not None:
+                        peak_rss = max(peak_rss or 0, rss)
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=0.2)
+                    except asyncio.TimeoutError:
+                        pass
+
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(sample_rss(stop))
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await sampler
+
+        return {
+            "scenario": scenario,
+            "concurrency": concurrency,
+            "requests": len(latencies),
+            "errors": errors,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+            "throughput_rps": len(latencies) / elapsed if elapsed > 0 else None,
+            "server_rss_mb": peak_rss,
+        }
+
+
+async def wait_until_healthy(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/health") as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("벤치마크 서버가 시작되지 않았습니다")
+
+
+def compare_with_baseline(results: List[Dict], baseline_path: str, threshold: float) -> List[str]:
+    """기준 결과 대비 p95 지연 증가 / 처리량 감소가 threshold(%)를 넘는 항목 반환"""
+    with open(baseline_path) as f:
+        baseline = {
+            (r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]
+        }
+
+    regressions = []
+    for result in results:
+        base = baseline.get((result["scenario"], result["concurrency"]))
+        if not base:
+            continue
+        label = f"{result['scenario']}@{result['concurrency']}"
+        if base.get("p95_ms") and result.get("p95_ms"):
+            change = (result["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+            if change > threshold:
+                regressions.append(f"{label}: p95 {base['p95_ms']:.1f}ms -> {result['p95_ms']:.1f}ms (+{change:.1f}%)")
+        if base.get("throughput_rps") and result.get("throughput_rps"):
+            change = (base["throughput_rps"] - result["throughput_rps"]) / base["throughput_rps"] * 100
+            if change > threshold:
+                regressions.append(
+                    f"{label}: throughput {base['throughput_rps']:.1f} -> {result['throughput_rps']:.1f} rps (-{change:.1f}%)"
+                )
+    return regressions
+
+
+async def run(args) -> int:
+    fake_openai = FakeOpenAIServer(
+        port=args.openai_port,
+        latency=args.openai_latency,
+        rate_429=args.openai_429_rate,
+        payload_size=args.payload_size,
+    )
+    await fake_openai.start()
+
+    env = dict(os.environ)
+    env.update({
+        "AZURE_OPENAI_ENDPOINT": fake_openai.endpoint,
+        "AZURE_OPENAI_API_KEY": "benchmark-key",
+        "USE_KEY_VAULT": "false",
+        "LOG_LEVEL": "WARNING",
+    })
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_server",
+         "--port", str(args.port), "--seed", str(args.seed), "--seed-days", str(args.seed_days),
+         "--storage", args.storage],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    try:
+        await wait_until_healthy(base_url)
+        runner = BenchmarkRunner(base_url, server.pid, args.seed, args.seed_days)
+        levels = [int(c) for c in args.concurrency.split(",")]
+        scenarios = args.scenarios.split(",")
+
+        for scenario in scenarios:
+            for concurrency in levels:
+                result = await runner.run_level(scenario, concurrency, args.requests)
+                results.append(result)
+                print(
+                    f"{scenario:10} c={concurrency:<4} n={result['requests']:<5} err={result['errors']:<4} "
+                    f"p50={result['p50_ms'] or 0:8.1f}ms p95={result['p95_ms'] or 0:8.1f}ms "
+                    f"p99={result['p99_ms'] or 0:8.1f}ms {result['throughput_rps'] or 0:8.1f} rps "
+                    f"rss={result['server_rss_mb'] or 0:.1f}MB"
+                )
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        await fake_openai.stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests_per_level": args.requests,
+            "seed": args.seed,
+            "storage": args.storage,
+            "openai_latency": args.openai_latency,
+            "openai_429_rate": args.openai_429_rate,
+            "payload_size": args.payload_size,
+            "fake_openai_stats": fake_openai.stats,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"결과 저장: {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.threshold)
+        if regressions:
+            print("성능 회귀 감지:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("성능 회귀 없음")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Artelligence 오프라인 벤치마크")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"실행할 시나리오 ({','.join(SCENARIOS)})")
+    parser.add_argument("--concurrency", default="1,8,32,64", help="동시성 단계 (쉼표 구분)")
+    parser.add_argument("--requests", type=int, default=200, help="단계별 요청 수")
+    parser.add_argument("--seed", type=int, default=5000, help="미리 채워 둘 이미지 수")
+    parser.add_argument("--seed-days", type=int, default=30, help="시드 이미지를 분산할 날짜 수")
+    parser.add_argument("--storage", choices=["memory", "local"], default="memory", help="스토리지 백엔드")
+    parser.add_argument("--port", type=int, default=9200, help="백엔드 포트")
+    parser.add_argument("--openai-port", type=int, default=9100, help="가짜 OpenAI 포트")
+    parser.add_argument("--openai-latency", type=float, default=0.5, help="가짜 생성 지연 (초)")
+    parser.add_argument("--openai-429-rate", type=float, default=0.0, help="가짜 429 응답 비율")
+    parser.add_argument("--payload-size", type=int, default=1_500_000, help="가짜 이미지 크기 (바이트)")
+    parser.add_argument("--output", help="결과 JSON 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=10.0, help="회귀 판정 임계값 (%%)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
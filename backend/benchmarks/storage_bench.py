@@ -0,0 +1,245 @@
+"""
+Blob 스토리지 전송 계층 벤치마크
+
+1. 업로드 처리량: 요청당 지연과 연결당 대역폭을 흉내 내는 가짜 Blob HTTP 서버에 이미지를 올리며
+   기존 방식(기본 전송 계층, 업로드마다 컨테이너 확인, 단일 PUT)과
+   현재 StorageService(공용 연결 풀, 블록 병렬 업로드)를 비교한다.
+2. 목록 URL 생성 CPU: Blob마다 BlobClient를 만들어 url을 읽는 방식과 컨테이너 URL로 조합하는 방식을 비교한다.
+
+사용 예:
+    cd backend
+    python -m benchmarks.storage_bench --images 40 --size-mb 3.5 --latency-ms 20 --bandwidth-mbps 40 --output storage.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from email.utils import formatdate
+from typing import List
+
+from aiohttp import web
+
+from benchmarks.run_benchmark import percentile
+
+ACCOUNT = "benchaccount"
+CONTAINER = "bench-images"
+
+
+class FakeBlobHTTPServer:
+    """
+    Put Blob / Put Block / Put Block List / 컨테이너 조회만 처리하는 가짜 Blob 엔드포인트
+
+    요청마다 latency만큼 지연하고, 요청 본문은 연결당 bandwidth(바이트/초)로 읽는다.
+    받은 데이터는 저장하지 않고 크기만 센다.
+    """
+
+    def __init__(self, port: int, latency: float, bandwidth: float):
+        self.port = port
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.stats = {"requests": 0, "put_blob": 0, "put_block": 0, "put_block_list": 0, "container": 0, "bytes": 0}
+        self._runner = None
+
+    @property
+    def connection_string(self) -> str:
+        key = base64.b64encode(b"storage-bench-key").decode()
+        return (
+            f"DefaultEndpointsProtocol=http;AccountName={ACCOUNT};AccountKey={key};"
+            f"BlobEndpoint=http://127.0.0.1:{self.port}/{ACCOUNT};"
+        )
+
+    def _headers(self) -> dict:
+        return {
+            "ETag": f'"0x{uuid.uuid4().hex[:16].upper()}"',
+            "Last-Modified": formatdate(usegmt=True),
+            "x-ms-request-id": str(uuid.uuid4()),
+            "x-ms-version": "2021-08-06",
+            "x-ms-request-server-encrypted": "true",
+        }
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        started = time.perf_counter()
+        received = 0
+        async for chunk in request.content.iter_chunked(64 * 1024):
+            received += len(chunk)
+            if self.bandwidth:
+                ahead = received / self.bandwidth - (time.perf_counter() - started)
+                if ahead > 0:
+                    await asyncio.sleep(ahead)
+        self.stats["bytes"] += received
+        await asyncio.sleep(self.latency)
+
+        query = request.query
+        if query.get("restype") == "container":
+            self.stats["container"] += 1
+            return web.Response(status=201 if request.method == "PUT" else 200, headers=self._headers())
+        if query.get("comp") == "block":
+            self.stats["put_block"] += 1
+        elif query.get("comp") == "blocklist":
+            self.stats["put_block_list"] += 1
+        else:
+            self.stats["put_blob"] += 1
+        return web.Response(status=201, headers=self._headers())
+
+    async def start(self):
+        app = web.Application(client_max_size=256 * 1024 * 1024)
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+def summarize(name: str, latencies: List[float], wall: float, total_bytes: int, server_stats: dict) -> dict:
+    return {
+        "name": name,
+        "uploads": len(latencies),
+        "wall_seconds": round(wall, 3),
+        "throughput_mb_s": round(total_bytes / wall / 1024 / 1024, 2) if wall else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "server_requests": dict(server_stats),
+    }
+
+
+async def run_uploads(upload, images: int, concurrency: int, data: bytes) -> tuple:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await upload(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(images)))
+    return latencies, time.perf_counter() - started
+
+
+async def bench_uploads(args) -> List[dict]:
+    from azure.storage.blob import ContentSettings
+    from azure.storage.blob.aio import BlobServiceClient
+    from config import settings
+    from services.http_pool import close_http_session
+    from services.storage_service import StorageService
+
+    server = FakeBlobHTTPServer(args.port, args.latency_ms / 1000, args.bandwidth_mbps * 1024 * 1024)
+    await server.start()
+    data = os.urandom(int(args.size_mb * 1024 * 1024))
+    results = []
+    try:
+        # 기존 방식: 기본 전송 계층, 업로드마다 컨테이너 존재 확인, 단일 PUT
+        legacy_client = BlobServiceClient.from_connection_string(server.connection_string)
+
+        async def legacy_upload(i: int):
+            container_client = legacy_client.get_container_client(CONTAINER)
+            if not await container_client.exists():
+                await container_client.create_container()
+            await container_client.get_blob_client(f"legacy/{i}.png").upload_blob(
+                data=data,
+                overwrite=True,
+                content_settings=ContentSettings(content_type="image/png", cache_control="no-cache")
+            )
+
+        server.stats = dict.fromkeys(server.stats, 0)
+        latencies, wall = await run_uploads(legacy_upload, args.images, args.concurrency, data)
+        results.append(summarize("before", latencies, wall, len(data) * args.images, server.stats))
+        await legacy_client.close()
+
+        # 현재 방식: StorageService (공용 연결 풀, 컨테이너 확인 캐시, 블록 병렬 업로드)
+        settings.AZURE_STORAGE_CONNECTION_STRING = server.connection_string
+        settings.AZURE_STORAGE_CONTAINER_NAME = CONTAINER
+        storage = StorageService()
+
+        server.stats = dict.fromkeys(server.stats, 0)
+        latencies, wall = await run_uploads(
+            lambda i: storage.upload_image(data, "bench"), args.images, args.concurrency, data
+        )
+        results.append(summarize("after", latencies, wall, len(data) * args.images, server.stats))
+        await storage.close()
+        await close_http_session()
+    finally:
+        await server.stop()
+    return results
+
+
+def bench_listing_urls(items: int) -> dict:
+    """Blob마다 BlobClient를 만드는 방식 vs 컨테이너 URL 조합 (같은 URL인지도 확인)"""
+    from azure.storage.blob.aio import ContainerClient
+    from services.storage_service import blob_url
+
+    key = base64.b64encode(b"storage-bench-key").decode()
+    container_client = ContainerClient.from_connection_string(
+        f"DefaultEndpointsProtocol=https;AccountName={ACCOUNT};AccountKey={key};EndpointSuffix=core.windows.net",
+        CONTAINER
+    )
+    names = [f"20250101/{uuid.uuid4()}.png" for _ in range(items)]
+
+    started = time.perf_counter()
+    per_client = [container_client.get_blob_client(name).url for name in names]
+    client_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    container_url = container_client.url
+    joined = [blob_url(container_url, name) for name in names]
+    joined_seconds = time.perf_counter() - started
+
+    return {
+        "items": items,
+        "before_us_per_item": round(client_seconds / items * 1e6, 2),
+        "after_us_per_item": round(joined_seconds / items * 1e6, 2),
+        "speedup": round(client_seconds / joined_seconds, 1) if joined_seconds else None,
+        "identical_urls": per_client == joined,
+    }
+
+
+async def run(args) -> int:
+    uploads = await bench_uploads(args)
+    listing = bench_listing_urls(args.list_items)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "images": args.images,
+            "size_mb": args.size_mb,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "bandwidth_mbps_per_connection": args.bandwidth_mbps,
+        },
+        "uploads": uploads,
+        "listing_urls": listing,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"결과 저장: {args.output}")
+    return 0 if listing["identical_urls"] else 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Artelligence Blob 스토리지 벤치마크")
+    parser.add_argument("--images", type=int, default=40, help="업로드할 이미지 수")
+    parser.add_argument("--size-mb", type=float, default=3.5, help="이미지 크기 (MB, HD PNG 기준)")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 업로드 수")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="가짜 서버 요청당 지연")
+    parser.add_argument("--bandwidth-mbps", type=float, default=40.0, help="가짜 서버 연결당 대역폭 (MB/s, 0이면 무제한)")
+    parser.add_argument("--list-items", type=int, default=20000, help="URL 생성 비교에 쓸 Blob 수")
+    parser.add_argument("--port", type=int, default=10010, help="가짜 Blob 서버 포트")
+    parser.add_argument("--output", help="결과 JSON 경로")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
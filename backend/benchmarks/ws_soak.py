@@ -0,0 +1,178 @@
+"""
+WebSocket 연결 유지(soak) 테스트
+
+벤치마크 서버를 띄우고 WebSocket 연결을 N개까지 열어 둔 채 서버 RSS를 측정해
+연결당 메모리를 계산한다. 유지 시간 동안 클라이언트는 하트비트 ping에 pong으로 응답하며,
+--silent-ratio 비율의 연결은 응답하지 않아 유휴 정리 동작도 함께 확인할 수 있다.
+
+사용 예:
+    cd backend
+    python -m benchmarks.ws_soak --connections 10000 --hold 60 --output soak.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import aiohttp
+
+from benchmarks.run_benchmark import BACKEND_DIR, read_rss_mb, wait_until_healthy
+
+
+def raise_fd_limit(needed: int):
+    """클라이언트/서버 모두 연결 수만큼 파일 디스크립터가 필요 (서버는 이 프로세스의 한도를 상속)"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = min(hard, max(soft, needed))
+    if target > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    if target < needed:
+        print(f"경고: 파일 디스크립터 한도({target})가 필요한 수({needed})보다 작습니다")
+
+
+async def hold_connection(session: aiohttp.ClientSession, url: str, reply_pong: bool, stop: asyncio.Event, stats: dict):
+    try:
+        async with session.ws_connect(url, heartbeat=None) as ws:
+            stats["open"] += 1
+            while not stop.is_set():
+                try:
+                    msg = await asyncio.wait_for(ws.receive(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    stats["closed_by_server"] += 1
+                    if ws.close_code is not None:
+                        stats["close_codes"][str(ws.close_code)] = stats["close_codes"].get(str(ws.close_code), 0) + 1
+                    return
+                if reply_pong and json.loads(msg.data).get("status") == "ping":
+                    stats["pings"] += 1
+                    await ws.send_json({"action": "pong"})
+    except Exception:
+        stats["failed"] += 1
+    finally:
+        stats["open"] = max(0, stats["open"] - 1)
+
+
+async def run(args) -> int:
+    raise_fd_limit(args.connections * 2 + 1024)
+
+    env = dict(os.environ)
+    env.update({
+        "AZURE_OPENAI_ENDPOINT": "http://127.0.0.1:9",
+        "AZURE_OPENAI_API_KEY": "benchmark-key",
+        "USE_KEY_VAULT": "false",
+        "LOG_LEVEL": "WARNING",
+        "WS_MAX_CONNECTIONS": str(args.connections),
+        "WS_HEARTBEAT_INTERVAL": str(args.heartbeat_interval),
+        "WS_IDLE_TIMEOUT": str(args.idle_timeout),
+    })
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_server", "--port", str(args.port)],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    stats = {"open": 0, "failed": 0, "closed_by_server": 0, "pings": 0, "close_codes": {}}
+    stop = asyncio.Event()
+    tasks = []
+    opened, baseline_rss, loaded_rss, peak_rss = 0, None, None, None
+    connect_seconds, server_metrics = 0.0, {}
+    try:
+        await wait_until_healthy(base_url)
+        await asyncio.sleep(1.0)
+        baseline_rss = read_rss_mb(server.pid)
+
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            started = time.perf_counter()
+            silent_every = int(1 / args.silent_ratio) if args.silent_ratio > 0 else 0
+            for i in range(args.connections):
+                reply_pong = not (silent_every and i % silent_every == 0)
+                url = f"{base_url}/ws/soak-{i}"
+                tasks.append(asyncio.create_task(hold_connection(session, url, reply_pong, stop, stats)))
+                if (i + 1) % args.batch == 0:
+                    await asyncio.sleep(0.05)
+                    while stats["open"] + stats["failed"] < i + 1 - args.batch:
+                        await asyncio.sleep(0.05)
+            while stats["open"] + stats["failed"] < args.connections and time.perf_counter() - started < 120:
+                await asyncio.sleep(0.1)
+            connect_seconds = time.perf_counter() - started
+
+            await asyncio.sleep(1.0)
+            loaded_rss = read_rss_mb(server.pid)
+            opened = stats["open"]
+            print(f"연결 {opened}/{args.connections}개 ({connect_seconds:.1f}s), 서버 RSS {baseline_rss:.1f}MB -> {loaded_rss:.1f}MB")
+
+            peak_rss = loaded_rss
+            hold_until = time.monotonic() + args.hold
+            while time.monotonic() < hold_until:
+                await asyncio.sleep(1.0)
+                peak_rss = max(peak_rss or 0, read_rss_mb(server.pid) or 0)
+
+            async with session.get(f"{base_url}/metrics") as resp:
+                server_metrics = await resp.json()
+
+            stop.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    per_connection_kb = None
+    if opened and baseline_rss is not None and loaded_rss is not None:
+        per_connection_kb = (loaded_rss - baseline_rss) * 1024 / opened
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "connections": args.connections,
+            "hold_seconds": args.hold,
+            "heartbeat_interval": args.heartbeat_interval,
+            "idle_timeout": args.idle_timeout,
+            "silent_ratio": args.silent_ratio,
+        },
+        "opened": opened,
+        "failed": stats["failed"],
+        "connect_seconds": round(connect_seconds, 2),
+        "baseline_rss_mb": baseline_rss,
+        "loaded_rss_mb": loaded_rss,
+        "peak_rss_mb": peak_rss,
+        "per_connection_kb": round(per_connection_kb, 2) if per_connection_kb is not None else None,
+        "pongs_sent": stats["pings"],
+        "closed_by_server": stats["closed_by_server"],
+        "close_codes": stats["close_codes"],
+        "server_websocket": server_metrics.get("websocket"),
+        "server_counters": server_metrics.get("counters"),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"결과 저장: {args.output}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Artelligence WebSocket soak 테스트")
+    parser.add_argument("--connections", type=int, default=10000, help="동시 연결 수")
+    parser.add_argument("--batch", type=int, default=500, help="한 번에 여는 연결 수")
+    parser.add_argument("--hold", type=float, default=30.0, help="연결 유지 시간 (초)")
+    parser.add_argument("--heartbeat-interval", type=float, default=5.0, help="서버 ping 주기 (초)")
+    parser.add_argument("--idle-timeout", type=float, default=15.0, help="서버 유휴 정리 시간 (초)")
+    parser.add_argument("--silent-ratio", type=float, default=0.0, help="pong에 응답하지 않을 연결 비율")
+    parser.add_argument("--port", type=int, default=9201, help="백엔드 포트")
+    parser.add_argument("--output", help="결과 JSON 경로")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
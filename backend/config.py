@@ -1,9 +1,17 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 from azure.identity import DefaultAzureCredential
 from azure.keyvault.secrets import SecretClient
 
+# settings 필드 -> Key Vault 시크릿 이름
+KEY_VAULT_SECRETS = {
+    "AZURE_OPENAI_API_KEY": "azure-openai-api-key",
+    "AZURE_OPENAI_ENDPOINT": "azure-openai-endpoint",
+    "AZURE_STORAGE_ACCOUNT_KEY": "azure-storage-account-key",
+    "AZURE_STORAGE_CONNECTION_STRING": "azure-storage-connection-string",
+}
+
 class Settings(BaseSettings):
     """애플리케이션 설정"""
     
@@ -24,9 +32,37 @@ class Settings(BaseSettings):
     AZURE_STORAGE_CONNECTION_STRING: str = os.getenv("AZURE_STORAGE_CONNECTION_STRING", "")
     AZURE_STORAGE_CONTAINER_NAME: str = os.getenv("AZURE_STORAGE_CONTAINER_NAME", "generated-images")
     
+    # 스토리지 백엔드 설정 (azure | local)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "azure")
+    LOCAL_STORAGE_PATH: str = os.getenv("LOCAL_STORAGE_PATH", "./data/images")
+    PUBLIC_BASE_URL: str = os.getenv("PUBLIC_BASE_URL", "")  # 로컬 백엔드 이미지 URL 접두사
+    LIST_PARTITION_CONCURRENCY: int = 4  # 목록 조회 시 동시에 스캔할 날짜 파티션 수
+    CONTENT_ADDRESSED_STORAGE: bool = False  # 같은 바이트는 SHA-256 객체 하나로 저장하고 이미지는 참조만 추가
+    
+    # 이미지 프록시 / 로컬 디스크 캐시 설정
+    ENABLE_IMAGE_PROXY: bool = True  # 끄면 /content는 404, 로컬 백엔드용 /download는 캐시 없이 계속 제공
+    IMAGE_CACHE_DIR: str = os.getenv("IMAGE_CACHE_DIR", "/tmp/artelligence-image-cache")
+    IMAGE_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # 1GB, 디렉토리를 공유하는 워커 전체 합계
+    IMAGE_CACHE_MAX_ENTRY_BYTES: int = 16 * 1024 * 1024  # 16MB
+    IMAGE_PROXY_CACHE_CONTROL: str = "public, max-age=86400, immutable"
+    
+    # 프롬프트 인덱스 설정 (사이드카 JSONL + 역색인 검색)
+    PROMPT_INDEX_PATH: str = os.getenv("PROMPT_INDEX_PATH", "./data/prompt_index.jsonl")
+    PROMPT_INDEX_REFRESH_INTERVAL: float = 30  # 초, 다른 워커/예열 CLI가 추가한 항목을 읽어 오는 주기 (0이면 끔)
+    PROMPT_INDEX_COMPACT_MIN_STALE: int = 1000  # 톰스톤/중복 줄이 이 수와 엔트리 수 * 비율을 모두 넘으면 파일 압축
+    PROMPT_INDEX_COMPACT_RATIO: float = 1.0
+    
+    # 유사 프롬프트 재사용 설정 (MinHash/LSH)
+    ENABLE_DUPLICATE_REUSE: bool = True
+    DUPLICATE_SIMILARITY_THRESHOLD: float = 0.85  # 추정 Jaccard 유사도
+    DUPLICATE_INDEX_MAX_ENTRIES: int = 500000
+    
     # Azure Key Vault 설정
     AZURE_KEY_VAULT_URL: str = os.getenv("AZURE_KEY_VAULT_URL", "")
     USE_KEY_VAULT: bool = os.getenv("USE_KEY_VAULT", "false").lower() == "true"
+    SECRET_REFRESH_INTERVAL: int = 3600  # 초, 시크릿 캐시 TTL
+    SECRET_REFRESH_JITTER: float = 0.1  # 갱신 주기 무작위화 비율 (레플리카 간 분산)
+    CLIENT_SWAP_GRACE_PERIOD: int = 180  # 초, 교체된 이전 클라이언트를 닫기 전 대기 시간
     
     # CORS 설정
     ALLOWED_ORIGINS: List[str] = [
@@ -43,12 +79,108 @@ class Settings(BaseSettings):
     DEFAULT_IMAGE_STYLE: str = "vivid"
     MAX_PROMPT_LENGTH: int = 4000
     
+    # 긴 발췌문 장면 분할 / 파이프라인 설정
+    PASSAGE_MAX_LENGTH: int = 20000
+    PASSAGE_MAX_SCENES: int = 8
+    PASSAGE_SCENE_MIN_CHARS: int = 200
+    PASSAGE_SCENE_MAX_CHARS: int = 1500
+    PASSAGE_GENERATION_CONCURRENCY: int = 2
+    PASSAGE_UPLOAD_CONCURRENCY: int = 2
+    
+    # 콘텐츠 정책 거부 캐시 (같은 프롬프트 재시도 시 DALL-E 호출 없이 바로 거부)
+    ENABLE_REJECTION_CACHE: bool = True
+    REJECTION_CACHE_TTL: int = 3600  # 초
+    REJECTION_CACHE_MAX_ENTRIES: int = 10000
+    
+    # 요청 제한 (토큰 버킷) / 공정 스케줄링 설정
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory | redis
+    RATE_LIMIT_REDIS_URL: str = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_GENERATE_PER_MINUTE: float = 10  # 키별 평균 생성 요청 수
+    RATE_LIMIT_GENERATE_BURST: float = 5  # 키별 순간 최대 요청 수
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # 프록시(App Gateway) 뒤에서만 켜기 - X-Forwarded-For는 클라이언트가 위조할 수 있음
+    RATE_LIMIT_TRUSTED_PROXY_HOPS: int = 1  # 앞단 신뢰 프록시 수 (X-Forwarded-For 오른쪽에서 이만큼 떨어진 주소 사용)
+    GENERATION_MAX_CONCURRENCY: int = 8  # 워커당 동시 DALL-E 호출 수
+    GENERATION_MAX_QUEUE_PER_CLIENT: int = 4  # 클라이언트별 대기 가능한 생성 작업 수
+    API_KEYS: List[str] = []  # 키 단위 제한을 받는 API 키 (목록/API_KEY_WEIGHTS에 없는 키는 IP 기준으로 제한)
+    API_KEY_WEIGHTS: Dict[str, int] = {}  # API 키별 스케줄링 가중치 (기본 1, 여기 있는 키도 등록된 키로 취급)
+    CLIENT_DISCONNECT_POLL_INTERVAL: float = 0.5  # 초, 생성 중 HTTP 연결 끊김 확인 주기
+    
+    # 생성 요청 Idempotency-Key 설정
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_BACKEND: str = os.getenv("IDEMPOTENCY_BACKEND", "memory")  # memory | redis
+    IDEMPOTENCY_REDIS_URL: str = os.getenv("IDEMPOTENCY_REDIS_URL", "redis://localhost:6379/0")
+    IDEMPOTENCY_TTL: float = 86400  # 초, 완료된 응답 보관 시간
+    IDEMPOTENCY_INFLIGHT_TTL: float = 300  # 초, 진행 중 표시 유지 시간 (워커가 죽어도 키가 풀리도록)
+    IDEMPOTENCY_WAIT_SECONDS: float = 20  # 초, 재시도가 진행 중인 원 요청을 기다리는 최대 시간 (넘으면 409)
+    IDEMPOTENCY_MAX_ENTRIES: int = 100000  # memory 백엔드 최대 키 수
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+    
+    # WebSocket 연결 관리 설정
+    WS_MAX_CONNECTIONS: int = 10000  # 워커당 최대 연결 수
+    WS_SEND_QUEUE_SIZE: int = 64  # 연결별 송신 대기 메시지 수
+    WS_SEND_TIMEOUT: float = 10  # 초, 메시지 하나 송신 제한 시간
+    WS_HEARTBEAT_INTERVAL: float = 30  # 초, ping 메시지 주기
+    WS_IDLE_TIMEOUT: float = 300  # 초, 수신 메시지(pong 포함)가 없으면 연결 정리
+    WS_RESUME_GRACE_PERIOD: float = 30  # 초, 연결이 끊긴 뒤 재연결을 기다리며 작업을 유지하는 시간
+    WS_REPLAY_MAX_EVENTS: int = 100  # 클라이언트별 재전송용 보관 메시지 수
+    WS_REPLAY_TTL: float = 600  # 초, 재전송 메시지 / 생성 결과 보관 시간
+    WS_REPLAY_MAX_CLIENTS: int = 20000
+    GENERATION_RESULT_MAX_ENTRIES: int = 50000  # request_id별 결과 보관 수
+    WS_STATE_BACKEND: str = os.getenv("WS_STATE_BACKEND", "memory")  # memory(단일 워커 또는 sticky session) | redis(워커/레플리카 공유)
+    WS_STATE_REDIS_URL: str = os.getenv("WS_STATE_REDIS_URL", "redis://localhost:6379/0")
+    WS_PRESENCE_TTL: float = 90  # 초, 연결 표시 유지 시간 (하트비트마다 갱신, 워커가 죽어도 풀리도록 WS_HEARTBEAT_INTERVAL보다 길게)
+    GENERATION_INFLIGHT_TTL: float = 600  # 초, 진행 중 생성 작업 표시 유지 시간
+    WEB_CONCURRENCY: int = 1  # 워커 프로세스 수 (uvicorn과 같은 환경 변수, memory 백엔드에서 여러 워커면 끊긴 작업을 취소하지 않음)
+    
+    # 이미지 보존 기간 / 수명 주기(계층) 정리 설정
+    MAINTENANCE_ENABLED: bool = False  # 백그라운드 정리 작업 실행 여부
+    MAINTENANCE_DRY_RUN: bool = False  # True면 주기 실행도 변경 없이 보고서만 남김
+    MAINTENANCE_INTERVAL: int = 86400  # 초, 정리 작업 주기
+    MAINTENANCE_BATCH_SIZE: int = 256  # 삭제/계층 변경 요청 하나에 담을 이미지 수 (Blob batch 최대 256)
+    MAINTENANCE_OPS_PER_SECOND: float = 50  # 초당 삭제/계층 변경 이미지 수 (전경 트래픽 보호)
+    IMAGE_RETENTION_DAYS: int = 0  # 일, 이 기간이 지난 이미지 삭제 (0이면 삭제 안 함)
+    IMAGE_COOL_AFTER_DAYS: int = 30  # 일, Cool 계층으로 이동 (0이면 사용 안 함, Azure만)
+    IMAGE_ARCHIVE_AFTER_DAYS: int = 0  # 일, Archive 계층으로 이동 (0이면 사용 안 함, Azure만)
+    IMAGE_HOT_ACCESS_WINDOW_DAYS: int = 14  # 일, 이 기간 안에 자주 조회된 이미지는 정리 대상에서 제외
+    IMAGE_HOT_ACCESS_COUNT: int = 1  # 위 기간 안에 이 횟수 이상 조회되면 자주 조회된 이미지로 봄
+    ACCESS_TRACKER_MAX_ENTRIES: int = 200000  # 조회 기록을 보관할 이미지 수
+    ADMIN_API_KEY: str = os.getenv("ADMIN_API_KEY", "")  # 관리자 API(X-Admin-Key) 키, 비어 있으면 비활성화
+    
+    # 이벤트 루프 지연 감시 / 프로파일링 설정
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_LAG_SAMPLE_INTERVAL: float = 0.1  # 초, 루프 지연 샘플링 주기
+    LOOP_STALL_THRESHOLD: float = 0.25  # 초, 이 시간 이상 루프가 막히면 스택을 로그로 남김
+    PROFILE_MAX_SECONDS: float = 60  # 관리자 프로파일링 최대 시간
+    
+    # HTTP 연결 풀 설정 (Blob Storage 전송 계층 / 생성 이미지 다운로드 공용)
+    HTTP_POOL_MAX_CONNECTIONS: int = 100  # 워커당 전체 연결 수
+    HTTP_POOL_MAX_PER_HOST: int = 50  # 호스트별 연결 수
+    HTTP_KEEPALIVE_TIMEOUT: float = 30  # 초, 유휴 연결 유지 시간
+    HTTP_CONNECT_TIMEOUT: float = 10  # 초
+    HTTP_READ_TIMEOUT: float = 60  # 초, 응답 읽기 사이 최대 대기
+    
+    # Blob 업로드 설정 (큰 이미지는 블록 단위 병렬 업로드)
+    BLOB_MAX_SINGLE_PUT_SIZE: int = 2 * 1024 * 1024  # 이 크기 이하는 요청 한 번으로 업로드 (HD PNG는 블록 병렬 업로드)
+    BLOB_MAX_BLOCK_SIZE: int = 1024 * 1024  # 블록 크기
+    BLOB_UPLOAD_MAX_CONCURRENCY: int = 4  # 이미지 하나당 동시 블록 업로드 수
+    
+    # 캐시 예열 CLI (prewarm.py) 설정
+    PREWARM_RATE_PER_MINUTE: float = 6  # 분당 최대 생성 수 (429를 받으면 자동으로 줄임)
+    PREWARM_CONCURRENCY: int = 2  # 동시에 진행할 생성 수
+    PREWARM_WINDOW: str = os.getenv("PREWARM_WINDOW", "")  # 실행 시간대 (예: 01:00-06:00, 비어 있으면 제한 없음)
+    PREWARM_MAX_ATTEMPTS: int = 3  # 항목별 최대 시도 수 (할당량 초과 대기는 제외)
+    PREWARM_PROGRESS_PATH: str = os.getenv("PREWARM_PROGRESS_PATH", "./data/prewarm_progress.jsonl")
+    
     # 타임아웃 설정
     IMAGE_GENERATION_TIMEOUT: int = 120  # 초
     STORAGE_UPLOAD_TIMEOUT: int = 60  # 초
     
     # 로깅 설정
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # json | text
+    LOG_SAMPLE_RATE: float = 1.0  # 요청마다 반복되는 INFO 로그를 남길 비율 (0~1)
+    LOG_QUEUE_SIZE: int = 10000  # 비차단 로그 큐 크기 (가득 차면 버림)
     
     class Config:
         env_file = ".env"
@@ -67,25 +199,10 @@ class Settings(BaseSettings):
             credential = DefaultAzureCredential()
             client = SecretClient(vault_url=self.AZURE_KEY_VAULT_URL, credential=credential)
             
-            # OpenAI API Key
-            if not self.AZURE_OPENAI_API_KEY:
-                secret = client.get_secret("azure-openai-api-key")
-                self.AZURE_OPENAI_API_KEY = secret.value
-            
-            # OpenAI Endpoint
-            if not self.AZURE_OPENAI_ENDPOINT:
-                secret = client.get_secret("azure-openai-endpoint")
-                self.AZURE_OPENAI_ENDPOINT = secret.value
-            
-            # Storage Account Key
-            if not self.AZURE_STORAGE_ACCOUNT_KEY:
-                secret = client.get_secret("azure-storage-account-key")
-                self.AZURE_STORAGE_ACCOUNT_KEY = secret.value
-            
-            # Storage Connection String
-            if not self.AZURE_STORAGE_CONNECTION_STRING:
-                secret = client.get_secret("azure-storage-connection-string")
-                self.AZURE_STORAGE_CONNECTION_STRING = secret.value
+            for field, secret_name in KEY_VAULT_SECRETS.items():
+                if not getattr(self, field):
+                    secret = client.get_secret(secret_name)
+                    setattr(self, field, secret.value)
                 
         except Exception as e:
             print(f"Warning: Could not load secrets from Key Vault: {str(e)}")
@@ -1,23 +1,54 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse, Response
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Awaitable, Callable, Dict, Optional, List, Set, Tuple
 import asyncio
+import hashlib
+import hmac
+import json
+import math
+import threading
+import time
 import uuid
 import logging
 from datetime import datetime
 from urllib.parse import unquote
 
-from services.image_generator import ImageGeneratorService
-from services.storage_service import StorageService
+from services.image_generator import (
+    DEFAULT_QUOTA_RETRY_AFTER,
+    ContentPolicyError,
+    ImageGeneratorService,
+    QuotaExceededError,
+)
+from services.storage_service import create_storage_service
+from services.secrets_provider import SecretsProvider
+from services.image_cache import ImageCache
+from services.prompt_index import PromptIndex
+from services.prompt_fingerprint import PromptFingerprintIndex
+from services.scene_splitter import PassageSplit, split_passage
+from services.passage_pipeline import PassagePipeline
+from services.rate_limiter import RateLimiter
+from services.idempotency import COMPLETED, IdempotencyStore, request_fingerprint
+from services.fair_scheduler import FairScheduler, SchedulerQueueFull
+from services.metrics import PROMETHEUS_CONTENT_TYPE, metrics as metrics_registry
+from services.connection_manager import ConnectionManager
+from services.result_buffer import ResultBuffer
+from services.maintenance import AccessTracker, MaintenanceService
+from services.loop_monitor import LoopMonitor, sample_stacks, to_collapsed
+from services.http_pool import close_http_session
+from services.logging_config import (
+    SAMPLED,
+    RequestContextMiddleware,
+    dropped_log_records,
+    log_duration,
+    setup_logging,
+    shutdown_logging
+)
 from config import settings
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 로깅 설정 (JSON, 비차단 큐 핸들러)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # FastAPI 앱 초기화
@@ -34,32 +65,299 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Idempotent-Replayed"],
 )
 
+# 요청 ID / trace ID 컨텍스트 + 접근 로그
+app.add_middleware(RequestContextMiddleware)
+
 # 서비스 초기화
 image_service = ImageGeneratorService()
-storage_service = StorageService()
+storage_service = create_storage_service()
+image_cache = ImageCache()
+prompt_index = PromptIndex()
+duplicate_index = PromptFingerprintIndex()
+prompt_index.add_listener(duplicate_index.on_index_record)
+passage_pipeline = PassagePipeline(image_service, storage_service)
+rate_limiter = RateLimiter()
+idempotency_store = IdempotencyStore()
+generation_scheduler = FairScheduler()
+access_tracker = AccessTracker()
+loop_monitor = LoopMonitor()
+secrets_provider = SecretsProvider()
+secrets_provider.subscribe(image_service.rebuild_client)
+secrets_provider.subscribe(storage_service.rebuild_client)
+
+async def _on_images_deleted(image_ids: List[str]):
+    """정리 작업으로 삭제된 이미지를 캐시/프롬프트 인덱스(재사용 대상)에서 제거"""
+    for image_id in image_ids:
+        await image_cache.invalidate(image_id)
+    await prompt_index.remove_many(image_ids)
+
+async def _on_images_tiered(image_ids: List[str], tier: str):
+    await prompt_index.set_tier(image_ids, tier)
+
+maintenance_service = MaintenanceService(
+    storage_service,
+    access_tracker,
+    on_deleted=_on_images_deleted,
+    on_tiered=_on_images_tiered,
+    busy=lambda: generation_scheduler.snapshot()["queued"] > 0
+)
+
+@app.on_event("startup")
+async def startup():
+    await loop_monitor.start()
+    await prompt_index.load()
+    await prompt_index.start()
+    await secrets_provider.start()
+    await manager.start()
+    if not result_buffer.shared and settings.WEB_CONCURRENCY > 1:
+        logger.warning(
+            "WS_STATE_BACKEND=memory with %s workers: reconnects need sticky sessions, abandoned jobs are not cancelled",
+            settings.WEB_CONCURRENCY
+        )
+    await maintenance_service.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await maintenance_service.stop()
+    await prompt_index.stop()
+    await manager.stop()
+    await result_buffer.close()
+    await secrets_provider.stop()
+    await rate_limiter.close()
+    await idempotency_store.close()
+    await storage_service.close()
+    await close_http_session()
+    await loop_monitor.stop()
+    shutdown_logging()
 
 # WebSocket 연결 관리
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[str, WebSocket] = {}
+result_buffer = ResultBuffer()
+manager = ConnectionManager(buffer=result_buffer)
+
+def _find_reusable(prompt: str, size: str, quality: str, style: str):
+    """유사 프롬프트로 이미 생성된 이미지 검색 (재사용 비활성화 시 None)"""
+    if not settings.ENABLE_DUPLICATE_REUSE:
+        return None
+    return duplicate_index.find(prompt, {"size": size, "quality": quality, "style": style})
+
+async def _index_generation(prompt: str, result: dict, blob_result: dict):
+    """생성 결과(프롬프트, revised_prompt, 옵션)를 프롬프트 인덱스에 기록 (실패해도 생성 응답에는 영향 없음)"""
+    try:
+        await prompt_index.add(
+            image_id=blob_result["image_id"],
+            prompt=prompt,
+            revised_prompt=result.get("revised_prompt"),
+            url=blob_result["image_url"],
+            options={
+                "size": result.get("size"),
+                "quality": result.get("quality"),
+                "style": result.get("style")
+            }
+        )
+    except Exception as e:
+        logger.error("Failed to index prompt for %s: %s", blob_result.get('image_id'), e)
+
+def _client_ip(conn) -> str:
+    """
+    요청/WebSocket의 클라이언트 IP
+
+    프록시 뒤(RATE_LIMIT_TRUST_FORWARDED_FOR)에서는 X-Forwarded-For 중 신뢰 프록시가 붙인 주소,
+    즉 오른쪽에서 RATE_LIMIT_TRUSTED_PROXY_HOPS번째 값을 쓴다 (왼쪽 값은 클라이언트가 임의로 넣을 수 있음).
+    """
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = [part.strip() for part in conn.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        if forwarded:
+            address = forwarded[-min(max(1, settings.RATE_LIMIT_TRUSTED_PROXY_HOPS), len(forwarded))]
+            # App Gateway는 IPv4 주소에 포트를 붙여 전달함 (1.2.3.4:5678)
+            if address.count(":") == 1:
+                address = address.split(":")[0]
+            return address
+    return conn.client.host if conn.client else "unknown"
+
+def _api_key_identity(api_key: Optional[str]) -> Optional[Tuple[str, int]]:
+    """
+    등록된 API 키 -> (제한 키, 스케줄링 가중치). 키 원문은 저장하지 않고 해시만 사용
+
+    API_KEYS/API_KEY_WEIGHTS에 없는 키는 None (요청마다 새 키를 보내 제한을 피하지 못하도록 IP 기준으로 제한)
+    """
+    if not api_key:
+        return None
+    if api_key not in settings.API_KEYS and api_key not in settings.API_KEY_WEIGHTS:
+        metrics_registry.inc("unknown_api_keys")
+        return None
+    digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return f"key:{digest}", settings.API_KEY_WEIGHTS.get(api_key, 1)
+
+def _request_identity(request: Request) -> Tuple[str, int]:
+    """HTTP 요청자 (API 키가 없으면 IP) -> (제한 키, 스케줄링 가중치)"""
+    return _api_key_identity(request.headers.get("x-api-key")) or (f"ip:{_client_ip(request)}", 1)
+
+async def _enforce_rate_limit(request: Request, cost: int = 1) -> Tuple[str, int]:
+    """HTTP 생성 요청 제한 (API 키 또는 IP 기준, cost는 DALL-E 호출 수). 초과 시 429 + Retry-After"""
+    identity = _request_identity(request)
+    result = await rate_limiter.check(identity[0], cost=cost)
+    if not result.allowed:
+        retry_after = max(1, math.ceil(result.retry_after))
+        raise HTTPException(
+            status_code=429,
+            detail=f"요청이 너무 많습니다. {retry_after}초 후에 다시 시도해주세요",
+            headers={"Retry-After": str(retry_after)}
+        )
+    return identity
+
+async def _scheduled_generate(client_key: str, weight: int, stage: Optional[dict] = None, **kwargs) -> dict:
+    """공정 스케줄러 슬롯을 받은 뒤 DALL-E 호출 (최근 콘텐츠 정책으로 거부된 프롬프트는 대기 없이 바로 거부)"""
+    if "prompt" in kwargs:
+        image_service.check_rejected(kwargs["prompt"])
+    async with generation_scheduler.slot(client_key, weight):
+        if stage is not None:
+            stage["name"] = "generating"
+            stage["generation_started"] = time.perf_counter()
+        return await image_service.generate_image(**kwargs)
+
+async def _generate_and_store(
+    client_key: str,
+    weight: int,
+    prompt: str,
+    size: str,
+    quality: str,
+    style: str,
+    stage: dict,
+    on_saving: Optional[Callable[[], Awaitable[None]]] = None
+) -> Tuple[dict, dict]:
+    """
+    생성 -> 업로드 -> 인덱스 기록
+
+    stage["name"]은 queued -> generating -> uploading 순으로 바뀌며, 연결이 끊겼을 때
+    취소할지 끝까지 진행할지 판단하는 데 쓰인다.
+    """
+    with log_duration(logger, "generate", size=size, quality=quality):
+        result = await _scheduled_generate(
+            client_key,
+            weight,
+            stage,
+            prompt=prompt,
+            size=size,
+            quality=quality,
+            style=style
+        )
+    
+    if not result or "url" not in result:
+        raise HTTPException(status_code=500, detail="이미지 생성 실패")
+    
+    stage["name"] = "uploading"
+    if on_saving is not None:
+        await on_saving()
+    
+    with log_duration(logger, "upload"):
+        blob_result = await storage_service.upload_image_from_url(
+            image_url=result["url"],
+            prompt=prompt
+        )
+    with log_duration(logger, "index"):
+        await _index_generation(prompt, result, blob_result)
+    return result, blob_result
+
+# 연결이 끊긴 뒤에도 끝까지 진행 중인 작업 (GC로 사라지지 않도록 참조 유지)
+_salvaged_jobs: Set[asyncio.Task] = set()
 
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-        logger.info(f"Client {client_id} connected")
+def _on_salvaged_done(task: asyncio.Task):
+    _salvaged_jobs.discard(task)
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.error("Salvaged generation failed: %s", task.exception())
+    else:
+        metrics_registry.inc("generations_salvaged")
 
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-            logger.info(f"Client {client_id} disconnected")
+def _abandon_job(task: asyncio.Task, stage: dict, keep_running: bool = False):
+    """
+    클라이언트 연결이 끊긴 작업 정리
+
+    - 업로드 단계: DALL-E 비용은 이미 나갔고 곧 끝나므로 끝까지 진행해 인덱스에 남긴다
+      (유사 프롬프트 재사용 캐시로 다음 요청에서 쓰인다)
+    - 생성 단계: DALL-E 호출을 취소한다 (이미 과금됐을 수 있으므로 낭비로 집계)
+    - 대기 단계: 스케줄러 대기열에서 빠진다
+    - keep_running(Idempotency-Key 요청): 클라이언트가 같은 키로 재시도하므로 단계와 관계없이 끝까지 진행한다
+      (다른 워커에 재연결했는지 확인할 수 없는 WebSocket 작업도 같음)
+    """
+    if task.done():
+        return
+    if keep_running or stage.get("name") == "uploading":
+        _salvaged_jobs.add(task)
+        task.add_done_callback(_on_salvaged_done)
+        return
+    
+    task.cancel()
+    metrics_registry.inc("generations_cancelled")
+    if stage.get("name") == "generating":
+        metrics_registry.inc("generations_wasted")
+        now = time.perf_counter()
+        metrics_registry.inc("generation_wasted_seconds", now - stage.get("generation_started", now))
+
+async def _wait_unless_disconnected(
+    task: asyncio.Task,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    stage: dict,
+    keep_running: bool = False
+) -> bool:
+    """작업이 끝날 때까지 기다리며 연결 끊김을 주기적으로 확인. 끊기면 작업을 정리하고 True"""
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=settings.CLIENT_DISCONNECT_POLL_INTERVAL)
+            if not task.done() and await is_disconnected():
+                _abandon_job(task, stage, keep_running)
+                return True
+    except asyncio.CancelledError:
+        _abandon_job(task, stage, keep_running)
+        raise
+    return False
 
-    async def send_message(self, client_id: str, message: dict):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_json(message)
+def _idempotency_key(request: Request) -> Optional[str]:
+    """Idempotency-Key 헤더 (없으면 None, 너무 길면 400)"""
+    key = request.headers.get("idempotency-key")
+    if key and len(key) > settings.IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key는 {settings.IDEMPOTENCY_KEY_MAX_LENGTH}자 이하여야 합니다"
+        )
+    return key or None
+
+async def _idempotent_replay(scope: str, key: str, fingerprint: str, record: dict) -> JSONResponse:
+    """
+    같은 Idempotency-Key 재시도에 원 요청의 응답을 그대로 반환
 
-manager = ConnectionManager()
+    원 요청이 아직 진행 중이면 IDEMPOTENCY_WAIT_SECONDS 동안 기다렸다가 반환하고, 그래도 끝나지 않으면 409.
+    같은 키로 다른 본문을 보내면 422.
+    """
+    if record.get("fingerprint") != fingerprint:
+        raise HTTPException(status_code=422, detail="같은 Idempotency-Key로 다른 요청을 보낼 수 없습니다")
+    if record.get("state") != COMPLETED:
+        record = await idempotency_store.wait(scope, key, settings.IDEMPOTENCY_WAIT_SECONDS)
+        if record is None or record.get("state") != COMPLETED:
+            raise HTTPException(
+                status_code=409,
+                detail="같은 Idempotency-Key의 요청을 처리 중입니다. 잠시 후 다시 시도해주세요",
+                headers={"Retry-After": "5"}
+            )
+    return JSONResponse(record["response"], headers={"Idempotent-Replayed": "true"})
+
+def _record_when_done(job: asyncio.Task, idempotency: Tuple[str, str, str], prompt: str):
+    """연결이 끊긴 뒤에도 진행하는 작업의 결과를 Idempotency-Key에 기록 (같은 키의 재시도가 받아 감)"""
+    async def record():
+        try:
+            result, blob_result = await job
+        except BaseException:
+            await idempotency_store.release(*idempotency[:2])
+            return
+        await idempotency_store.complete(*idempotency, _completed_response(prompt, result, blob_result).model_dump())
+    
+    task = asyncio.create_task(record())
+    _salvaged_jobs.add(task)
+    task.add_done_callback(_salvaged_jobs.discard)
 
 # Pydantic 모델
 class ImageGenerationRequest(BaseModel):
@@ -67,6 +365,7 @@ class ImageGenerationRequest(BaseModel):
     size: Optional[str] = Field("1024x1024", description="이미지 크기 (1024x1024, 1792x1024, 1024x1792)")
     quality: Optional[str] = Field("standard", description="이미지 품질 (standard, hd)")
     style: Optional[str] = Field("vivid", description="이미지 스타일 (vivid, natural)")
+    reuse_similar: Optional[bool] = Field(True, description="거의 같은 프롬프트로 생성된 기존 이미지 재사용 여부")
 
 class ImageGenerationResponse(BaseModel):
     image_id: str
@@ -75,10 +374,20 @@ class ImageGenerationResponse(BaseModel):
     prompt: str
     created_at: str
     status: str
+    similarity: Optional[float] = None  # 기존 이미지를 재사용한 경우 프롬프트 유사도
+
+class PassageGenerationRequest(BaseModel):
+    text: str = Field(..., min_length=1, max_length=settings.PASSAGE_MAX_LENGTH, description="소설 발췌문")
+    size: Optional[str] = Field("1024x1024", description="이미지 크기 (1024x1024, 1792x1024, 1024x1792)")
+    quality: Optional[str] = Field("standard", description="이미지 품질 (standard, hd)")
+    style: Optional[str] = Field("vivid", description="이미지 스타일 (vivid, natural)")
+    max_scenes: Optional[int] = Field(None, ge=1, le=settings.PASSAGE_MAX_SCENES, description="최대 장면 수")
+    reuse_similar: Optional[bool] = Field(True, description="거의 같은 장면의 기존 이미지 재사용 여부")
 
 class ImageListResponse(BaseModel):
     images: List[dict]
-    total: int
+    total: int = Field(..., description="스캔한 날짜 파티션까지의 이미지 수 (전체 개수가 아님, has_more가 true면 더 있음)")
+    has_more: bool = Field(False, description="이번 페이지 뒤에 이미지가 더 있는지 여부 (다음 페이지 요청 판단에 사용)")
 
 # 헬스체크 엔드포인트
 @app.get("/health")
@@ -101,7 +410,7 @@ async def root():
 
 # 이미지 생성 엔드포인트
 @app.post("/api/v1/generate", response_model=ImageGenerationResponse)
-async def generate_image(request: ImageGenerationRequest):
+async def generate_image(request: ImageGenerationRequest, http_request: Request):
     """
     프롬프트 기반 이미지 생성
     
@@ -109,120 +418,725 @@ async def generate_image(request: ImageGenerationRequest):
     - **size**: 이미지 크기 (선택, 기본값: 1024x1024)
     - **quality**: 이미지 품질 (선택, 기본값: standard)
     - **style**: 이미지 스타일 (선택, 기본값: vivid)
+    - **reuse_similar**: 거의 같은 프롬프트의 기존 이미지 재사용 (선택, 기본값: true)
+    - `X-API-Key` 헤더가 있으면 키 단위로, 없으면 IP 단위로 요청 수를 제한한다
+    - `Idempotency-Key` 헤더가 있으면 같은 키의 재시도는 새로 생성하지 않고 첫 요청의 응답을 돌려준다
+      (`Idempotent-Replayed: true` 헤더, 첫 요청이 진행 중이면 기다렸다가 반환하거나 409)
     """
+    idempotency = None
+    idempotency_key = _idempotency_key(http_request)
+    if idempotency_key:
+        scope = _request_identity(http_request)[0]
+        fingerprint = request_fingerprint(request.model_dump())
+        previous = await idempotency_store.begin(scope, idempotency_key, fingerprint)
+        if previous is not None:
+            return await _idempotent_replay(scope, idempotency_key, fingerprint, previous)
+        idempotency = (scope, idempotency_key, fingerprint)
+    
+    response = None
+    handed_off = False
     try:
-        image_id = str(uuid.uuid4())
-        logger.info(f"Starting image generation for ID: {image_id}")
-        
-        # DALL-E로 이미지 생성
-        result = await image_service.generate_image(
-            prompt=request.prompt,
-            size=request.size,
-            quality=request.quality,
-            style=request.style
-        )
+        client_key, weight = await _enforce_rate_limit(http_request)
+        if request.reuse_similar:
+            match = _find_reusable(request.prompt, request.size, request.quality, request.style)
+            if match:
+                logger.info("Reusing image %s (similarity %.2f)", match.image_id, match.similarity, extra=SAMPLED)
+                response = ImageGenerationResponse(
+                    image_id=match.image_id,
+                    image_url=match.url,
+                    blob_url=match.url,
+                    prompt=request.prompt,
+                    created_at=datetime.utcnow().isoformat(),
+                    status="reused",
+                    similarity=match.similarity
+                )
+                return response
         
-        if not result or "url" not in result:
-            raise HTTPException(status_code=500, detail="이미지 생성 실패")
+        image_id = str(uuid.uuid4())
+        logger.info("Starting image generation for ID: %s", image_id, extra=SAMPLED)
         
-        # Azure Blob Storage에 저장
-        blob_result = await storage_service.upload_image_from_url(
-            image_url=result["url"],
-            prompt=request.prompt
-        )
+        # DALL-E 생성(클라이언트 간 공정 스케줄링) 후 스토리지에 저장
+        # 클라이언트가 도중에 연결을 끊으면 단계에 따라 취소하거나 끝까지 진행해 캐시에 남김
+        # (Idempotency-Key 요청은 재시도가 결과를 받아 가도록 끝까지 진행)
+        stage = {"name": "queued"}
+        job = asyncio.create_task(_generate_and_store(
+            client_key, weight, request.prompt, request.size, request.quality, request.style, stage
+        ))
+        if await _wait_unless_disconnected(job, http_request.is_disconnected, stage, keep_running=idempotency is not None):
+            logger.info("Client disconnected during generation %s (stage: %s)", image_id, stage['name'])
+            if idempotency is not None:
+                _record_when_done(job, idempotency, request.prompt)
+                handed_off = True
+            return Response(status_code=499)
+        result, blob_result = job.result()
         
-        logger.info(f"Image generated successfully: {image_id}")
+        logger.info("Image generated successfully: %s", image_id, extra=SAMPLED)
         
-        return ImageGenerationResponse(
-            image_id=blob_result["image_id"],
-            image_url=result["url"],
-            blob_url=blob_result["image_url"],
-            prompt=request.prompt,
-            created_at=datetime.utcnow().isoformat(),
-            status="completed"
-        )
+        response = _completed_response(request.prompt, result, blob_result)
+        return response
         
+    except SchedulerQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except QuotaExceededError as e:
+        retry_after = e.retry_after if e.retry_after is not None else DEFAULT_QUOTA_RETRY_AFTER
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+    except ContentPolicyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error generating image: {str(e)}")
+        logger.error("Error generating image: %s", e)
         raise HTTPException(status_code=500, detail=f"이미지 생성 중 오류 발생: {str(e)}")
+    finally:
+        # 성공한 응답은 같은 키의 재시도를 위해 보관, 실패하면 키를 풀어 재시도가 다시 실행되게 함
+        if idempotency is not None and not handed_off:
+            if response is not None:
+                await idempotency_store.complete(*idempotency, response.model_dump())
+            else:
+                await idempotency_store.release(*idempotency[:2])
+
+def _completed_response(prompt: str, result: dict, blob_result: dict) -> ImageGenerationResponse:
+    return ImageGenerationResponse(
+        image_id=blob_result["image_id"],
+        image_url=result["url"],
+        blob_url=blob_result["image_url"],
+        prompt=prompt,
+        created_at=datetime.utcnow().isoformat(),
+        status="completed"
+    )
+
+def _passage_cost(split: PassageSplit) -> int:
+    """발췌문 요청의 요청 제한 비용 (장면마다 DALL-E 호출 한 번)"""
+    return max(1, len(split.scenes))
+
+def _passage_events(
+    split: PassageSplit,
+    size: str,
+    quality: str,
+    style: str,
+    reuse_similar: bool,
+    client_key: str,
+    weight: int = 1
+):
+    """
+    발췌문을 장면으로 나누고 파이프라인 이벤트 스트림 생성
+
+    첫 이벤트는 장면 목록이며, max_scenes를 넘어 생성하지 않는 뒤쪽 부분이 있으면
+    truncated/dropped_scenes/dropped_chars로 알린다.
+    """
+    async def events():
+        yield {
+            "status": "scenes",
+            "scenes": [{"scene_index": s.index, "text": s.text} for s in split.scenes],
+            "truncated": split.truncated,
+            "dropped_scenes": split.dropped_scenes,
+            "dropped_chars": split.dropped_chars
+        }
+        async for event in passage_pipeline.run(
+            split.scenes,
+            size=size,
+            quality=quality,
+            style=style,
+            reuse_lookup=_find_reusable if reuse_similar else None,
+            on_uploaded=_index_generation,
+            generate_fn=lambda **kwargs: _scheduled_generate(client_key, weight, **kwargs)
+        ):
+            yield event
+    
+    return events()
+
+# 긴 발췌문 장면별 이미지 생성 엔드포인트
+@app.post("/api/v1/generate/passage")
+async def generate_passage(request: PassageGenerationRequest, http_request: Request):
+    """
+    긴 소설 발췌문을 장면으로 나눠 장면별 이미지 생성
+    
+    결과는 장면이 끝날 때마다 NDJSON(한 줄에 이벤트 하나)으로 스트리밍된다.
+    
+    - **text**: 소설 발췌문 (필수)
+    - **max_scenes**: 최대 장면 수 (선택)
+    """
+    split = split_passage(request.text, max_scenes=request.max_scenes)
+    client_key, weight = await _enforce_rate_limit(http_request, cost=_passage_cost(split))
+    events = _passage_events(
+        split, request.size, request.quality, request.style,
+        request.reuse_similar, client_key, weight
+    )
+    
+    async def ndjson():
+        async for event in events:
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 # WebSocket 엔드포인트
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     """
     실시간 이미지 생성 진행 상황 전송
+    
+    생성 요청은 API 키(`api_key` 쿼리 또는 `X-API-Key` 헤더)가 있으면 키 단위로,
+    없으면 client_id와 IP 단위로 제한된다.
+    
+    서버가 보내는 메시지에는 client_id별 순번(`seq`)이 붙는다. 연결이 끊겼다가
+    `/ws/{client_id}?last_seq=N`으로 다시 연결하면 N 이후 놓친 메시지를 다시 보낸다.
+    `generate` 요청에 `request_id`를 넣으면 같은 ID로 다시 요청해도 새로 생성하지 않는다.
+    `generate` 요청의 `idempotency_key`는 HTTP `Idempotency-Key`와 같다 (연결/워커가 바뀌어도 첫 결과를 다시 보냄).
     """
-    await manager.connect(websocket, client_id)
+    identity = _api_key_identity(websocket.query_params.get("api_key") or websocket.headers.get("x-api-key"))
+    client_key, weight = identity or (f"client:{client_id}", 1)
+    limit_keys = [client_key] if identity else [client_key, f"ip:{_client_ip(websocket)}"]
+    jobs: Dict[asyncio.Task, dict] = {}
+    
+    try:
+        last_seq = int(websocket.query_params["last_seq"]) if "last_seq" in websocket.query_params else None
+    except ValueError:
+        last_seq = None
+    
+    connection = await manager.connect(websocket, client_id)
+    if connection is None:
+        return
+    if last_seq is not None:
+        replayed = await manager.replay(connection, last_seq)
+        if replayed:
+            logger.info("Replayed %s messages to client %s after seq %s", replayed, client_id, last_seq)
+    
     try:
         while True:
             data = await websocket.receive_json()
+            manager.touch(connection)
+            
+            if data.get("action") == "pong":
+                continue
             
+            request_id = str(data.get("request_id") or uuid.uuid4())
             if data.get("action") == "generate":
-                try:
-                    # 생성 시작 알림
+                # 재연결 후 같은 요청을 다시 보낸 경우: 끝났으면 결과를 다시 보내고, 진행 중이면 그대로 둠
+                previous = await result_buffer.get_result(client_id, request_id)
+                if previous is not None:
+                    await manager.send_message(client_id, previous)
+                    continue
+                if await result_buffer.is_inflight(client_id, request_id):
                     await manager.send_message(client_id, {
                         "status": "processing",
+                        "request_id": request_id,
                         "message": "이미지 생성 중..."
                     })
-                    
-                    # 이미지 생성
-                    result = await image_service.generate_image(
-                        prompt=data.get("prompt"),
-                        size=data.get("size", "1024x1024"),
-                        quality=data.get("quality", "standard"),
-                        style=data.get("style", "vivid")
-                    )
-                    
-                    # 저장 중 알림
-                    await manager.send_message(client_id, {
-                        "status": "saving",
-                        "message": "이미지 저장 중..."
-                    })
-                    
-                    # 스토리지에 저장
-                    blob_result = await storage_service.upload_image_from_url(
-                        image_url=result["url"],
-                        prompt=data.get("prompt")
-                    )
-                    
-                    # 완료 알림
-                    await manager.send_message(client_id, {
-                        "status": "completed",
-                        "image_id": blob_result["image_id"],
-                        "image_url": result["url"],
-                        "blob_url": blob_result["image_url"],
-                        "message": "이미지 생성 완료!"
-                    })
-                    
-                except Exception as e:
+                    if (client_id, request_id) not in _ws_inflight:
+                        # 다른 워커에서 진행 중: 그 워커에는 이 연결이 없으므로 결과가 보관되면 여기서 전달
+                        _spawn_forward(client_id, request_id)
+                    continue
+            
+            idempotency = None
+            if data.get("action") == "generate" and data.get("idempotency_key"):
+                idempotency_key = str(data["idempotency_key"])[:settings.IDEMPOTENCY_KEY_MAX_LENGTH]
+                fingerprint = request_fingerprint(_ws_generate_params(data))
+                previous = await idempotency_store.begin(client_key, idempotency_key, fingerprint)
+                if previous is not None:
+                    task = asyncio.create_task(_ws_idempotent_replay(
+                        client_id, request_id, client_key, idempotency_key, fingerprint, previous
+                    ))
+                    jobs[task] = {"name": "replay"}
+                    task.add_done_callback(lambda t: jobs.pop(t, None))
+                    continue
+                idempotency = (client_key, idempotency_key, fingerprint)
+            
+            split = None
+            if data.get("action") == "generate_passage":
+                split = split_passage(
+                    (data.get("text") or "")[:settings.PASSAGE_MAX_LENGTH],
+                    max_scenes=_ws_max_scenes(data.get("max_scenes"))
+                )
+            
+            if data.get("action") in ("generate", "generate_passage"):
+                limited = await rate_limiter.check(*limit_keys, cost=_passage_cost(split) if split else 1)
+                if not limited.allowed:
+                    if idempotency is not None:
+                        await idempotency_store.release(*idempotency[:2])
                     await manager.send_message(client_id, {
                         "status": "error",
-                        "message": f"오류 발생: {str(e)}"
+                        "code": "rate_limited",
+                        "request_id": request_id,
+                        "retry_after": max(1, math.ceil(limited.retry_after)),
+                        "message": "요청이 너무 많습니다. 잠시 후 다시 시도해주세요"
                     })
+                    continue
+            
+            if data.get("action") == "generate":
+                params = _ws_generate_params(data)
+                prompt, size, quality, style = params["prompt"], params["size"], params["quality"], params["style"]
+                
+                if params["reuse_similar"]:
+                    match = _find_reusable(prompt, size, quality, style)
+                    if match:
+                        reused = {
+                            "status": "completed",
+                            "request_id": request_id,
+                            "image_id": match.image_id,
+                            "image_url": match.url,
+                            "blob_url": match.url,
+                            "reused": True,
+                            "similarity": match.similarity,
+                            "message": "유사한 이미지를 재사용했습니다"
+                        }
+                        await result_buffer.store_result(client_id, request_id, reused)
+                        if idempotency is not None:
+                            await idempotency_store.complete(*idempotency, ImageGenerationResponse(
+                                image_id=match.image_id,
+                                image_url=match.url,
+                                blob_url=match.url,
+                                prompt=prompt,
+                                created_at=datetime.utcnow().isoformat(),
+                                status="reused",
+                                similarity=match.similarity
+                            ).model_dump())
+                        await manager.send_message(client_id, reused)
+                        continue
+                
+                # 태스크가 끝나며 표시를 지우기 전에 먼저 표시해 둠
+                await result_buffer.mark_inflight(client_id, request_id)
+                # 생성은 별도 태스크로 돌려 수신 루프가 연결 끊김을 바로 감지하게 함
+                stage = {"name": "queued"}
+                task = asyncio.create_task(_ws_generate(
+                    client_id, request_id, client_key, weight, prompt, size, quality, style, stage, idempotency
+                ))
+                jobs[task] = stage
+                inflight_key = (client_id, request_id)
+                _ws_inflight[inflight_key] = task
+                task.add_done_callback(lambda t, key=inflight_key: (jobs.pop(t, None), _ws_inflight.pop(key, None)))
+            
+            elif data.get("action") == "generate_passage":
+                events = _passage_events(
+                    split,
+                    data.get("size", "1024x1024"),
+                    data.get("quality", "standard"),
+                    data.get("style", "vivid"),
+                    data.get("reuse_similar", True),
+                    client_key,
+                    weight
+                )
+                # 발췌문은 장면 여러 개가 동시에 진행되므로 끊기면 통째로 취소 (파이프라인이 남은 작업 정리)
+                task = asyncio.create_task(_ws_passage(client_id, request_id, events))
+                jobs[task] = {"name": "passage"}
+                task.add_done_callback(lambda t: jobs.pop(t, None))
                     
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
+        pass
+    finally:
+        # 같은 client_id로 재연결해 교체된 경우 진행 중인 작업은 새 연결로 결과를 보내도록 둠
+        replaced = manager.active_connections.get(client_id) not in (None, connection)
+        await manager.disconnect(client_id, connection)
+        if not replaced and jobs:
+            _abandon_after_grace(client_id, dict(jobs))
+
+# (client_id, WebSocket 요청 ID) -> 이 워커에서 진행 중인 생성 태스크
+# (워커 간 중복 요청 확인은 result_buffer의 진행 중 표시로 하고, 이 목록은 결과를 직접 보낼 수 있는지 판단용)
+_ws_inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+_grace_tasks: Set[asyncio.Task] = set()
+_forward_tasks: Set[asyncio.Task] = set()
+
+def _ws_max_scenes(value) -> int:
+    """WebSocket generate_passage의 max_scenes (HTTP 요청과 같이 1~PASSAGE_MAX_SCENES로 제한)"""
+    try:
+        return min(max(1, int(value)), settings.PASSAGE_MAX_SCENES)
+    except (TypeError, ValueError):
+        return settings.PASSAGE_MAX_SCENES
+
+def _ws_generate_params(data: dict) -> dict:
+    """WebSocket generate 메시지의 생성 옵션 (HTTP ImageGenerationRequest와 같은 필드/기본값)"""
+    return {
+        "prompt": data.get("prompt") or "",
+        "size": data.get("size", "1024x1024"),
+        "quality": data.get("quality", "standard"),
+        "style": data.get("style", "vivid"),
+        "reuse_similar": data.get("reuse_similar", True)
+    }
+
+async def _ws_idempotent_replay(
+    client_id: str,
+    request_id: str,
+    scope: str,
+    key: str,
+    fingerprint: str,
+    record: dict
+):
+    """같은 idempotency_key 재요청: 완료된 결과를 다시 보내고, 진행 중이면 끝날 때까지 기다렸다 보냄"""
+    if record.get("fingerprint") != fingerprint:
+        await manager.send_message(client_id, {
+            "status": "error",
+            "code": "idempotency_key_mismatch",
+            "request_id": request_id,
+            "message": "같은 idempotency_key로 다른 요청을 보낼 수 없습니다"
+        })
+        return
+    
+    if record.get("state") != COMPLETED:
+        await manager.send_message(client_id, {
+            "status": "processing",
+            "request_id": request_id,
+            "message": "이미지 생성 중..."
+        })
+        record = await idempotency_store.wait(scope, key, settings.IDEMPOTENCY_WAIT_SECONDS)
+        if record is None or record.get("state") != COMPLETED:
+            await manager.send_message(client_id, {
+                "status": "error",
+                "code": "idempotency_in_progress",
+                "request_id": request_id,
+                "retry_after": 5,
+                "message": "같은 idempotency_key의 요청을 처리 중입니다. 잠시 후 다시 시도해주세요"
+            })
+            return
+    
+    response = record["response"]
+    completed = {
+        "status": "completed",
+        "request_id": request_id,
+        "image_id": response["image_id"],
+        "image_url": response["image_url"],
+        "blob_url": response["blob_url"],
+        "replayed": True,
+        "message": "이미지 생성 완료!"
+    }
+    if response.get("status") == "reused":
+        completed.update(reused=True, similarity=response.get("similarity"))
+    await result_buffer.store_result(client_id, request_id, completed)
+    await manager.send_message(client_id, completed)
+
+def _spawn_forward(client_id: str, request_id: str):
+    """다른 워커에서 진행 중인 작업의 결과를 기다렸다가 이 워커의 연결로 전달"""
+    async def forward():
+        result = await result_buffer.wait_result(client_id, request_id, settings.GENERATION_INFLIGHT_TTL)
+        if result is not None:
+            # 원래 워커가 버퍼에 이미 기록했으므로 다시 기록하지 않음 (재전송 중복 방지)
+            await manager.send_message(client_id, result, record=False)
+    
+    task = asyncio.create_task(forward())
+    _forward_tasks.add(task)
+    task.add_done_callback(_forward_tasks.discard)
+
+def _abandon_after_grace(client_id: str, jobs: Dict[asyncio.Task, dict]):
+    """
+    연결이 끊긴 클라이언트의 작업을 WS_RESUME_GRACE_PERIOD 동안 유지
+    
+    그 사이 같은 client_id로 재연결하면 작업은 계속되고 결과는 버퍼를 통해 전달된다.
+    재연결하지 않으면 단계에 따라 취소하거나 끝까지 진행한다.
+    
+    재연결은 다른 워커로 갈 수 있으므로 result_buffer의 연결 표시로 확인한다.
+    memory 백엔드로 워커가 여럿이면 다른 워커의 연결이 보이지 않으므로 취소하지 않고 끝까지 진행한다.
+    """
+    async def wait_and_abandon():
+        pending = [task for task in jobs if not task.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=settings.WS_RESUME_GRACE_PERIOD)
+        if await result_buffer.is_present(client_id):
+            return
+        keep_running = not result_buffer.shared and settings.WEB_CONCURRENCY > 1
+        for task, stage in jobs.items():
+            _abandon_job(task, stage, keep_running=keep_running)
+    
+    task = asyncio.create_task(wait_and_abandon())
+    _grace_tasks.add(task)
+    task.add_done_callback(_grace_tasks.discard)
+
+async def _ws_generate(
+    client_id: str,
+    request_id: str,
+    client_key: str,
+    weight: int,
+    prompt: str,
+    size: str,
+    quality: str,
+    style: str,
+    stage: dict,
+    idempotency: Optional[Tuple[str, str, str]] = None
+):
+    """WebSocket 단일 이미지 생성 작업 (진행 상황을 메시지로 전송, 최종 결과는 request_id/idempotency_key로 보관)"""
+    try:
+        # 생성 시작 알림
+        await manager.send_message(client_id, {
+            "status": "processing",
+            "request_id": request_id,
+            "message": "이미지 생성 중..."
+        })
+        
+        async def on_saving():
+            # 저장 중 알림
+            await manager.send_message(client_id, {
+                "status": "saving",
+                "request_id": request_id,
+                "message": "이미지 저장 중..."
+            })
+        
+        result, blob_result = await _generate_and_store(
+            client_key, weight, prompt, size, quality, style, stage, on_saving
+        )
+        
+        # 완료 알림
+        completed = {
+            "status": "completed",
+            "request_id": request_id,
+            "image_id": blob_result["image_id"],
+            "image_url": result["url"],
+            "blob_url": blob_result["image_url"],
+            "message": "이미지 생성 완료!"
+        }
+        await result_buffer.store_result(client_id, request_id, completed)
+        if idempotency is not None:
+            await idempotency_store.complete(*idempotency, _completed_response(prompt, result, blob_result).model_dump())
+        await manager.send_message(client_id, completed)
+        
+    except asyncio.CancelledError:
+        if idempotency is not None:
+            await idempotency_store.release(*idempotency[:2])
+        raise
+    except Exception as e:
+        if idempotency is not None:
+            await idempotency_store.release(*idempotency[:2])
+        failed = {
+            "status": "error",
+            "request_id": request_id,
+            "message": f"오류 발생: {str(e)}"
+        }
+        if isinstance(e, ContentPolicyError):
+            failed["code"] = "content_policy_violation"
+        await result_buffer.store_result(client_id, request_id, failed)
+        await manager.send_message(client_id, failed)
+    finally:
+        # 결과를 보관한 뒤에 지워야 다른 워커의 조회가 결과도 진행 중 표시도 없는 순간을 보지 않음
+        await result_buffer.clear_inflight(client_id, request_id)
+
+async def _ws_passage(client_id: str, request_id: str, events):
+    """WebSocket 발췌문 장면별 생성 작업"""
+    try:
+        async for event in events:
+            await manager.send_message(client_id, {**event, "request_id": request_id})
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        await manager.send_message(client_id, {
+            "status": "error",
+            "request_id": request_id,
+            "message": f"오류 발생: {str(e)}"
+        })
+
+# 생성 결과 조회 (WebSocket request_id)
+@app.get("/api/v1/generations/{request_id}")
+async def get_generation(
+    request_id: str,
+    client_id: str = Query(..., min_length=1, description="요청을 보낸 WebSocket 연결의 client_id")
+):
+    """
+    WebSocket으로 요청한 생성 작업의 결과 조회 (완료 후 WS_REPLAY_TTL 동안 보관)
+    
+    - **request_id**: `generate` 요청에 넣은 request_id
+    - **client_id**: 요청을 보낸 `/ws/{client_id}`의 client_id (다른 클라이언트의 결과는 조회되지 않음)
+    """
+    result = await result_buffer.get_result(client_id, request_id)
+    if result is not None:
+        return result
+    
+    if await result_buffer.is_inflight(client_id, request_id):
+        return {"status": "processing", "request_id": request_id}
+    
+    raise HTTPException(status_code=404, detail=f"생성 결과를 찾을 수 없습니다: {request_id}")
+
+def _parse_date_param(value: Optional[str], name: str) -> Optional[str]:
+    """YYYYMMDD 또는 YYYY-MM-DD 날짜 파라미터를 파티션 이름(YYYYMMDD)으로 변환"""
+    if not value:
+        return None
+    for fmt in ("%Y%m%d", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y%m%d")
+        except ValueError:
+            continue
+    raise HTTPException(status_code=400, detail=f"잘못된 날짜 형식입니다 ({name}): {value}")
 
 # 이미지 목록 조회
 @app.get("/api/v1/images", response_model=ImageListResponse)
-async def list_images(limit: int = 20, offset: int = 0):
+async def list_images(
+    limit: int = 20,
+    offset: int = 0,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to")
+):
     """
-    저장된 이미지 목록 조회
+    저장된 이미지 목록 조회 (최신순, 날짜 파티션 단위로 필요한 만큼만 스캔)
     
     - **limit**: 조회할 이미지 수 (기본값: 20)
     - **offset**: 시작 위치 (기본값: 0)
+    - **from**: 시작 날짜 (YYYYMMDD 또는 YYYY-MM-DD, 선택)
+    - **to**: 종료 날짜 (YYYYMMDD 또는 YYYY-MM-DD, 선택)
     """
+    date_from = _parse_date_param(date_from, "from")
+    date_to = _parse_date_param(date_to, "to")
+    
     try:
-        result = await storage_service.list_images(limit, offset)
+        result = await storage_service.list_images(limit, offset, date_from, date_to)
         
         return ImageListResponse(
             images=result["images"],
-            total=result["total"]
+            total=result["total"],
+            has_more=result.get("has_more", False)
         )
     except Exception as e:
-        logger.error(f"Error listing images: {str(e)}")
+        logger.error("Error listing images: %s", e)
         raise HTTPException(status_code=500, detail=f"이미지 목록 조회 중 오류 발생: {str(e)}")
 
+# 프롬프트 검색 (catch-all 조회 라우트보다 먼저 등록)
+@app.get("/api/v1/images/search")
+async def search_images(q: str = Query(..., min_length=1), limit: int = 20, offset: int = 0):
+    """
+    프롬프트 / revised_prompt 전문 검색
+    
+    - **q**: 검색어 (한글은 문자 bigram 단위로 매칭)
+    - **limit**: 조회할 이미지 수 (기본값: 20)
+    - **offset**: 시작 위치 (기본값: 0)
+    """
+    try:
+        return await prompt_index.search(q, limit, offset)
+    except Exception as e:
+        logger.error("Error searching images: %s", e)
+        raise HTTPException(status_code=500, detail=f"이미지 검색 중 오류 발생: {str(e)}")
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    단일 Range 헤더 파싱 -> (start, end) (end 미포함)
+    
+    헤더가 없거나 다중 범위/형식 오류면 None (전체 응답), 만족할 수 없는 범위면 ValueError
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text == "":
+            # bytes=-500 : 마지막 500바이트
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise ValueError("empty suffix range")
+            return max(0, size - suffix), size
+        
+        start = int(start_text)
+        end = int(end_text) + 1 if end_text else size
+    except ValueError:
+        if start_text == "":
+            raise
+        return None
+    
+    if start >= size or end <= start:
+        raise ValueError("unsatisfiable range")
+    return start, min(end, size)
+
+def _etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    normalized = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == normalized for tag in if_none_match.split(","))
+
+# Range 요청 후 백그라운드 캐시 채우기 (GC로 사라지지 않도록 참조 유지)
+_cache_fill_tasks: Set[asyncio.Task] = set()
+
+# 이미지 콘텐츠 프록시 - Range / 조건부 요청 / 로컬 디스크 캐시 지원 (catch-all 조회 라우트보다 먼저 등록)
+@app.get("/api/v1/images/{image_path:path}/content")
+async def get_image_content(image_path: str, request: Request):
+    """
+    이미지 바이트를 백엔드를 통해 스트리밍
+    
+    - **image_path**: 이미지 경로 (예: 20251121/xxx.png)
+    - `Range`, `If-None-Match` 헤더 지원
+    - 자주 조회되는 이미지는 로컬 디스크 LRU 캐시에서 제공
+    """
+    if not settings.ENABLE_IMAGE_PROXY:
+        raise HTTPException(status_code=404, detail="이미지 프록시가 비활성화되어 있습니다")
+    return await _stream_image(image_path, request, use_cache=True)
+
+@app.get("/api/v1/images/{image_path:path}/download")
+async def download_image(image_path: str, request: Request):
+    """
+    이미지 바이트 다운로드 (로컬 스토리지 백엔드의 image_url)
+    
+    - **image_path**: 이미지 경로 (예: 20251121/xxx.png)
+    - 이미지 프록시를 꺼도 제공되며, 그때는 디스크 캐시를 쓰지 않는다
+    """
+    return await _stream_image(image_path, request, use_cache=settings.ENABLE_IMAGE_PROXY)
+
+async def _stream_image(image_path: str, request: Request, use_cache: bool):
+    try:
+        access_tracker.record(image_path)
+        entry = await image_cache.get(image_path) if use_cache else None
+        if entry is not None:
+            etag, size, content_type = entry.etag, entry.size, entry.content_type
+        else:
+            metadata = await storage_service.get_image_metadata(image_path)
+            if not metadata:
+                raise HTTPException(
+                    status_code=404, 
+                    detail=f"이미지를 찾을 수 없습니다: {image_path}"
+                )
+            etag = metadata.get("etag")
+            size = metadata["size"]
+            content_type = metadata.get("content_type") or "application/octet-stream"
+        
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Cache-Control": settings.IMAGE_PROXY_CACHE_CONTROL,
+        }
+        if etag:
+            headers["ETag"] = etag
+        
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        
+        try:
+            byte_range = _parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        
+        start, end = byte_range or (0, size)
+        status_code = 206 if byte_range else 200
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        headers["Content-Length"] = str(end - start)
+        
+        chunks = None
+        if entry is not None:
+            chunks = await image_cache.open(entry, start, end)
+        
+        if chunks is None:
+            if byte_range:
+                stream = await storage_service.open_image_stream(image_path, start, end - start)
+            else:
+                stream = await storage_service.open_image_stream(image_path)
+            if stream is None:
+                raise HTTPException(
+                    status_code=404, 
+                    detail=f"이미지를 찾을 수 없습니다: {image_path}"
+                )
+            
+            if not use_cache:
+                chunks = stream.chunks
+            elif byte_range:
+                chunks = stream.chunks
+                if image_cache.cacheable(size):
+                    task = asyncio.create_task(image_cache.fill(image_path, storage_service))
+                    _cache_fill_tasks.add(task)
+                    task.add_done_callback(_cache_fill_tasks.discard)
+            else:
+                chunks = image_cache.tee(image_path, etag, size, content_type, stream.chunks)
+        
+        return StreamingResponse(chunks, status_code=status_code, media_type=content_type, headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error streaming image %s: %s", image_path, e)
+        raise HTTPException(
+            status_code=500, 
+            detail=f"이미지 다운로드 중 오류 발생: {str(e)}"
+        )
+
 # 특정 이미지 조회 - 경로 전체를 캡처
 @app.get("/api/v1/images/{image_path:path}")
 async def get_image(image_path: str):
@@ -231,12 +1145,14 @@ async def get_image(image_path: str):
     - **image_path**: 이미지 경로 (예: 2025/11/21/xxx.png)
     """
     try:
-        logger.info(f"Fetching image metadata for path: {image_path}")
+        logger.info("Fetching image metadata for path: %s", image_path, extra=SAMPLED)
+        # Blob URL로 직접 내려받는 클라이언트도 있으므로 메타데이터 조회도 조회 기록에 포함
+        access_tracker.record(image_path)
         
         image_data = await storage_service.get_image_metadata(image_path)
         
         if not image_data:
-            logger.warning(f"Image not found: {image_path}")
+            logger.warning("Image not found: %s", image_path)
             raise HTTPException(
                 status_code=404, 
                 detail=f"이미지를 찾을 수 없습니다: {image_path}"
@@ -247,7 +1163,7 @@ async def get_image(image_path: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting image {image_path}: {str(e)}")
+        logger.error("Error getting image %s: %s", image_path, e)
         raise HTTPException(
             status_code=500, 
             detail=f"이미지 조회 중 오류 발생: {str(e)}"
@@ -262,12 +1178,14 @@ async def delete_image(image_path: str):
     - **image_path**: 이미지 경로 (예: 2025/11/21/xxx.png)
     """
     try:
-        logger.info(f"Deleting image: {image_path}")
+        logger.info("Deleting image: %s", image_path)
         
         success = await storage_service.delete_image(image_path)
+        await image_cache.invalidate(image_path)
+        await prompt_index.remove(image_path)
         
         if not success:
-            logger.warning(f"Image not found for deletion: {image_path}")
+            logger.warning("Image not found for deletion: %s", image_path)
             raise HTTPException(
                 status_code=404, 
                 detail=f"이미지를 찾을 수 없습니다: {image_path}"
@@ -281,20 +1199,126 @@ async def delete_image(image_path: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting image {image_path}: {str(e)}")
+        logger.error("Error deleting image %s: %s", image_path, e)
         raise HTTPException(
             status_code=500, 
             detail=f"이미지 삭제 중 오류 발생: {str(e)}"
         )
 
+def _require_admin(request: Request):
+    """X-Admin-Key 헤더 확인 (ADMIN_API_KEY가 없으면 관리자 API 비활성화)"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="관리자 API가 비활성화되어 있습니다")
+    provided = request.headers.get("x-admin-key", "")
+    if not hmac.compare_digest(provided.encode("utf-8"), settings.ADMIN_API_KEY.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="관리자 키가 올바르지 않습니다")
+
+# 이미지 정리 작업 상태 / 마지막 보고서
+@app.get("/api/v1/admin/maintenance")
+async def get_maintenance(request: Request):
+    """
+    이미지 정리(보존 기간 삭제 / 계층 이동) 정책과 마지막 실행 보고서 조회
+    """
+    _require_admin(request)
+    return {
+        **maintenance_service.snapshot(),
+        "policy": maintenance_service.policy(),
+        "last_report": maintenance_service.last_report
+    }
+
+# 이미지 정리 작업 실행
+@app.post("/api/v1/admin/maintenance/run")
+async def run_maintenance(request: Request, dry_run: bool = True):
+    """
+    이미지 정리 작업 실행
+
+    - **dry_run**: True(기본)면 변경 없이 대상 개수/용량 보고서를 바로 반환
+    - False면 백그라운드로 실행하고 202 반환 (결과는 GET /api/v1/admin/maintenance)
+    """
+    _require_admin(request)
+    if maintenance_service.running:
+        raise HTTPException(status_code=409, detail="정리 작업이 이미 실행 중입니다")
+
+    if dry_run:
+        return await maintenance_service.run(dry_run=True)
+
+    task = asyncio.create_task(maintenance_service.run(dry_run=False))
+    _maintenance_tasks.add(task)
+    task.add_done_callback(_maintenance_done)
+    return JSONResponse(status_code=202, content={"status": "started", "dry_run": False})
+
+# 관리자 API로 시작한 정리 작업 (참조를 유지해 실행 중 GC되지 않게 함)
+_maintenance_tasks: Set[asyncio.Task] = set()
+
+def _maintenance_done(task: asyncio.Task):
+    _maintenance_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Maintenance run failed: %s", task.exception())
+
+# 실행 중인 워커 스택 샘플링 프로파일
+_profile_lock = asyncio.Lock()
+
+@app.get("/api/v1/admin/profile")
+async def profile_worker(
+    request: Request,
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    all_threads: bool = False,
+    fmt: str = Query("collapsed", alias="format", pattern="^(collapsed|json)$")
+):
+    """
+    요청을 받은 워커를 seconds 동안 스택 샘플링 (재배포 없이 핫스팟 확인용)
+
+    - **seconds**: 샘플링 시간 (최대 PROFILE_MAX_SECONDS)
+    - **interval_ms**: 샘플링 간격
+    - **all_threads**: True면 이벤트 루프 외 스레드(to_thread 작업, 로그 출력 등)도 포함
+    - **format**: `collapsed`(flamegraph.pl / speedscope 입력, 기본) 또는 `json`
+    """
+    _require_admin(request)
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="이미 프로파일링 중입니다")
+    
+    async with _profile_lock:
+        profile = await asyncio.to_thread(
+            sample_stacks,
+            min(seconds, settings.PROFILE_MAX_SECONDS),
+            interval_ms / 1000,
+            None if all_threads else threading.get_ident()
+        )
+    
+    if fmt == "json":
+        return {
+            **profile,
+            "stacks": [{"stack": stack.split(";"), "count": count} for stack, count in profile["stacks"].most_common()]
+        }
+    return PlainTextResponse(to_collapsed(profile))
+
 # 메트릭스 엔드포인트 (Prometheus)
 @app.get("/metrics")
-async def metrics():
+async def metrics(request: Request):
     """
     Prometheus 메트릭스
+
+    Prometheus 스크레이퍼(Accept: text/plain 또는 openmetrics)에는 카운터/히스토그램을 텍스트 노출 형식으로,
+    그 외에는 서비스 상태를 포함한 JSON을 반환한다.
     """
+    accept = request.headers.get("accept", "")
+    if "text/plain" in accept or "openmetrics" in accept:
+        return Response(metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
     return {
         "active_websocket_connections": len(manager.active_connections),
+        "websocket": manager.snapshot(),
+        "result_buffer": result_buffer.snapshot(),
+        "dropped_log_records": dropped_log_records(),
+        "image_cache": image_cache.snapshot(),
+        "prompt_index": prompt_index.snapshot(),
+        "duplicate_index": duplicate_index.snapshot(),
+        "generation_scheduler": generation_scheduler.snapshot(),
+        "rejection_cache": image_service.rejections.snapshot(),
+        "idempotency": idempotency_store.snapshot(),
+        "maintenance": maintenance_service.snapshot(),
+        "event_loop": loop_monitor.snapshot(),
+        **metrics_registry.snapshot(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
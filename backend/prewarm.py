@@ -0,0 +1,532 @@
+"""
+인기 장면 캐시 예열 CLI
+
+많은 독자가 보는 프롬프트(유명 소설 장면 등)를 한산한 시간대에 미리 생성해 스토리지에 올리고
+프롬프트 인덱스에 기록한다. 서버 워커는 PROMPT_INDEX_REFRESH_INTERVAL마다 인덱스를 다시 읽으므로,
+이후 같은(또는 유사한) 프롬프트 요청은 DALL-E 호출 없이 저장된 이미지로 응답한다 (ENABLE_DUPLICATE_REUSE).
+
+입력은 파일 또는 표준 입력(-)이며 한 줄에 프롬프트 하나, 또는 JSON 객체
+{"prompt": ..., "size": ..., "quality": ..., "style": ...}를 쓴다. 빈 줄과 #로 시작하는 줄은 무시한다.
+
+- 진행 상황은 항목별로 PREWARM_PROGRESS_PATH(JSONL)에 기록하고, 다시 실행하면 끝난 항목은 건너뛴다.
+- 생성된 이미지는 업로드 전에 진행 기록 옆 디렉터리(<진행 기록 이름>_images)에 보관한다. 업로드나 인덱스 기록이
+  실패한 항목은 다시 시도할 때(다시 실행해도) DALL-E를 다시 호출하지 않고 보관한 이미지로 업로드만 다시 한다.
+- 생성 속도는 PREWARM_RATE_PER_MINUTE 토큰 버킷으로 제한한다. 할당량 초과(429)를 받으면 속도를 절반으로 줄이고
+  서버가 알려준 시간만큼 멈췄다가, 연속으로 성공하면 원래 속도로 되돌린다.
+- PREWARM_WINDOW 밖이면 시간대가 시작될 때까지 기다린다 (--stop-outside-window면 종료).
+
+사용 예:
+    cd backend
+    python prewarm.py scenes.txt --window 01:00-06:00 --rate 6 --report prewarm.json
+    cat scenes.jsonl | python prewarm.py - --max-images 200 --dry-run
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from services.http_pool import close_http_session
+from services.image_generator import (
+    DEFAULT_QUOTA_RETRY_AFTER,
+    ContentPolicyError,
+    ImageGeneratorService,
+    QuotaExceededError,
+)
+from services.logging_config import setup_logging, shutdown_logging
+from services.prompt_fingerprint import PromptFingerprintIndex, prompt_digest
+from services.prompt_index import PromptIndex
+from services.rate_limiter import InMemoryRateLimitBackend
+from services.storage_service import create_storage_service
+
+logger = logging.getLogger("prewarm")
+
+DEFAULT_OPTIONS = {"size": "1024x1024", "quality": "standard", "style": "vivid"}
+# 진행 기록에서 이 상태인 항목은 다시 실행할 때 건너뜀 (failed는 다시 시도)
+FINISHED_STATES = {"warmed", "cached", "rejected"}
+# 생성(과금) 후 업로드 전에 진행 기록에 남기는 필드 (업로드만 다시 시도할 때 사용)
+GENERATED_FIELDS = ("image_path", "source_url", "generated_at", "revised_prompt")
+# DALL-E 결과 URL 유효 시간 (초), 보관한 이미지 없이 이보다 오래됐으면 다시 생성
+GENERATED_URL_TTL = 3600
+# 연속으로 이만큼 성공하면 줄였던 속도를 두 배로 회복
+RECOVERY_SUCCESSES = 5
+MIN_RATE_FRACTION = 1 / 16
+
+
+@dataclass
+class PrewarmItem:
+    prompt: str
+    size: str
+    quality: str
+    style: str
+
+    @property
+    def options(self) -> dict:
+        return {"size": self.size, "quality": self.quality, "style": self.style}
+
+    @property
+    def key(self) -> str:
+        """정규화된 프롬프트 해시 + 생성 옵션 (재사용 판정과 같은 기준)"""
+        return f"{prompt_digest(self.prompt)}:{self.size}:{self.quality}:{self.style}"
+
+
+def read_items(lines) -> Tuple[List[PrewarmItem], int]:
+    """입력 줄을 항목으로 변환 (같은 프롬프트+옵션은 하나로 합침). (항목, 중복/무효 줄 수) 반환"""
+    items: Dict[str, PrewarmItem] = {}
+    skipped = 0
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning("Skipping line %s: invalid JSON (%s)", number, e)
+                skipped += 1
+                continue
+        else:
+            data = {"prompt": line}
+
+        prompt = str(data.get("prompt") or "").strip()
+        if not prompt or len(prompt) > 4000:
+            logger.warning("Skipping line %s: prompt must be 1-4000 characters", number)
+            skipped += 1
+            continue
+        item = PrewarmItem(prompt, **{name: data.get(name) or default for name, default in DEFAULT_OPTIONS.items()})
+        if item.key in items:
+            skipped += 1
+            continue
+        items[item.key] = item
+    return list(items.values()), skipped
+
+
+def parse_window(window: str) -> Optional[Tuple[int, int]]:
+    """"HH:MM-HH:MM"을 (시작 분, 끝 분)으로 변환 (비어 있으면 None, 자정을 넘는 시간대 허용)"""
+    if not window:
+        return None
+    try:
+        start, end = window.split("-")
+        minutes = []
+        for value in (start, end):
+            hour, minute = value.strip().split(":")
+            if not (0 <= int(hour) < 24 and 0 <= int(minute) < 60):
+                raise ValueError
+            minutes.append(int(hour) * 60 + int(minute))
+    except ValueError:
+        raise ValueError(f"시간대 형식이 잘못되었습니다 (HH:MM-HH:MM): {window}")
+    if minutes[0] == minutes[1]:
+        raise ValueError(f"시작과 끝이 같은 시간대입니다: {window}")
+    return minutes[0], minutes[1]
+
+
+def seconds_until_window(window: Optional[Tuple[int, int]], now: Optional[datetime] = None) -> float:
+    """시간대 안이면 0, 밖이면 다음 시작까지 남은 초 (서버 로컬 시간 기준)"""
+    if window is None:
+        return 0.0
+    now = now or datetime.now()
+    start, end = window
+    minute = now.hour * 60 + now.minute
+    inside = start <= minute < end if start < end else (minute >= start or minute < end)
+    if inside:
+        return 0.0
+    begins = now.replace(hour=start // 60, minute=start % 60, second=0, microsecond=0)
+    if begins <= now:
+        begins += timedelta(days=1)
+    return (begins - now).total_seconds()
+
+
+class ProgressLog:
+    """항목별 결과를 append-only JSONL로 기록 (같은 키는 마지막 기록이 유효)"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.records: Dict[str, dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.records[record["key"]] = record
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # 중단되며 잘린 마지막 줄
+        self._file = None
+
+    @property
+    def spool_dir(self) -> str:
+        """생성했지만 아직 업로드하지 못한 이미지 보관 디렉터리"""
+        return os.path.splitext(self.path)[0] + "_images"
+
+    def finished(self, item: PrewarmItem) -> bool:
+        record = self.records.get(item.key)
+        return record is not None and record.get("status") in FINISHED_STATES
+
+    def generated(self, item: PrewarmItem) -> Optional[dict]:
+        """생성은 끝났지만 업로드/인덱스 기록이 안 된 항목의 GENERATED_FIELDS (없으면 None)"""
+        record = self.records.get(item.key)
+        if record is None or record.get("status") in FINISHED_STATES:
+            return None
+        fields = {name: record[name] for name in GENERATED_FIELDS if name in record}
+        return fields if "image_path" in fields or "source_url" in fields else None
+
+    def save_image(self, item: PrewarmItem, image_data: bytes) -> str:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, hashlib.sha256(item.key.encode("utf-8")).hexdigest() + ".png")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(image_data)
+        os.replace(tmp_path, path)
+        return path
+
+    def write(self, item: PrewarmItem, status: str, **fields):
+        record = {
+            "key": item.key,
+            "status": status,
+            "prompt": item.prompt,
+            "options": item.options,
+            "at": datetime.utcnow().isoformat(),
+            **fields
+        }
+        self.records[item.key] = record
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class AdaptiveRate:
+    """
+    분당 생성 수 제한 (버스트 1 토큰 버킷, 워커 전체 공유)
+
+    할당량 초과를 받으면 속도를 절반으로(최소 1/16) 줄이고 retry_after 동안 모든 워커를 멈춘다.
+    이후 RECOVERY_SUCCESSES번 연속 성공할 때마다 두 배씩 원래 속도까지 회복한다.
+    """
+
+    def __init__(self, per_minute: float):
+        self.target = per_minute / 60
+        self.rate = self.target
+        self.throttled = 0
+        self._limiter = InMemoryRateLimitBackend()
+        self._paused_until = 0.0
+        self._successes = 0
+
+    async def acquire(self):
+        while True:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            result = await self._limiter.take("prewarm", self.rate, 1, 1)
+            if result.allowed:
+                return
+            await asyncio.sleep(result.retry_after)
+
+    def on_success(self):
+        self._successes += 1
+        if self.rate < self.target and self._successes >= RECOVERY_SUCCESSES:
+            self.rate = min(self.target, self.rate * 2)
+            self._successes = 0
+            logger.info("Prewarm rate restored to %.2f/min", self.rate * 60)
+
+    def on_throttled(self, retry_after: Optional[float]):
+        self.throttled += 1
+        self._successes = 0
+        self.rate = max(self.target * MIN_RATE_FRACTION, self.rate / 2)
+        pause = retry_after if retry_after is not None else DEFAULT_QUOTA_RETRY_AFTER
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        logger.warning("Quota exceeded, pausing %.1fs and slowing to %.2f/min", pause, self.rate * 60)
+
+
+class Prewarmer:
+    """입력 항목을 concurrency개 워커로 생성 -> 업로드 -> 인덱스 기록"""
+
+    def __init__(self, args, items: List[PrewarmItem], progress: ProgressLog):
+        self.args = args
+        self.items = items
+        self.progress = progress
+        self.window = parse_window(args.window)
+        self.rate = AdaptiveRate(args.rate)
+        self.image_service = ImageGeneratorService()
+        self.storage = create_storage_service()
+        self.prompt_index = PromptIndex()
+        self.duplicate_index = PromptFingerprintIndex()
+        self.prompt_index.add_listener(self.duplicate_index.on_index_record)
+        self.counts = {state: 0 for state in ("warmed", "cached", "rejected", "failed", "resumed", "remaining")}
+        self.warmed: List[dict] = []
+        self.failures: List[dict] = []
+        self._queue: "asyncio.Queue[Tuple[PrewarmItem, int]]" = asyncio.Queue()
+        self._reserved = 0
+        self._stop_reason: Optional[str] = None
+
+    def _budget_left(self) -> bool:
+        return self.args.max_images is None or self._reserved < self.args.max_images
+
+    async def _wait_for_window(self) -> bool:
+        """시간대 안이 될 때까지 대기 (--stop-outside-window면 False)"""
+        while True:
+            remaining = seconds_until_window(self.window)
+            if remaining <= 0:
+                return True
+            if self.args.stop_outside_window:
+                self._stop_reason = "outside_window"
+                return False
+            logger.info("Outside prewarm window %s, sleeping %.0fs", self.args.window, remaining)
+            # 시계 변경(서머타임 등)에 대비해 최대 10분 단위로 다시 확인
+            await asyncio.sleep(min(remaining, 600))
+
+    def _reusable(self, item: PrewarmItem):
+        return self.duplicate_index.find(item.prompt, item.options)
+
+    async def _warm(self, item: PrewarmItem):
+        generated = await self._load_generated(item)
+        if generated is None:
+            await self.rate.acquire()
+            # 대기하는 동안 서버가 같은 프롬프트를 생성했을 수 있음
+            await self.prompt_index.refresh()
+            match = self._reusable(item)
+            if match is not None:
+                self._release_budget()
+                self._record_cached(item, match)
+                return
+            generated = await self._generate(item)
+
+        image_data, revised_prompt, image_path = generated
+        blob_result = await self.storage.upload_image(image_data, item.prompt)
+        await self.prompt_index.add(
+            image_id=blob_result["image_id"],
+            prompt=item.prompt,
+            revised_prompt=revised_prompt,
+            url=blob_result["image_url"],
+            options=item.options
+        )
+        self.counts["warmed"] += 1
+        self.warmed.append({"prompt": item.prompt, "image_id": blob_result["image_id"], **item.options})
+        self.progress.write(item, "warmed", image_id=blob_result["image_id"], url=blob_result["image_url"])
+        await asyncio.to_thread(_remove_file, image_path)
+        logger.info("Warmed %s (%s/%s)", blob_result["image_id"], self.counts["warmed"], len(self.items))
+
+    async def _generate(self, item: PrewarmItem) -> Tuple[bytes, Optional[str], str]:
+        """DALL-E로 생성하고 업로드 전에 이미지를 보관 (이미지, revised_prompt, 보관 경로)"""
+        result = await self.image_service.generate_image(prompt=item.prompt, **item.options)
+        if not result or "url" not in result:
+            raise Exception("이미지 생성 실패")
+        self.rate.on_success()
+        revised_prompt = result.get("revised_prompt")
+        # 과금된 결과를 먼저 기록해 두어 다운로드가 실패해도 URL이 유효한 동안은 다시 생성하지 않음
+        self.progress.write(
+            item, "generated", source_url=result["url"], generated_at=time.time(), revised_prompt=revised_prompt
+        )
+        image_data, _ = await self.storage.download_image(result["url"])
+        return image_data, revised_prompt, await self._spool(item, image_data, revised_prompt)
+
+    async def _load_generated(self, item: PrewarmItem) -> Optional[Tuple[bytes, Optional[str], str]]:
+        """이전 시도에서 생성한 이미지 (없거나 더 이상 받을 수 없으면 None)"""
+        generated = self.progress.generated(item)
+        if generated is None:
+            return None
+        revised_prompt = generated.get("revised_prompt")
+        if "image_path" in generated:
+            try:
+                image_data = await asyncio.to_thread(_read_file, generated["image_path"])
+            except OSError as e:
+                logger.warning("Saved prewarm image is missing, generating again: %s", e)
+                return None
+            logger.info("Retrying upload of previously generated image for %s", item.key)
+            return image_data, revised_prompt, generated["image_path"]
+        if time.time() - generated.get("generated_at", 0) >= GENERATED_URL_TTL:
+            logger.warning("Generated image URL for %s has expired, generating again", item.key)
+            return None
+        image_data, _ = await self.storage.download_image(generated["source_url"])
+        return image_data, revised_prompt, await self._spool(item, image_data, revised_prompt)
+
+    async def _spool(self, item: PrewarmItem, image_data: bytes, revised_prompt: Optional[str]) -> str:
+        image_path = await asyncio.to_thread(self.progress.save_image, item, image_data)
+        self.progress.write(item, "generated", image_path=image_path, revised_prompt=revised_prompt)
+        return image_path
+
+    def _record_cached(self, item: PrewarmItem, match):
+        self.counts["cached"] += 1
+        if not self.args.dry_run:
+            self.progress.write(item, "cached", image_id=match.image_id, similarity=round(match.similarity, 3))
+
+    def _release_budget(self):
+        self._reserved -= 1
+
+    async def _worker(self):
+        while self._stop_reason is None:
+            try:
+                item, attempts = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                if not await self._wait_for_window():
+                    self._queue.put_nowait((item, attempts))
+                    return
+                if not self._budget_left():
+                    # 진행 중인 생성이 실패하면 그 워커가 남은 예산을 이어서 씀
+                    self._queue.put_nowait((item, attempts))
+                    return
+                self._reserved += 1
+                await self._warm(item)
+            except QuotaExceededError as e:
+                # 할당량 대기는 시도 횟수에 넣지 않음
+                self._release_budget()
+                self.rate.on_throttled(e.retry_after)
+                self._queue.put_nowait((item, attempts))
+            except ContentPolicyError as e:
+                # 거부된 프롬프트는 이미지를 만들지 않았으므로 --max-images 예산을 돌려줌
+                self._release_budget()
+                self.counts["rejected"] += 1
+                self.progress.write(item, "rejected", reason=e.reason)
+            except Exception as e:
+                self._release_budget()
+                attempts += 1
+                if attempts < settings.PREWARM_MAX_ATTEMPTS:
+                    logger.warning("Prewarm attempt %s failed, retrying later: %s", attempts, e)
+                    self._queue.put_nowait((item, attempts))
+                else:
+                    self.counts["failed"] += 1
+                    self.failures.append({"prompt": item.prompt, "error": str(e), **item.options})
+                    # 생성한 이미지는 기록에 남겨 다시 실행할 때 업로드만 다시 시도
+                    self.progress.write(
+                        item, "failed", error=str(e), attempts=attempts, **(self.progress.generated(item) or {})
+                    )
+                    logger.error("Prewarm failed after %s attempts: %s", attempts, e)
+
+    async def run(self) -> dict:
+        started = time.perf_counter()
+        await self.prompt_index.load()
+
+        pending = []
+        for item in self.items:
+            if self.progress.finished(item):
+                self.counts["resumed"] += 1
+            elif (match := self._reusable(item)) is not None:
+                self._record_cached(item, match)
+            else:
+                pending.append(item)
+
+        if self.args.dry_run:
+            self.counts["remaining"] = len(pending)
+            self._stop_reason = "dry_run"
+        else:
+            for item in pending:
+                self._queue.put_nowait((item, 0))
+            workers = max(1, self.args.concurrency)
+            await asyncio.gather(*(self._worker() for _ in range(workers)))
+            self.counts["remaining"] = self._queue.qsize()
+            if self.counts["remaining"] and self._stop_reason is None:
+                self._stop_reason = "max_images"
+
+        return {
+            "meta": {
+                "timestamp": datetime.utcnow().isoformat(),
+                "input_items": len(self.items),
+                "rate_per_minute": self.args.rate,
+                "concurrency": self.args.concurrency,
+                "window": self.args.window or None,
+                "max_images": self.args.max_images,
+                "dry_run": self.args.dry_run,
+                "progress_path": self.progress.path,
+            },
+            "status": self._stop_reason or "completed",
+            "duration_seconds": round(time.perf_counter() - started, 1),
+            "totals": {**self.counts, "quota_throttled": self.rate.throttled},
+            "final_rate_per_minute": round(self.rate.rate * 60, 2),
+            "warmed": self.warmed,
+            "failed": self.failures,
+            "pending": [item.prompt for item in pending] if self.args.dry_run else [],
+        }
+
+    async def close(self):
+        self.progress.close()
+        await self.storage.close()
+        await close_http_session()
+        await self.image_service.client.close()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _open_input(path: str):
+    if path == "-":
+        return sys.stdin.read().splitlines()
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+async def run(args) -> int:
+    items, skipped = read_items(_open_input(args.input))
+    if skipped:
+        logger.info("Skipped %s duplicate or invalid lines", skipped)
+    if not items:
+        print("예열할 프롬프트가 없습니다", file=sys.stderr)
+        return 1
+
+    prewarmer = Prewarmer(args, items, ProgressLog(args.progress))
+    try:
+        report = await prewarmer.run()
+    finally:
+        await prewarmer.close()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"결과 저장: {args.report}")
+    return 1 if report["totals"]["failed"] else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Artelligence 인기 장면 캐시 예열")
+    parser.add_argument("input", help="프롬프트 목록 파일 (텍스트 또는 JSON lines, -는 표준 입력)")
+    parser.add_argument("--rate", type=float, default=settings.PREWARM_RATE_PER_MINUTE, help="분당 최대 생성 수")
+    parser.add_argument("--concurrency", type=int, default=settings.PREWARM_CONCURRENCY, help="동시 생성 수")
+    parser.add_argument("--window", default=settings.PREWARM_WINDOW, help="실행 시간대 HH:MM-HH:MM (로컬 시간)")
+    parser.add_argument("--stop-outside-window", action="store_true", help="시간대 밖이면 기다리지 않고 종료")
+    parser.add_argument("--max-images", type=int, help="이번 실행에서 새로 생성할 최대 이미지 수")
+    parser.add_argument("--progress", default=settings.PREWARM_PROGRESS_PATH, help="진행 기록 JSONL 경로")
+    parser.add_argument("--dry-run", action="store_true", help="생성하지 않고 남은 항목만 보고")
+    parser.add_argument("--report", help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+    if args.rate <= 0:
+        parser.error("--rate는 0보다 커야 합니다")
+    try:
+        parse_window(args.window)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+if __name__ == "__main__":
+    setup_logging()
+    try:
+        code = asyncio.run(run(parse_args()))
+    except KeyboardInterrupt:
+        # 끝난 항목은 이미 진행 기록에 있으므로 다시 실행하면 이어서 진행
+        code = 130
+    finally:
+        shutdown_logging()
+    sys.exit(code)
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+from config import settings
+from services.logging_config import SAMPLED
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 서버가 연결을 닫을 때 쓰는 close code
+CLOSE_REPLACED = 4000  # 같은 client_id로 새 연결이 들어옴
+CLOSE_SLOW_CONSUMER = 4001  # 송신 큐가 가득 찼거나 송신 타임아웃
+CLOSE_IDLE = 4002  # 유휴 시간 초과 (ping에 응답 없음)
+CLOSE_TRY_AGAIN_LATER = 1013  # 워커당 최대 연결 수 초과
+
+# 재전송 중에도 실시간 메시지(ping, 진행 상황)가 들어갈 수 있게 비워 두는 송신 큐 자리
+REPLAY_QUEUE_HEADROOM = 8
+REPLAY_POLL_INTERVAL = 0.05
+
+
+class Connection:
+    """WebSocket 연결 하나의 상태 (송신 큐 + 전용 writer 태스크)"""
+
+    __slots__ = ("client_id", "websocket", "queue", "writer", "last_seen", "connected_at", "closed", "token")
+
+    def __init__(self, client_id: str, websocket: WebSocket, queue_size: int):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.last_seen = time.monotonic()
+        self.connected_at = self.last_seen
+        self.closed = False
+        # 연결 표시(presence)의 주인 확인용 (같은 client_id의 다른 연결이 지우지 않도록)
+        self.token = uuid.uuid4().hex
+
+
+class ConnectionManager:
+    """
+    WebSocket 연결 관리
+
+    - 송신: 연결마다 크기가 제한된 큐와 writer 태스크를 두어 느린 클라이언트가 핸들러를 막지 않게 한다.
+      큐가 가득 차거나 송신이 WS_SEND_TIMEOUT을 넘기면 그 연결만 닫는다.
+    - 하트비트: 태스크 하나가 모든 연결에 주기적으로 ping 메시지를 보내고,
+      WS_IDLE_TIMEOUT 동안 아무 메시지(pong 포함)도 받지 못한 연결은 정리한다.
+    - 같은 client_id로 다시 연결하면 이전 소켓을 닫고 새 소켓으로 교체한다.
+    - 워커당 연결 수가 WS_MAX_CONNECTIONS를 넘으면 새 연결을 1013으로 거절한다.
+    - buffer(ResultBuffer)가 있으면 보내는 메시지에 seq를 붙여 보관하고, 재연결 시 놓친 메시지를 다시 보낸다.
+      연결이 끊긴 동안 보낸 메시지도 버퍼에는 남는다.
+      연결돼 있는 동안은 버퍼에 연결 표시를 두고 하트비트마다 갱신한다 (다른 워커가 재연결 여부를 확인하는 용도).
+      재전송할 메시지가 송신 큐보다 많을 수 있으므로 재전송은 큐에 자리가 날 때까지 기다리며 넣는다.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        send_timeout: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        buffer=None
+    ):
+        self.max_connections = max_connections or settings.WS_MAX_CONNECTIONS
+        self.queue_size = queue_size or settings.WS_SEND_QUEUE_SIZE
+        self.send_timeout = send_timeout or settings.WS_SEND_TIMEOUT
+        self.heartbeat_interval = heartbeat_interval or settings.WS_HEARTBEAT_INTERVAL
+        self.idle_timeout = idle_timeout or settings.WS_IDLE_TIMEOUT
+        self.buffer = buffer
+        self.active_connections: Dict[str, Connection] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._closing: set = set()
+
+    async def start(self):
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+        for connection in list(self.active_connections.values()):
+            await self._close(connection, 1001, "server shutdown")
+
+    async def connect(self, websocket: WebSocket, client_id: str) -> Optional[Connection]:
+        """연결 수락. 최대 연결 수를 넘으면 닫고 None 반환"""
+        await websocket.accept()
+
+        previous = self.active_connections.get(client_id)
+        if previous is None and len(self.active_connections) >= self.max_connections:
+            metrics.inc("ws_connections_rejected")
+            logger.warning("Rejecting client %s: connection limit %s reached", client_id, self.max_connections)
+            await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+            return None
+
+        connection = Connection(client_id, websocket, self.queue_size)
+        connection.writer = asyncio.create_task(self._writer(connection))
+        self.active_connections[client_id] = connection
+        if self.buffer is not None:
+            await self.buffer.set_presence(client_id, connection.token)
+
+        if previous is not None:
+            metrics.inc("ws_connections_replaced")
+            logger.info("Client %s reconnected, closing previous socket", client_id)
+            self._close_later(previous, CLOSE_REPLACED, "replaced by new connection")
+
+        metrics.inc("ws_connections_opened")
+        logger.info("Client %s connected", client_id, extra=SAMPLED)
+        return connection
+
+    async def disconnect(self, client_id: str, connection: Optional[Connection] = None):
+        """연결 제거. connection을 넘기면 현재 등록된 연결과 같을 때만 제거 (교체된 이전 연결 보호)"""
+        current = self.active_connections.get(client_id)
+        if current is None or (connection is not None and current is not connection):
+            if connection is not None:
+                self._stop_writer(connection)
+            return
+
+        del self.active_connections[client_id]
+        self._stop_writer(current)
+        if self.buffer is not None:
+            await self.buffer.clear_presence(client_id, current.token)
+        logger.info("Client %s disconnected", client_id, extra=SAMPLED)
+
+    def touch(self, connection: Connection):
+        """수신 메시지가 있을 때 호출 (유휴 판정 기준)"""
+        connection.last_seen = time.monotonic()
+
+    async def send_message(self, client_id: str, message: dict, record: bool = True):
+        """
+        (버퍼에 기록 후) 송신 큐에 넣고 바로 반환. 큐가 가득 찬 느린 클라이언트는 연결을 닫음
+
+        record=False는 다른 워커가 이미 버퍼에 기록한 메시지를 이 워커의 연결로 전달할 때 쓴다.
+        """
+        if self.buffer is not None and record:
+            message = await self.buffer.record(client_id, message)
+        self._enqueue(client_id, message)
+
+    async def replay(self, connection: Connection, last_seq: int) -> int:
+        """
+        last_seq 이후 버퍼에 남은 메시지를 다시 보냄 (보낸 개수 반환)
+
+        버퍼(WS_REPLAY_MAX_EVENTS)가 송신 큐(WS_SEND_QUEUE_SIZE)보다 클 수 있으므로 put_nowait로
+        한꺼번에 넣지 않고, 실시간 메시지용 자리를 남긴 채 writer가 큐를 비울 때까지 기다린다.
+        WS_SEND_TIMEOUT 동안 자리가 나지 않으면 느린 클라이언트로 보고 연결을 닫는다.
+        """
+        if self.buffer is None:
+            return 0
+        events = await self.buffer.replay(connection.client_id, last_seq)
+        limit = max(1, self.queue_size - REPLAY_QUEUE_HEADROOM)
+        sent = 0
+        for message in events:
+            waited = 0.0
+            while connection.queue.qsize() >= limit and not connection.closed:
+                if waited >= self.send_timeout:
+                    metrics.inc("ws_slow_consumers")
+                    logger.warning("Client %s did not drain replay, closing connection", connection.client_id)
+                    self._close_later(connection, CLOSE_SLOW_CONSUMER, "replay timeout")
+                    return sent
+                await asyncio.sleep(REPLAY_POLL_INTERVAL)
+                waited += REPLAY_POLL_INTERVAL
+            if connection.closed:
+                break
+            connection.queue.put_nowait(message)
+            sent += 1
+        return sent
+
+    def _enqueue(self, client_id: str, message: dict):
+        connection = self.active_connections.get(client_id)
+        if connection is None or connection.closed:
+            return
+        try:
+            connection.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            metrics.inc("ws_slow_consumers")
+            logger.warning("Client %s send queue full, closing connection", client_id)
+            self._close_later(connection, CLOSE_SLOW_CONSUMER, "send queue full")
+
+    async def _writer(self, connection: Connection):
+        try:
+            while True:
+                message = await connection.queue.get()
+                await asyncio.wait_for(connection.websocket.send_json(message), timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            metrics.inc("ws_send_timeouts")
+            logger.warning("Client %s send timed out, closing connection", connection.client_id)
+            self._close_later(connection, CLOSE_SLOW_CONSUMER, "send timeout")
+        except Exception as e:
+            logger.info("Client %s send failed: %s", connection.client_id, e)
+            self._close_later(connection, 1011, "send failed")
+
+    def _stop_writer(self, connection: Connection):
+        connection.closed = True
+        if connection.writer is not None and not connection.writer.done() \
+                and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    def _close_later(self, connection: Connection, code: int, reason: str):
+        task = asyncio.create_task(self._close(connection, code, reason))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, connection: Connection, code: int, reason: str):
+        """연결을 닫고 목록에서 제거 (수신 루프는 이어서 WebSocketDisconnect를 받음)"""
+        if self.active_connections.get(connection.client_id) is connection:
+            del self.active_connections[connection.client_id]
+            if self.buffer is not None:
+                await self.buffer.clear_presence(connection.client_id, connection.token)
+        self._stop_writer(connection)
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=code, reason=reason), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            for connection in list(self.active_connections.values()):
+                if now - connection.last_seen > self.idle_timeout:
+                    metrics.inc("ws_idle_reaped")
+                    logger.info("Client %s idle for %.0fs, closing", connection.client_id, now - connection.last_seen)
+                    self._close_later(connection, CLOSE_IDLE, "idle timeout")
+                else:
+                    self._enqueue(connection.client_id, {"status": "ping", "ts": time.time()})
+            if self.buffer is not None:
+                await self.buffer.refresh_presence({
+                    client_id: connection.token
+                    for client_id, connection in self.active_connections.items() if not connection.closed
+                })
+
+    def snapshot(self) -> dict:
+        return {
+            "active": len(self.active_connections),
+            "max_connections": self.max_connections,
+            "queued_messages": sum(c.queue.qsize() for c in self.active_connections.values())
+        }
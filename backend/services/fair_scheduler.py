@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from config import settings
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerQueueFull(Exception):
+    """클라이언트별 대기열이 가득 찬 경우"""
+
+
+class FairScheduler:
+    """
+    생성 작업 슬롯의 가중 라운드 로빈 스케줄러
+
+    워커당 동시 실행 수를 max_concurrency로 제한하고, 슬롯이 빌 때마다 대기 중인 클라이언트를
+    차례로 돌며 가중치만큼 작업을 꺼낸다. 한 클라이언트가 요청을 몰아 넣어도 다른 클라이언트는
+    최대 (대기 클라이언트 수 x 가중치)번의 차례 안에 슬롯을 얻으므로 꼬리 지연이 제한된다.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_queue_per_client: Optional[int] = None):
+        self.max_concurrency = max_concurrency or settings.GENERATION_MAX_CONCURRENCY
+        self.max_queue_per_client = max_queue_per_client or settings.GENERATION_MAX_QUEUE_PER_CLIENT
+        self._active = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {}
+        self._weights: Dict[str, int] = {}
+        self._credits: Dict[str, int] = {}
+        self._order: Deque[str] = deque()
+
+    @asynccontextmanager
+    async def slot(self, key: str, weight: int = 1):
+        """슬롯을 얻을 때까지 대기하고, 블록을 벗어나면 반납"""
+        started = time.perf_counter()
+        await self._acquire(key, max(1, weight))
+        metrics.observe("generation_queue_wait_seconds", time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, key: str, weight: int):
+        if self._active < self.max_concurrency and not self._order:
+            self._active += 1
+            return
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+        if len(queue) >= self.max_queue_per_client:
+            metrics.inc("generation_queue_rejected")
+            raise SchedulerQueueFull("대기 중인 생성 요청이 너무 많습니다")
+
+        if not queue:
+            self._order.append(key)
+            self._credits[key] = weight
+        self._weights[key] = weight
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 슬롯을 받은 직후 취소된 경우 다음 대기자에게 넘김
+                self._release()
+            else:
+                self._discard(key, future)
+            raise
+
+    def _discard(self, key: str, future: asyncio.Future):
+        queue = self._queues.get(key)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            return
+        if not queue:
+            self._drop_client(key)
+
+    def _drop_client(self, key: str):
+        self._queues.pop(key, None)
+        self._weights.pop(key, None)
+        self._credits.pop(key, None)
+        try:
+            self._order.remove(key)
+        except ValueError:
+            pass
+
+    def _release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._active < self.max_concurrency and self._order:
+            key = self._order[0]
+            queue = self._queues[key]
+            future = queue.popleft()
+
+            if not queue:
+                self._drop_client(key)
+            else:
+                self._credits[key] -= 1
+                if self._credits[key] <= 0:
+                    self._credits[key] = self._weights[key]
+                    self._order.rotate(-1)
+
+            if future.done():
+                continue
+            self._active += 1
+            future.set_result(None)
+
+    def snapshot(self) -> dict:
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "queued_clients": len(self._order)
+        }
@@ -0,0 +1,51 @@
+import logging
+from typing import Optional
+
+import aiohttp
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    워커 공용 aiohttp 세션 (Blob Storage 전송 계층 + 생성 이미지 다운로드)
+
+    연결 풀 크기/keep-alive/타임아웃은 HTTP_POOL_* 설정을 따른다.
+    세션은 이벤트 루프 안에서 처음 호출될 때 만들어지고, 종료 시 close_http_session()으로 닫는다.
+    Azure SDK가 응답 압축을 직접 처리하므로 auto_decompress는 끈다.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_MAX_CONNECTIONS,
+            limit_per_host=settings.HTTP_POOL_MAX_PER_HOST,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=settings.HTTP_CONNECT_TIMEOUT,
+                sock_read=settings.HTTP_READ_TIMEOUT
+            ),
+            cookie_jar=aiohttp.DummyCookieJar(),
+            auto_decompress=False,
+            trust_env=True
+        )
+        logger.info(
+            "Shared HTTP session created (limit=%s, per_host=%s)",
+            settings.HTTP_POOL_MAX_CONNECTIONS,
+            settings.HTTP_POOL_MAX_PER_HOST
+        )
+    return _session
+
+
+async def close_http_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
@@ -0,0 +1,202 @@
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import settings
+from services.metrics import metrics
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # 공유 저장소 백엔드를 쓰지 않으면 redis 패키지는 선택 사항
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+WAIT_POLL_INTERVAL = 0.5
+
+
+def request_fingerprint(payload: dict) -> str:
+    """요청 본문의 해시 (같은 키로 다른 요청을 보냈는지 확인하는 용도)"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class InMemoryIdempotencyBackend:
+    """워커 프로세스 단위 저장소 (만료 시각 + LRU로 항목 수 제한)"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.IDEMPOTENCY_MAX_ENTRIES
+        self._records: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    async def claim(self, key: str, record: dict, ttl: float) -> Optional[dict]:
+        """key가 비어 있으면 record를 넣고 None, 있으면 기존 레코드 반환"""
+        existing = await self.get(key)
+        if existing is not None:
+            return existing
+        await self.put(key, record, ttl)
+        return None
+
+    async def get(self, key: str) -> Optional[dict]:
+        item = self._records.get(key)
+        if item is None:
+            return None
+        expires_at, record = item
+        if time.monotonic() >= expires_at:
+            del self._records[key]
+            return None
+        return record
+
+    async def put(self, key: str, record: dict, ttl: float):
+        self._records[key] = (time.monotonic() + ttl, record)
+        self._records.move_to_end(key)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._records.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def close(self):
+        pass
+
+
+class RedisIdempotencyBackend:
+    """Redis 공유 저장소 (레플리카/워커 전체에서 같은 키를 한 번만 실행, SET NX로 선점)"""
+
+    def __init__(self, url: str, prefix: str = "artelligence:idempotency:"):
+        if redis_asyncio is None:
+            raise ValueError("IDEMPOTENCY_BACKEND=redis를 사용하려면 redis 패키지가 필요합니다")
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+
+    async def claim(self, key: str, record: dict, ttl: float) -> Optional[dict]:
+        for _ in range(2):
+            if await self._client.set(self.prefix + key, json.dumps(record), nx=True, px=int(ttl * 1000)):
+                return None
+            existing = await self.get(key)
+            # 선점 실패 직후 만료/삭제됐으면 다시 시도
+            if existing is not None:
+                return existing
+        return None
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = await self._client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def put(self, key: str, record: dict, ttl: float):
+        await self._client.set(self.prefix + key, json.dumps(record), px=int(ttl * 1000))
+
+    async def delete(self, key: str):
+        await self._client.delete(self.prefix + key)
+
+    async def close(self):
+        await self._client.close()
+
+
+def create_idempotency_backend():
+    backend = settings.IDEMPOTENCY_BACKEND.lower()
+    if backend == "memory":
+        return InMemoryIdempotencyBackend()
+    if backend == "redis":
+        return RedisIdempotencyBackend(settings.IDEMPOTENCY_REDIS_URL)
+    raise ValueError(f"지원하지 않는 IDEMPOTENCY_BACKEND: {settings.IDEMPOTENCY_BACKEND}")
+
+
+class IdempotencyStore:
+    """
+    생성 요청 Idempotency-Key 저장소
+
+    - 처음 본 키는 진행 중(in_progress)으로 선점하고 IDEMPOTENCY_INFLIGHT_TTL 동안 유지한다
+      (워커가 죽어도 키가 영원히 잠기지 않도록 짧게 둠).
+    - 성공한 응답은 IDEMPOTENCY_TTL 동안 보관해 같은 키의 재시도에 그대로 돌려준다.
+    - 실패하면 키를 지워 재시도가 다시 실행되게 한다.
+    - 키는 요청자(API 키/IP/client_id) 범위로 나누고, 요청 본문 해시가 다르면 재사용하지 않는다.
+
+    공유 저장소 장애 시에는 요청이 막히지 않도록 키 없이 처리한다 (fail-open).
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or create_idempotency_backend()
+        self.enabled = settings.IDEMPOTENCY_ENABLED
+        self.stats = {"claimed": 0, "replayed": 0, "conflicts": 0, "mismatches": 0}
+
+    @staticmethod
+    def _key(scope: str, key: str) -> str:
+        return hashlib.sha256(f"{scope}\n{key}".encode("utf-8")).hexdigest()
+
+    async def begin(self, scope: str, key: str, fingerprint: str) -> Optional[dict]:
+        """키를 진행 중으로 선점하면 None, 이미 있으면 기존 레코드 (state/fingerprint/response)"""
+        if not self.enabled:
+            return None
+        record = {"state": IN_PROGRESS, "fingerprint": fingerprint}
+        try:
+            existing = await self.backend.claim(self._key(scope, key), record, settings.IDEMPOTENCY_INFLIGHT_TTL)
+        except Exception as e:
+            logger.warning("Idempotency backend error, processing without key: %s", e)
+            metrics.inc("idempotency_backend_errors")
+            return None
+
+        if existing is None:
+            self.stats["claimed"] += 1
+        elif existing.get("fingerprint") != fingerprint:
+            self.stats["mismatches"] += 1
+        elif existing.get("state") == COMPLETED:
+            self.stats["replayed"] += 1
+            metrics.inc("idempotent_replays")
+        return existing
+
+    async def wait(self, scope: str, key: str, timeout: float) -> Optional[dict]:
+        """진행 중인 원 요청이 끝날 때까지 timeout 동안 기다림 (완료 레코드, 아직 진행 중이면 진행 중 레코드, 실패로 지워졌으면 None)"""
+        deadline = time.monotonic() + timeout
+        record = None
+        while True:
+            try:
+                record = await self.backend.get(self._key(scope, key))
+            except Exception as e:
+                logger.warning("Idempotency backend error while waiting: %s", e)
+                metrics.inc("idempotency_backend_errors")
+            if record is None or record.get("state") != IN_PROGRESS or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(WAIT_POLL_INTERVAL)
+
+        if record is not None and record.get("state") == COMPLETED:
+            self.stats["replayed"] += 1
+            metrics.inc("idempotent_replays")
+        elif record is not None:
+            self.stats["conflicts"] += 1
+        return record
+
+    async def complete(self, scope: str, key: str, fingerprint: str, response: dict):
+        if not self.enabled:
+            return
+        record = {"state": COMPLETED, "fingerprint": fingerprint, "response": response}
+        try:
+            await self.backend.put(self._key(scope, key), record, settings.IDEMPOTENCY_TTL)
+        except Exception as e:
+            logger.warning("Failed to store idempotent response: %s", e)
+            metrics.inc("idempotency_backend_errors")
+
+    async def release(self, scope: str, key: str):
+        if not self.enabled:
+            return
+        try:
+            await self.backend.delete(self._key(scope, key))
+        except Exception as e:
+            logger.warning("Failed to release idempotency key: %s", e)
+            metrics.inc("idempotency_backend_errors")
+
+    async def close(self):
+        await self.backend.close()
+
+    def snapshot(self) -> dict:
+        snapshot = {**self.stats, "backend": settings.IDEMPOTENCY_BACKEND.lower(), "ttl_seconds": settings.IDEMPOTENCY_TTL}
+        if isinstance(self.backend, InMemoryIdempotencyBackend):
+            snapshot["entries"] = len(self.backend)
+        return snapshot
@@ -0,0 +1,277 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional, Set
+
+import aiofiles
+from config import settings
+from services.local_storage_service import file_chunks
+from services.storage_base import BaseStorageService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    image_id: str
+    etag: Optional[str]
+    size: int
+    content_type: str
+    path: str
+
+
+class ImageCache:
+    """
+    인기 이미지용 로컬 디스크 LRU 캐시 (이미지 프록시 라우트용)
+
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제한다.
+    - 스토리지에서 스트리밍하는 바이트를 그대로 캐시 파일에 기록(tee)하므로 추가 다운로드가 없다.
+    - 이미지 이름은 uuid 기반이라 내용이 바뀌지 않으므로 캐시 적중 시 스토리지를 조회하지 않는다.
+    - 여러 워커가 같은 디렉토리를 공유할 수 있다. 다른 워커가 채운 항목도 메타데이터 파일로 찾아 쓰고,
+      용량은 디렉토리 전체 사용량으로 계산한다 (적중 시 파일 mtime을 갱신해 워커 간 LRU 순서를 맞춤).
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        max_entry_bytes: Optional[int] = None,
+    ):
+        self.root = os.path.abspath(root or settings.IMAGE_CACHE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.IMAGE_CACHE_MAX_BYTES
+        self.max_entry_bytes = (
+            max_entry_bytes if max_entry_bytes is not None else settings.IMAGE_CACHE_MAX_ENTRY_BYTES
+        )
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._filling: Set[str] = set()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "bytes_served_from_cache": 0}
+
+        os.makedirs(self.root, exist_ok=True)
+        self._load_existing()
+
+    def _paths(self, image_id: str):
+        digest = hashlib.sha1(image_id.encode("utf-8")).hexdigest()
+        base = os.path.join(self.root, digest)
+        return f"{base}.bin", f"{base}.json"
+
+    def _load_existing(self):
+        """재시작 후에도 디스크에 남은 캐시 파일을 재사용 (mtime 오래된 순으로 LRU 복원)"""
+        found = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    with open(entry.path) as f:
+                        meta = json.load(f)
+                    data_path, _ = self._paths(meta["image_id"])
+                    stat = os.stat(data_path)
+                    found.append((stat.st_mtime, CacheEntry(path=data_path, **meta)))
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+
+        for _, entry in sorted(found, key=lambda item: item[0]):
+            self._entries[entry.image_id] = entry
+            self._total_bytes += entry.size
+        self._evict()
+
+    def _read_entry(self, image_id: str) -> Optional[CacheEntry]:
+        """다른 워커가 채운 캐시 항목 (메타데이터 파일이 없으면 None, 스레드에서 실행)"""
+        data_path, meta_path = self._paths(image_id)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("image_id") != image_id:
+            return None
+        try:
+            return CacheEntry(path=data_path, **meta)
+        except TypeError:
+            return None
+
+    async def get(self, image_id: str) -> Optional[CacheEntry]:
+        """
+        캐시 항목 조회 (없으면 None)
+
+        메타데이터 읽기와 사용 시각(mtime) 갱신은 스레드에서 실행해 느린/공유 볼륨에서도 루프를 막지 않는다.
+        """
+        entry = self._entries.get(image_id)
+        if entry is None:
+            entry = await asyncio.to_thread(self._read_entry, image_id)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            # 읽는 동안 같은 항목을 다른 요청이 먼저 등록했을 수 있음
+            if image_id not in self._entries:
+                self._entries[image_id] = entry
+                self._total_bytes += entry.size
+        try:
+            # 공유 디렉토리 LRU 순서용 사용 시각 갱신
+            await asyncio.to_thread(os.utime, entry.path)
+        except FileNotFoundError:
+            # 다른 워커가 삭제한 경우
+            await self._discard(image_id)
+            self.stats["misses"] += 1
+            return None
+        if image_id in self._entries:
+            self._entries.move_to_end(image_id)
+        self.stats["hits"] += 1
+        return entry
+
+    async def open(self, entry: CacheEntry, start: int, end: int) -> Optional[AsyncIterator[bytes]]:
+        """캐시 파일의 [start, end) 범위 스트림, 파일이 사라졌으면 None"""
+        try:
+            fd = await asyncio.to_thread(os.open, entry.path, os.O_RDONLY)
+        except FileNotFoundError:
+            await self._discard(entry.image_id)
+            return None
+        self.stats["bytes_served_from_cache"] += end - start
+        return file_chunks(fd, start, end)
+
+    def cacheable(self, size: int) -> bool:
+        return 0 < size <= self.max_entry_bytes and size <= self.max_bytes
+
+    async def tee(
+        self,
+        image_id: str,
+        etag: Optional[str],
+        size: int,
+        content_type: str,
+        chunks: AsyncIterator[bytes],
+    ) -> AsyncIterator[bytes]:
+        """
+        스토리지 스트림을 클라이언트로 전달하면서 캐시 파일에 기록
+
+        전체 바이트가 끝까지 전달된 경우에만 캐시에 등록한다.
+        """
+        if image_id in self._filling or not self.cacheable(size):
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        self._filling.add(image_id)
+        data_path, meta_path = self._paths(image_id)
+        tmp_path = f"{data_path}.{os.getpid()}.tmp"
+        written = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+                    written += len(chunk)
+                    yield chunk
+
+            if written == size:
+                await self._commit(image_id, etag, size, content_type, tmp_path, data_path, meta_path)
+                await self._evict_shared()
+        finally:
+            self._filling.discard(image_id)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def fill(self, image_id: str, storage: BaseStorageService):
+        """Range 요청으로 캐시가 채워지지 않은 경우 백그라운드에서 전체 이미지를 캐시"""
+        if image_id in self._entries or image_id in self._filling:
+            return
+        try:
+            stream = await storage.open_image_stream(image_id)
+            if stream is None:
+                return
+            async for _ in self.tee(image_id, stream.etag, stream.size, stream.content_type, stream.chunks):
+                pass
+        except Exception as e:
+            logger.warning("Image cache fill failed for %s: %s", image_id, e)
+
+    async def invalidate(self, image_id: str):
+        """이 워커가 등록하지 않은 항목(다른 워커가 채운 파일)도 삭제"""
+        await self._discard(image_id)
+
+    async def _discard(self, image_id: str):
+        self._drop(image_id, remove_files=False)
+        await asyncio.to_thread(self._remove_files, image_id)
+
+    def _remove_files(self, image_id: str):
+        for path in self._paths(image_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _write_files(meta: dict, tmp_path: str, data_path: str, meta_path: str):
+        os.replace(tmp_path, data_path)
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+    async def _commit(self, image_id, etag, size, content_type, tmp_path, data_path, meta_path):
+        meta = {"image_id": image_id, "etag": etag, "size": size, "content_type": content_type}
+        await asyncio.to_thread(self._write_files, meta, tmp_path, data_path, meta_path)
+
+        self._drop(image_id, remove_files=False)
+        self._entries[image_id] = CacheEntry(image_id, etag, size, content_type, data_path)
+        self._total_bytes += size
+
+    def _drop(self, image_id: str, remove_files: bool = True):
+        entry = self._entries.pop(image_id, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry.size
+        if remove_files:
+            self._remove_files(image_id)
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            image_id = next(iter(self._entries))
+            self._drop(image_id)
+            self.stats["evictions"] += 1
+
+    def _scan_and_evict(self):
+        """디렉토리 전체 캐시 파일 크기를 합산하고 max_bytes를 넘으면 mtime 오래된 순으로 삭제 (스레드에서 실행)"""
+        files = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".bin"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        removed = set()
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            for file_path in (path, f"{path[:-len('.bin')]}.json"):
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed.add(path)
+        return total, removed
+
+    async def _evict_shared(self):
+        try:
+            total, removed = await asyncio.to_thread(self._scan_and_evict)
+        except OSError as e:
+            logger.warning("Image cache eviction failed: %s", e)
+            return
+        for image_id in [image_id for image_id, entry in self._entries.items() if entry.path in removed]:
+            self._drop(image_id, remove_files=False)
+        self.stats["evictions"] += len(removed)
+        self._total_bytes = total
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -1,23 +1,109 @@
+import time
 import asyncio
 import logging
 from typing import Optional, Dict
-from openai import AsyncAzureOpenAI
+from openai import AsyncAzureOpenAI, BadRequestError, RateLimitError
 from config import settings
+from services.logging_config import SAMPLED
+from services.metrics import metrics
+from services.rejection_cache import RejectionCache
 
 logger = logging.getLogger(__name__)
 
+# Azure 콘텐츠 필터 거부 응답의 error.code
+CONTENT_POLICY_CODES = {"content_policy_violation", "content_filter", "contentFilter"}
+
+
+class ContentPolicyError(Exception):
+    """콘텐츠 정책(콘텐츠 필터)으로 거부된 프롬프트 (cached=True면 DALL-E를 호출하지 않고 캐시로 거부)"""
+
+    def __init__(self, reason: str, cached: bool = False):
+        super().__init__(f"콘텐츠 정책에 따라 거부된 프롬프트입니다 ({reason})")
+        self.reason = reason
+        self.cached = cached
+
+
+# 429에 Retry-After가 없을 때 기다리는 시간 (초)
+DEFAULT_QUOTA_RETRY_AFTER = 60.0
+
+
+class QuotaExceededError(Exception):
+    """Azure OpenAI 요청 한도/할당량 초과 (SDK 재시도 후에도 429). retry_after는 서버가 알려준 대기 시간(초)"""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__("Azure OpenAI 요청 한도를 초과했습니다")
+        self.retry_after = retry_after
+
+
+def _retry_after(error: RateLimitError) -> Optional[float]:
+    headers = error.response.headers
+    for name, scale in (("retry-after-ms", 1000), ("retry-after", 1)):
+        try:
+            return float(headers[name]) / scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def _content_policy_reason(error: BadRequestError) -> Optional[str]:
+    """콘텐츠 필터 거부면 걸린 카테고리(없으면 오류 코드), 아니면 None"""
+    body = error.body if isinstance(error.body, dict) else {}
+    inner = body.get("inner_error") or {}
+    if error.code not in CONTENT_POLICY_CODES and inner.get("code") != "ResponsibleAIPolicyViolation":
+        return None
+
+    results = inner.get("content_filter_results") or {}
+    categories = [
+        name for name, result in results.items()
+        if isinstance(result, dict) and result.get("filtered")
+    ]
+    return ", ".join(categories) or error.code or "content_policy_violation"
+
+
 class ImageGeneratorService:
     """Azure OpenAI DALL-E를 사용한 이미지 생성 서비스"""
     
     def __init__(self):
         """서비스 초기화"""
-        self.client = AsyncAzureOpenAI(
+        self.client = self._create_client()
+        self.deployment_name = settings.AZURE_OPENAI_DEPLOYMENT_NAME
+        self.rejections = RejectionCache()
+        logger.info("ImageGeneratorService initialized")
+    
+    def _create_client(self) -> AsyncAzureOpenAI:
+        return AsyncAzureOpenAI(
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version=settings.AZURE_OPENAI_API_VERSION,
             azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
         )
-        self.deployment_name = settings.AZURE_OPENAI_DEPLOYMENT_NAME
-        logger.info("ImageGeneratorService initialized")
+    
+    async def rebuild_client(self, changed: Optional[Dict] = None):
+        """
+        시크릿 교체 시 클라이언트 재생성
+        
+        새 클라이언트로 참조를 한 번에 바꾸고, 진행 중인 요청이 끝날 시간을 준 뒤 이전 클라이언트를 닫는다.
+        """
+        if changed is not None and not ({"AZURE_OPENAI_API_KEY", "AZURE_OPENAI_ENDPOINT"} & set(changed)):
+            return
+        
+        old_client = self.client
+        self.client = self._create_client()
+        logger.info("Azure OpenAI client swapped")
+        asyncio.create_task(self._close_later(old_client))
+    
+    async def _close_later(self, client: AsyncAzureOpenAI):
+        await asyncio.sleep(settings.CLIENT_SWAP_GRACE_PERIOD)
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning("Failed to close previous OpenAI client: %s", e)
+    
+    def check_rejected(self, prompt: str):
+        """최근 콘텐츠 정책으로 거부된 프롬프트면 DALL-E 호출 없이 ContentPolicyError"""
+        reason = self.rejections.get(prompt)
+        if reason is not None:
+            logger.info("Prompt rejected from cache", extra={"reason": reason, **SAMPLED})
+            raise ContentPolicyError(reason, cached=True)
     
     async def generate_image(
         self,
@@ -41,12 +127,19 @@ class ImageGeneratorService:
             생성된 이미지 정보 딕셔너리
         """
         try:
-            logger.info(f"Generating image with prompt: {prompt[:100]}...")
+            logger.info(
+                "Generating image",
+                extra={"prompt_chars": len(prompt), "size": size, "quality": quality, "style": style, **SAMPLED}
+            )
+            logger.debug("Prompt: %.100s", prompt)
+            
+            self.check_rejected(prompt)
             
             # 프롬프트 전처리
             processed_prompt = self._preprocess_prompt(prompt)
             
             # DALL-E 3 이미지 생성
+            started = time.perf_counter()
             response = await asyncio.wait_for(
                 self.client.images.generate(
                     model=self.deployment_name,
@@ -73,14 +166,32 @@ class ImageGeneratorService:
                 "style": style
             }
             
-            logger.info(f"Image generated successfully: {image_data.url}")
+            # 결과 URL에는 SAS 토큰이 들어 있으므로 DEBUG에서만 남김
+            logger.info("Image generated successfully", extra=SAMPLED)
+            logger.debug("Image URL: %s", image_data.url)
             return result
             
+        except ContentPolicyError:
+            raise
+        except RateLimitError as e:
+            metrics.inc("generation_throttled")
+            logger.warning("Image generation throttled by Azure OpenAI: %s", e)
+            raise QuotaExceededError(_retry_after(e))
+        except BadRequestError as e:
+            reason = _content_policy_reason(e)
+            if reason is None:
+                logger.error("Error generating image: %s", e)
+                raise Exception(f"이미지 생성 실패: {str(e)}")
+            # 같은 프롬프트의 재시도는 캐시로 바로 거부
+            self.rejections.add(prompt, reason, time.perf_counter() - started)
+            metrics.inc("content_policy_rejections")
+            logger.warning("Prompt rejected by content filter: %s", reason)
+            raise ContentPolicyError(reason)
         except asyncio.TimeoutError:
             logger.error("Image generation timeout")
             raise Exception("이미지 생성 시간 초과")
         except Exception as e:
-            logger.error(f"Error generating image: {str(e)}")
+            logger.error("Error generating image: %s", e)
             raise Exception(f"이미지 생성 실패: {str(e)}")
     
     def _preprocess_prompt(self, prompt: str) -> str:
@@ -96,7 +207,7 @@ class ImageGeneratorService:
         # 길이 제한
         if len(prompt) > settings.MAX_PROMPT_LENGTH:
             prompt = prompt[:settings.MAX_PROMPT_LENGTH]
-            logger.warning(f"Prompt truncated to {settings.MAX_PROMPT_LENGTH} characters")
+            logger.warning("Prompt truncated to %s characters", settings.MAX_PROMPT_LENGTH)
         
         # 기본 전처리
         prompt = prompt.strip()
@@ -137,11 +248,11 @@ class ImageGeneratorService:
             # 성공한 결과만 반환
             valid_results = [r for r in results if not isinstance(r, Exception)]
             
-            logger.info(f"Generated {len(valid_results)}/{variations} variations")
+            logger.info("Generated %s/%s variations", len(valid_results), variations)
             return valid_results
             
         except Exception as e:
-            logger.error(f"Error generating variations: {str(e)}")
+            logger.error("Error generating variations: %s", e)
             raise Exception(f"변형 이미지 생성 실패: {str(e)}")
     
     async def enhance_prompt_with_style(
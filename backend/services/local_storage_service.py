@@ -0,0 +1,336 @@
+import os
+import mmap
+import uuid
+import fcntl
+import asyncio
+import logging
+import mimetypes
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+import aiofiles
+from config import settings
+from services.logging_config import SAMPLED
+from services.metrics import metrics
+from services.storage_base import BaseStorageService, ImageStream, OBJECTS_PREFIX, PARTITION_PATTERN, content_digest
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+# 정리 작업 잠금 파일 (파티션 디렉토리가 아니므로 목록 조회에 나타나지 않음)
+MAINTENANCE_LOCK_FILE = ".maintenance.lock"
+
+
+class LocalStorageService(BaseStorageService):
+    """
+    로컬 파일시스템 스토리지 백엔드 (엣지/온프레미스/벤치마크용)
+
+    논리 경로 `YYYYMMDD/<uuid>.png`는 디스크에서 `YYYYMMDD/<uuid 앞 2자리>/<uuid>.png`로 샤딩되어
+    파일이 수백만 개가 되어도 디렉토리 하나의 엔트리 수가 작게 유지된다.
+
+    내용 주소 저장 시 바이트는 `objects/<digest 앞 2자리>/<digest>.<ext>`에 한 번만 쓰고,
+    이미지 경로는 그 파일의 하드링크다. 링크 수(st_nlink - 1)가 곧 참조 수이므로 목록 조회/스트리밍은
+    일반 파일과 같고, 마지막 참조가 삭제될 때 객체 파일도 지운다.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or settings.LOCAL_STORAGE_PATH)
+        os.makedirs(self.root, exist_ok=True)
+        self.base_url = settings.PUBLIC_BASE_URL.rstrip("/")
+        logger.info("LocalStorageService initialized at %s", self.root)
+
+    def _path_for(self, image_id: str) -> str:
+        """논리 경로 -> 샤딩된 디스크 경로 (루트 밖으로 벗어나는 경로는 거부)"""
+        parts = image_id.strip("/").split("/")
+        if len(parts) != 2 or any(p in ("", ".", "..") for p in parts):
+            raise ValueError(f"잘못된 이미지 경로: {image_id}")
+
+        partition, file_name = parts
+        path = os.path.join(self.root, partition, file_name[:2], file_name)
+        if not os.path.abspath(path).startswith(self.root + os.sep):
+            raise ValueError(f"잘못된 이미지 경로: {image_id}")
+        return path
+
+    def _object_path(self, digest: str, file_extension: str) -> str:
+        return os.path.join(self.root, OBJECTS_PREFIX, digest[:2], f"{digest}.{file_extension}")
+
+    def _url_for(self, image_id: str) -> str:
+        return f"{self.base_url}/api/v1/images/{image_id}/download"
+
+    @staticmethod
+    def _etag(stat: os.stat_result) -> str:
+        return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    async def upload_image(
+        self,
+        image_data: bytes,
+        prompt: str,
+        file_extension: str = "png",
+        digest: Optional[str] = None
+    ) -> dict:
+        """
+        이미지 바이트를 로컬 디스크에 저장
+        (임시 파일에 쓴 뒤 rename하여 읽는 쪽이 부분 파일을 보지 않게 함)
+        """
+        try:
+            file_name = f"{datetime.now().strftime('%Y%m%d')}/{uuid.uuid4()}.{file_extension}"
+            path = self._path_for(file_name)
+
+            if not isinstance(image_data, bytes):
+                if isinstance(image_data, str):
+                    image_data = image_data.encode('utf-8')
+
+            logger.info("Writing image: %s (Size: %s bytes)", file_name, len(image_data), extra=SAMPLED)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            deduplicated = False
+            if settings.CONTENT_ADDRESSED_STORAGE:
+                digest = digest or await asyncio.to_thread(content_digest, image_data)
+                deduplicated = await asyncio.to_thread(
+                    self._link_object_sync, image_data, self._object_path(digest, file_extension), path
+                )
+                if deduplicated:
+                    metrics.inc("storage_dedup_hits")
+                    metrics.inc("storage_dedup_bytes_saved", len(image_data))
+            else:
+                tmp_path = f"{path}.tmp"
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    await f.write(image_data)
+                os.replace(tmp_path, path)
+
+            return {
+                "image_id": file_name,
+                "image_url": self._url_for(file_name),
+                "deduplicated": deduplicated
+            }
+
+        except Exception as e:
+            logger.error("Failed to write image: %s", e)
+            raise Exception(f"이미지 업로드 실패: {str(e)}")
+
+    @staticmethod
+    def _link_object_sync(image_data: bytes, object_path: str, path: str) -> bool:
+        """
+        이미지 경로를 객체 파일의 하드링크로 만듦, 이미 있던 객체를 재사용했으면 True
+
+        객체 파일은 os.link로 '없을 때만' 만들어 동시에 같은 바이트를 올려도 하나만 남고,
+        링크 직전에 객체가 삭제됐으면 새로 쓴다.
+        """
+        for _ in range(3):
+            try:
+                os.link(object_path, path)
+                return True
+            except FileNotFoundError:
+                pass
+
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(image_data)
+            try:
+                os.link(tmp_path, object_path)
+                os.replace(tmp_path, path)
+                return False
+            except FileExistsError:
+                # 다른 요청이 같은 객체를 먼저 만듦 -> 그 객체에 링크
+                os.remove(tmp_path)
+        raise OSError(f"객체 링크 실패: {object_path}")
+
+    def _release_object_sync(self, path: str):
+        """
+        이미지 경로(참조) 삭제, 남은 링크가 객체 파일뿐이면 객체도 삭제
+
+        객체 이름은 내용의 SHA-256이므로 하드링크(st_nlink > 1)인 경우에만 파일을 해시해 찾는다.
+        """
+        stat = os.stat(path)
+        object_path = None
+        if stat.st_nlink > 1 and stat.st_size:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest = content_digest(mapped)
+            object_path = self._object_path(digest, path.rsplit(".", 1)[-1])
+
+        os.remove(path)
+
+        if object_path is None:
+            return
+        try:
+            object_stat = os.stat(object_path)
+        except FileNotFoundError:
+            return
+        # 그 사이 새 참조가 링크됐으면 st_nlink > 1이라 남겨 둠
+        if object_stat.st_ino == stat.st_ino and object_stat.st_nlink == 1:
+            os.remove(object_path)
+
+    def _list_partitions_sync(self, prefix: str) -> List[str]:
+        try:
+            with os.scandir(self.root) as entries:
+                return [
+                    e.name for e in entries
+                    if e.is_dir() and PARTITION_PATTERN.match(e.name) and e.name.startswith(prefix)
+                ]
+        except FileNotFoundError:
+            return []
+
+    async def list_partitions(self, prefix: str = "") -> List[str]:
+        """날짜 파티션 디렉토리 목록"""
+        return await asyncio.to_thread(self._list_partitions_sync, prefix)
+
+    def _scan_partition_sync(self, partition: str) -> List[dict]:
+        stats = []
+        partition_path = os.path.join(self.root, partition)
+        with os.scandir(partition_path) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as entries:
+                    for entry in entries:
+                        if entry.is_file() and not entry.name.endswith(".tmp"):
+                            stats.append((entry.name, entry.stat()))
+
+        stats.sort(key=lambda item: item[1].st_mtime, reverse=True)
+
+        images = []
+        for name, stat in stats:
+            image_id = f"{partition}/{name}"
+            images.append({
+                "image_id": image_id,
+                "url": self._url_for(image_id),
+                "created_at": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+                "size": stat.st_size,
+                "blob_name": image_id
+            })
+        return images
+
+    async def scan_partition(self, partition: str) -> List[dict]:
+        """파티션 하나의 이미지 목록 (샤드 디렉토리 포함, 최신순)"""
+        return await asyncio.to_thread(self._scan_partition_sync, partition)
+
+    async def get_image_metadata(self, image_id: str) -> Optional[dict]:
+        """이미지 메타데이터 조회"""
+        try:
+            stat = await asyncio.to_thread(os.stat, self._path_for(image_id))
+        except (FileNotFoundError, ValueError):
+            return None
+        except Exception as e:
+            logger.error("Error getting image metadata: %s", e)
+            return None
+
+        return {
+            "image_id": image_id,
+            "url": self._url_for(image_id),
+            "size": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+            "content_type": mimetypes.guess_type(image_id)[0] or "application/octet-stream",
+            "etag": self._etag(stat)
+        }
+
+    async def delete_image(self, image_id: str) -> bool:
+        """이미지 삭제 (내용 주소 객체는 마지막 참조일 때만 삭제)"""
+        try:
+            await asyncio.to_thread(self._release_object_sync, self._path_for(image_id))
+            return True
+        except (FileNotFoundError, ValueError):
+            return False
+        except Exception as e:
+            logger.error("Error deleting image %s: %s", image_id, e)
+            return False
+
+    def _delete_images_sync(self, image_ids: List[str]) -> List[str]:
+        deleted = []
+        directories = set()
+        for image_id in image_ids:
+            try:
+                path = self._path_for(image_id)
+                self._release_object_sync(path)
+            except (FileNotFoundError, ValueError):
+                continue
+            except OSError as e:
+                logger.error("Error deleting image %s: %s", image_id, e)
+                continue
+            deleted.append(image_id)
+            directories.add(os.path.dirname(path))
+
+        # 비워진 샤드/파티션 디렉토리도 제거해 이후 목록 조회에서 훑지 않게 함
+        for shard in directories:
+            for directory in (shard, os.path.dirname(shard)):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+        return deleted
+
+    async def delete_images(self, image_ids: List[str]) -> List[str]:
+        """여러 이미지를 스레드 한 번에 삭제"""
+        return await asyncio.to_thread(self._delete_images_sync, image_ids)
+
+    @asynccontextmanager
+    async def maintenance_lock(self):
+        """루트 디렉토리의 잠금 파일에 flock (같은 디스크를 쓰는 워커 중 하나만 실행)"""
+        fd = os.open(os.path.join(self.root, MAINTENANCE_LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    async def open_image_stream(
+        self,
+        image_id: str,
+        offset: int = 0,
+        length: Optional[int] = None
+    ) -> Optional[ImageStream]:
+        """
+        파일 범위 스트리밍
+
+        파일 열기/stat과 청크 읽기(os.pread)를 모두 스레드에서 실행해 디스크 대기가 이벤트 루프를 막지 않게 하고,
+        전체 파일을 메모리에 올리지 않고 STREAM_CHUNK_SIZE씩 보낸다.
+        (ASGI 응답 본문은 bytes여야 해서 os.sendfile 경로는 uvicorn에서 쓸 수 없다)
+        """
+        try:
+            path = self._path_for(image_id)
+            fd, stat = await asyncio.to_thread(open_with_stat, path)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        end = stat.st_size if length is None else min(stat.st_size, offset + length)
+
+        return ImageStream(
+            image_id=image_id,
+            size=stat.st_size,
+            content_type=mimetypes.guess_type(image_id)[0] or "application/octet-stream",
+            etag=self._etag(stat),
+            chunks=file_chunks(fd, offset, end)
+        )
+
+
+def open_with_stat(path: str) -> Tuple[int, os.stat_result]:
+    """읽기 전용으로 연 fd와 그 stat (스레드에서 실행)"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return fd, os.fstat(fd)
+    except BaseException:
+        os.close(fd)
+        raise
+
+
+async def file_chunks(fd: int, start: int, end: int) -> AsyncIterator[bytes]:
+    """열린 파일 디스크립터의 [start, end) 범위를 스레드에서 os.pread로 읽어 청크로 전달하고 fd를 닫음"""
+    try:
+        position = start
+        while position < end:
+            chunk = await asyncio.to_thread(os.pread, fd, min(STREAM_CHUNK_SIZE, end - position), position)
+            if not chunk:
+                # 읽는 도중 파일이 잘린 경우
+                break
+            yield chunk
+            position += len(chunk)
+    finally:
+        os.close(fd)
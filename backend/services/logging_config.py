@@ -0,0 +1,237 @@
+import atexit
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from pythonjsonlogger import jsonlogger
+
+from config import settings
+
+# 요청 단위 컨텍스트 (미들웨어에서 설정, create_task로 만든 하위 태스크에도 전파됨)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+# 요청마다 반복되는 INFO 로그에 붙이는 표시 (LOG_SAMPLE_RATE 비율만 남김)
+SAMPLED = {"sample": True}
+
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._\-]{1,128}$")
+TRACEPARENT_PATTERN = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+JSON_FIELDS = "%(asctime)s %(levelname)s %(name)s %(message)s %(request_id)s %(trace_id)s"
+
+access_logger = logging.getLogger("artelligence.access")
+_listener: Optional[QueueListener] = None
+
+
+class ContextFilter(logging.Filter):
+    """로그 레코드에 request_id / trace_id 추가 (로그를 남긴 태스크의 컨텍스트에서 실행)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    extra=SAMPLED로 표시한 INFO 이하 로그를 rate 비율만 통과시킴
+
+    요청 ID가 있으면 ID 해시로 결정하므로 한 요청의 로그는 모두 남거나 모두 빠진다.
+    WARNING 이상과 표시가 없는 로그는 항상 통과한다.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or record.levelno >= logging.WARNING or not getattr(record, "sample", False):
+            return True
+        if self.rate <= 0:
+            return False
+        key = getattr(record, "request_id", None)
+        if key:
+            return zlib.crc32(key.encode("utf-8")) % 10000 < self.rate * 10000
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    레코드를 큐에 넣기만 하는 핸들러 (포맷/출력은 QueueListener 스레드에서)
+
+    메시지 % 인자 결합도 리스너 스레드에서 하므로 이벤트 루프에서는 포맷 비용이 없다.
+    큐가 가득 차면 기다리지 않고 버린다.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT.lower() == "text":
+        return logging.Formatter(TEXT_FORMAT)
+    return jsonlogger.JsonFormatter(
+        JSON_FIELDS,
+        rename_fields={"asctime": "timestamp", "levelname": "level", "name": "logger"},
+        reserved_attrs=jsonlogger.RESERVED_ATTRS + ("sample",),
+        json_ensure_ascii=False
+    )
+
+
+def setup_logging():
+    """
+    루트 로거 설정 (LOG_LEVEL, LOG_FORMAT=json|text, LOG_SAMPLE_RATE)
+
+    애플리케이션 로그는 비차단 큐 핸들러를 거쳐 별도 스레드에서 stdout으로 출력된다.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = logging.getLevelName(settings.LOG_LEVEL.upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_formatter())
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    # 요청마다 URL(SAS 토큰 포함 가능)을 남기는 HTTP 클라이언트 로그는 경고 이상만
+    for name in ("httpx", "azure.core.pipeline.policies.http_logging_policy"):
+        logging.getLogger(name).setLevel(max(level, logging.WARNING))
+
+    _listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """큐에 남은 로그를 모두 출력하고 리스너 스레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_log_records() -> int:
+    return sum(getattr(h, "dropped", 0) for h in logging.getLogger().handlers)
+
+
+@contextmanager
+def log_duration(logger: logging.Logger, stage: str, **fields):
+    """블록 실행 시간을 stage / duration_ms 필드로 기록 (샘플링 대상)"""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        logger.info(
+            "Stage %s finished",
+            stage,
+            extra={
+                **SAMPLED,
+                "stage": stage,
+                "outcome": outcome,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                **fields
+            }
+        )
+
+
+def _trace_id_from(traceparent: Optional[str]) -> Optional[str]:
+    if not traceparent:
+        return None
+    match = TRACEPARENT_PATTERN.match(traceparent.strip().lower())
+    return match.group(1) if match else None
+
+
+class RequestContextMiddleware:
+    """
+    요청/WebSocket마다 request_id, trace_id 컨텍스트를 설정하는 ASGI 미들웨어
+
+    - request_id: X-Request-ID 헤더(형식이 맞을 때) 또는 새로 생성, 응답 헤더로 돌려준다
+    - trace_id: W3C traceparent 헤더의 trace-id, 없으면 request_id
+    - HTTP 요청이 끝나면 method / path / status_code / duration_ms 접근 로그를 남긴다 (샘플링 대상)
+
+    BaseHTTPMiddleware와 달리 receive를 감싸지 않아 연결 끊김 감지와 스트리밍 응답에 영향이 없다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        trace_id = _trace_id_from(headers.get(b"traceparent", b"").decode("latin-1")) or request_id
+
+        request_token = request_id_var.set(request_id)
+        trace_token = trace_id_var.set(trace_id)
+        started = time.perf_counter()
+        status_code = None
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers") or []) + [(b"x-request-id", request_id.encode("latin-1"))]
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if scope["type"] == "http":
+                access_logger.info(
+                    "%s %s %s",
+                    scope.get("method"),
+                    scope.get("path"),
+                    status_code,
+                    extra={
+                        **SAMPLED,
+                        "http_method": scope.get("method"),
+                        "path": scope.get("path"),
+                        "status_code": status_code,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+                    }
+                )
+            request_id_var.reset(request_token)
+            trace_id_var.reset(trace_token)
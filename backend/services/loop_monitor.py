@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import Counter
+from typing import Optional
+
+from config import settings
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STALL_STACK_DEPTH = 40
+
+
+class LoopMonitor:
+    """
+    이벤트 루프 지연 감시
+
+    - 샘플러: 루프 안에서 LOOP_LAG_SAMPLE_INTERVAL마다 잠들었다 깨어나며 예정보다 늦게 깬 시간을
+      event_loop_lag_seconds 히스토그램에 기록한다.
+    - 감시 스레드: 샘플러가 LOOP_STALL_THRESHOLD 이상 깨어나지 못하면 루프가 막힌 것으로 보고,
+      그 순간 루프 스레드의 스택(막고 있는 코루틴 포함)을 WARNING으로 남긴다 (막힘 한 번에 한 번).
+    """
+
+    def __init__(self, interval: Optional[float] = None, stall_threshold: Optional[float] = None):
+        self.interval = interval or settings.LOOP_LAG_SAMPLE_INTERVAL
+        self.stall_threshold = stall_threshold or settings.LOOP_STALL_THRESHOLD
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def start(self):
+        if not settings.LOOP_MONITOR_ENABLED or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, 1.0)
+            self._watchdog = None
+
+    async def _sample_loop(self):
+        while True:
+            started = self._loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, self._loop.time() - started - self.interval)
+            self._heartbeat = time.monotonic()
+            self.max_lag = max(self.max_lag, lag)
+            metrics.observe("event_loop_lag_seconds", lag, LAG_BUCKETS)
+
+    def _watch(self):
+        stalled = False
+        while not self._stop.wait(self.stall_threshold / 4):
+            blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked <= self.stall_threshold:
+                stalled = False
+                continue
+            if stalled:
+                continue
+
+            stalled = True
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=STALL_STACK_DEPTH)) if frame is not None else ""
+            logger.warning(
+                "Event loop blocked for more than %.0fms:\n%s",
+                blocked * 1000,
+                stack,
+                extra={"blocked_ms": round(blocked * 1000, 1)}
+            )
+            # 카운터는 루프 스레드에서 올림 (루프가 풀리면 실행됨)
+            self._loop.call_soon_threadsafe(metrics.inc, "event_loop_stalls")
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "sample_interval_seconds": self.interval,
+            "stall_threshold_seconds": self.stall_threshold,
+            "max_lag_seconds": round(self.max_lag, 6),
+            "stalls": self.stalls
+        }
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame, prefix: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(prefix)
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(seconds: float, interval: float, thread_id: Optional[int] = None) -> dict:
+    """
+    스택 샘플링 프로파일 (호출한 스레드에서 seconds 동안 실행, 루프 밖 스레드에서 호출할 것)
+
+    thread_id가 있으면 그 스레드(이벤트 루프)만, 없으면 샘플러 자신을 뺀 모든 스레드를 interval마다 샘플링한다.
+    결과는 flamegraph.pl / speedscope가 읽는 collapsed 형식(`바깥;...;안쪽 개수`)의 스택별 개수다.
+    """
+    own_id = threading.get_ident()
+    names = {}
+    stacks: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        frames = sys._current_frames()
+        if thread_id is not None:
+            frames = {thread_id: frames[thread_id]} if thread_id in frames else {}
+        for ident, frame in frames.items():
+            if ident == own_id:
+                continue
+            if ident not in names:
+                names = {t.ident: t.name for t in threading.enumerate()}
+            stacks[_collapse(frame, names.get(ident, str(ident)))] += 1
+        samples += 1
+        time.sleep(interval)
+
+    return {"samples": samples, "interval_seconds": interval, "duration_seconds": seconds, "stacks": stacks}
+
+
+def to_collapsed(profile: dict) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].most_common())
@@ -0,0 +1,284 @@
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from services.metrics import metrics
+from services.rate_limiter import InMemoryRateLimitBackend
+from services.storage_base import BaseStorageService, MaintenanceLockLost, PARTITION_PATTERN
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 86400
+# 계층 순서 (이미 목표 계층이거나 더 차가운 계층이면 건너뜀)
+TIER_RANK = {"Hot": 0, "Cool": 1, "Cold": 2, "Archive": 3}
+ACTION_TIERS = {"cool": "Cool", "archive": "Archive"}
+REPORT_SAMPLE_SIZE = 20
+
+DeletedCallback = Callable[[List[str]], Awaitable[None]]
+TieredCallback = Callable[[List[str], str], Awaitable[None]]
+
+
+class AccessTracker:
+    """
+    이미지 조회 기록 (워커 메모리, LRU로 개수 제한)
+
+    IMAGE_HOT_ACCESS_WINDOW_DAYS 안에 IMAGE_HOT_ACCESS_COUNT번 이상 조회된 이미지는 정리 대상에서 빠진다.
+    마지막 조회 후 기간이 지나면 횟수를 다시 센다.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, window_days: Optional[int] = None, hot_count: Optional[int] = None):
+        self.max_entries = max_entries or settings.ACCESS_TRACKER_MAX_ENTRIES
+        self.window = (window_days if window_days is not None else settings.IMAGE_HOT_ACCESS_WINDOW_DAYS) * DAY_SECONDS
+        self.hot_count = hot_count or settings.IMAGE_HOT_ACCESS_COUNT
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+    def record(self, image_id: str):
+        now = time.time()
+        last, count = self._entries.get(image_id, (now, 0))
+        if now - last > self.window:
+            count = 0
+        self._entries[image_id] = (now, count + 1)
+        self._entries.move_to_end(image_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def is_hot(self, image_id: str, now: Optional[float] = None) -> bool:
+        item = self._entries.get(image_id)
+        if item is None:
+            return False
+        last, count = item
+        return (now or time.time()) - last <= self.window and count >= self.hot_count
+
+    def snapshot(self) -> dict:
+        return {"tracked": len(self._entries), "max_entries": self.max_entries}
+
+
+class MaintenanceService:
+    """
+    오래된 이미지 정리 (보존 기간 삭제 + 액세스 계층 이동)
+
+    - 날짜 파티션(YYYYMMDD)을 오래된 순으로 훑으며 파티션 나이에 따라 삭제 / Archive / Cool 중 하나를 적용하고,
+      정리 대상이 아닌 파티션을 만나면 멈춘다.
+    - 최근 자주 조회된 이미지(AccessTracker 또는 Blob 마지막 액세스 시간)는 건너뛴다.
+    - 삭제/계층 변경은 MAINTENANCE_BATCH_SIZE개씩 batch로 보내고, 토큰 버킷으로 초당 처리량을 제한하며,
+      생성 대기열이 쌓여 있으면(busy) 잠시 양보한다.
+    - dry_run이면 아무것도 바꾸지 않고 대상 개수/용량 보고서만 만든다.
+    - 실제 실행은 스토리지의 maintenance_lock으로 워커/레플리카 중 하나만 수행한다.
+    """
+
+    def __init__(
+        self,
+        storage: BaseStorageService,
+        tracker: AccessTracker,
+        on_deleted: Optional[DeletedCallback] = None,
+        on_tiered: Optional[TieredCallback] = None,
+        busy: Optional[Callable[[], bool]] = None
+    ):
+        self.storage = storage
+        self.tracker = tracker
+        self.on_deleted = on_deleted
+        self.on_tiered = on_tiered
+        self.busy = busy
+        self.batch_size = max(1, settings.MAINTENANCE_BATCH_SIZE)
+        self.ops_per_second = settings.MAINTENANCE_OPS_PER_SECOND
+        self.last_report: Optional[dict] = None
+        self._limiter = InMemoryRateLimitBackend(max_keys=1)
+        self._run_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._run_lock.locked()
+
+    def policy(self) -> dict:
+        return {
+            "retention_days": settings.IMAGE_RETENTION_DAYS,
+            "cool_after_days": settings.IMAGE_COOL_AFTER_DAYS if self.storage.supports_tiering else 0,
+            "archive_after_days": settings.IMAGE_ARCHIVE_AFTER_DAYS if self.storage.supports_tiering else 0,
+            "hot_access_window_days": settings.IMAGE_HOT_ACCESS_WINDOW_DAYS,
+            "hot_access_count": settings.IMAGE_HOT_ACCESS_COUNT,
+            "batch_size": self.batch_size,
+            "ops_per_second": self.ops_per_second
+        }
+
+    async def start(self):
+        """주기 실행 태스크 시작 (MAINTENANCE_ENABLED일 때만)"""
+        if settings.MAINTENANCE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            # 워커/레플리카마다 실행 시점이 흩어지도록 ±10% 무작위화 (잠금을 얻은 한 곳만 실제로 실행)
+            await asyncio.sleep(max(60.0, settings.MAINTENANCE_INTERVAL * random.uniform(0.9, 1.1)))
+            try:
+                await self.run(dry_run=settings.MAINTENANCE_DRY_RUN)
+            except Exception as e:
+                logger.error("Maintenance run failed: %s", e)
+
+    async def run(self, dry_run: bool = True) -> dict:
+        """정리 한 번 실행 후 보고서 반환 (이미 실행 중이면 status=busy)"""
+        if self._run_lock.locked():
+            return {"status": "busy", "dry_run": dry_run}
+
+        async with self._run_lock:
+            if dry_run:
+                report = await self._run(dry_run=True)
+            else:
+                try:
+                    async with self.storage.maintenance_lock() as acquired:
+                        if not acquired:
+                            logger.info("Maintenance skipped: another worker holds the lock")
+                            return {"status": "locked", "dry_run": False}
+                        report = await self._run(dry_run=False)
+                except MaintenanceLockLost as e:
+                    report = {"status": "lock_lost", "dry_run": False, "error": str(e)}
+
+        self.last_report = report
+        return report
+
+    def _action_for(self, age_days: int) -> Optional[str]:
+        policy = self.policy()
+        if policy["retention_days"] and age_days >= policy["retention_days"]:
+            return "delete"
+        if policy["archive_after_days"] and age_days >= policy["archive_after_days"]:
+            return "archive"
+        if policy["cool_after_days"] and age_days >= policy["cool_after_days"]:
+            return "cool"
+        return None
+
+    def _is_hot(self, image: dict, now: float) -> bool:
+        if self.tracker.is_hot(image["image_id"], now):
+            return True
+        last_accessed = image.get("last_accessed_at")
+        if last_accessed:
+            try:
+                accessed = datetime.fromisoformat(last_accessed).timestamp()
+            except ValueError:
+                return False
+            return now - accessed <= self.tracker.window
+        return False
+
+    async def _pace(self, cost: int):
+        """토큰 버킷으로 처리량 제한 + 생성 대기열이 있으면 양보"""
+        if self.ops_per_second > 0:
+            burst = max(float(self.batch_size), self.ops_per_second)
+            while True:
+                result = await self._limiter.take("maintenance", self.ops_per_second, burst, cost)
+                if result.allowed:
+                    break
+                await asyncio.sleep(result.retry_after)
+
+        waited = 0.0
+        while self.busy is not None and self.busy() and waited < 60:
+            await asyncio.sleep(1.0)
+            waited += 1.0
+
+    async def _run(self, dry_run: bool) -> dict:
+        started = time.perf_counter()
+        now = time.time()
+        today = datetime.now().date()
+        report = {
+            "status": "completed",
+            "dry_run": dry_run,
+            "started_at": datetime.utcnow().isoformat(),
+            "policy": self.policy(),
+            "partitions_scanned": 0,
+            "actions": {action: {"images": 0, "bytes": 0} for action in ("delete", "archive", "cool")},
+            "samples": {action: [] for action in ("delete", "archive", "cool")},
+            "skipped_hot": 0,
+            "errors": 0
+        }
+
+        partitions = sorted(p for p in await self.storage.list_partitions() if PARTITION_PATTERN.match(p))
+        for partition in partitions:
+            try:
+                age_days = (today - datetime.strptime(partition, "%Y%m%d").date()).days
+            except ValueError:
+                continue
+            action = self._action_for(age_days)
+            if action is None:
+                # 이후 파티션은 모두 더 최근이므로 정리 대상 없음
+                break
+
+            await self._pace(1)
+            images = await self.storage.scan_partition(partition)
+            report["partitions_scanned"] += 1
+
+            candidates = []
+            for image in images:
+                if self._is_hot(image, now):
+                    report["skipped_hot"] += 1
+                    continue
+                if action in ACTION_TIERS:
+                    current = str(getattr(image.get("tier"), "value", image.get("tier")) or "Hot")
+                    if TIER_RANK.get(current.capitalize(), 0) >= TIER_RANK[ACTION_TIERS[action]]:
+                        continue
+                candidates.append(image)
+
+            for start in range(0, len(candidates), self.batch_size):
+                batch = candidates[start:start + self.batch_size]
+                try:
+                    done = await self._apply(action, batch, dry_run)
+                except Exception as e:
+                    report["errors"] += 1
+                    metrics.inc("maintenance_errors")
+                    logger.warning("Maintenance %s batch failed in %s: %s", action, partition, e)
+                    continue
+
+                sizes = {image["image_id"]: image.get("size") or 0 for image in batch}
+                report["actions"][action]["images"] += len(done)
+                report["actions"][action]["bytes"] += sum(sizes.get(image_id, 0) for image_id in done)
+                samples = report["samples"][action]
+                samples.extend(done[:REPORT_SAMPLE_SIZE - len(samples)])
+
+        report["finished_at"] = datetime.utcnow().isoformat()
+        report["duration_seconds"] = round(time.perf_counter() - started, 2)
+        metrics.inc("maintenance_runs")
+        logger.info(
+            "Maintenance %s: deleted=%s archived=%s cooled=%s skipped_hot=%s errors=%s",
+            "dry run" if dry_run else "run",
+            report["actions"]["delete"]["images"],
+            report["actions"]["archive"]["images"],
+            report["actions"]["cool"]["images"],
+            report["skipped_hot"],
+            report["errors"]
+        )
+        return report
+
+    async def _apply(self, action: str, batch: List[dict], dry_run: bool) -> List[str]:
+        """batch 하나 처리, 처리된(dry_run이면 처리될) image_id 목록 반환"""
+        image_ids = [image["image_id"] for image in batch]
+        if dry_run:
+            return image_ids
+
+        await self._pace(len(image_ids))
+        if action == "delete":
+            done = await self.storage.delete_images(image_ids)
+            metrics.inc("maintenance_deleted", len(done))
+            if done and self.on_deleted is not None:
+                await self.on_deleted(done)
+        else:
+            tier = ACTION_TIERS[action]
+            done = await self.storage.set_tier(image_ids, tier)
+            metrics.inc("maintenance_tiered", len(done))
+            if done and self.on_tiered is not None:
+                await self.on_tiered(done, tier)
+        return done
+
+    def snapshot(self) -> Dict:
+        return {
+            "enabled": settings.MAINTENANCE_ENABLED,
+            "running": self.running,
+            "access_tracker": self.tracker.snapshot()
+        }
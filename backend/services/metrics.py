@@ -0,0 +1,74 @@
+import threading
+from typing import Dict, Optional, Sequence
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.exposition import CONTENT_TYPE_LATEST
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+class Metrics:
+    """
+    프로세스 내 카운터/히스토그램 레지스트리 (prometheus_client 기반, /metrics 엔드포인트에서 노출)
+
+    호출하는 쪽은 이름만 넘기고, 처음 쓰이는 이름의 Counter/Histogram을 이 레지스트리에 만든다.
+    Prometheus 텍스트 형식(render)에서 카운터 이름에는 `_total`이 붙는다.
+    """
+
+    def __init__(self):
+        self.registry = CollectorRegistry(auto_describe=True)
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        # 루프 감시 스레드 등 루프 밖에서도 처음 쓰는 이름을 등록할 수 있음
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1):
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.get(name)
+                if counter is None:
+                    counter = self._counters[name] = Counter(name, name, registry=self.registry)
+        counter.inc(value)
+
+    def observe(self, name: str, value: float, buckets: Optional[Sequence[float]] = None):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = Histogram(
+                        name, name, buckets=buckets or DEFAULT_BUCKETS, registry=self.registry
+                    )
+        histogram.observe(value)
+
+    def value(self, name: str) -> float:
+        """카운터 현재 값 (아직 쓰이지 않은 이름은 0)"""
+        return self.registry.get_sample_value(f"{name}_total") or 0
+
+    def render(self) -> bytes:
+        """Prometheus 텍스트 노출 형식"""
+        return generate_latest(self.registry)
+
+    def snapshot(self) -> dict:
+        """JSON용 요약 (카운터 값, 히스토그램 count/sum/누적 버킷)"""
+        counters = {name: self.value(name) for name in list(self._counters)}
+        histograms = {}
+        for name, histogram in list(self._histograms.items()):
+            buckets = {}
+            count = total = 0
+            for metric in histogram.collect():
+                for sample in metric.samples:
+                    if sample.name == f"{name}_bucket":
+                        buckets[sample.labels["le"]] = int(sample.value)
+                    elif sample.name == f"{name}_count":
+                        count = int(sample.value)
+                    elif sample.name == f"{name}_sum":
+                        total = sample.value
+            histograms[name] = {"count": count, "sum": round(total, 6), "buckets": buckets}
+        return {"counters": counters, "histograms": histograms}
+
+
+metrics = Metrics()
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from config import settings
+from services.logging_config import log_duration
+from services.metrics import metrics
+from services.scene_splitter import Scene
+
+logger = logging.getLogger(__name__)
+
+ReuseLookup = Callable[[str, str, str, str], Optional[object]]
+UploadHook = Callable[[str, dict, dict], Awaitable[None]]
+GenerateFn = Callable[..., Awaitable[dict]]
+
+
+class PassagePipeline:
+    """
+    장면별 이미지 생성 파이프라인 (생산자/소비자)
+
+    생산자는 DALL-E 생성을 최대 generation_concurrency개까지 동시에 돌리고 결과를 큐에 넣는다.
+    소비자는 큐에서 꺼내 스토리지에 업로드하므로, 한 장면의 업로드가 다음 장면의 생성과 겹친다.
+    장면이 끝날 때마다 이벤트를 바로 내보낸다 (순서는 완료 순).
+    """
+
+    def __init__(
+        self,
+        image_service,
+        storage_service,
+        generation_concurrency: Optional[int] = None,
+        upload_concurrency: Optional[int] = None
+    ):
+        self.image_service = image_service
+        self.storage_service = storage_service
+        self.generation_concurrency = generation_concurrency or settings.PASSAGE_GENERATION_CONCURRENCY
+        self.upload_concurrency = upload_concurrency or settings.PASSAGE_UPLOAD_CONCURRENCY
+
+    async def run(
+        self,
+        scenes: List[Scene],
+        size: str = "1024x1024",
+        quality: str = "standard",
+        style: str = "vivid",
+        reuse_lookup: Optional[ReuseLookup] = None,
+        on_uploaded: Optional[UploadHook] = None,
+        generate_fn: Optional[GenerateFn] = None
+    ) -> AsyncIterator[dict]:
+        """
+        장면 목록을 처리하며 진행 이벤트를 순차적으로 내보냄
+
+        generate_fn을 넘기면 image_service.generate_image 대신 사용한다 (공정 스케줄러 경유 등).
+        """
+        generate_fn = generate_fn or self.image_service.generate_image
+        events: asyncio.Queue = asyncio.Queue()
+        upload_queue: asyncio.Queue = asyncio.Queue(maxsize=self.upload_concurrency * 2)
+        semaphore = asyncio.Semaphore(self.generation_concurrency)
+        succeeded = 0
+        started = time.perf_counter()
+
+        async def generate(scene: Scene):
+            async with semaphore:
+                if reuse_lookup is not None:
+                    match = reuse_lookup(scene.text, size, quality, style)
+                    if match:
+                        await events.put({
+                            "status": "scene_completed",
+                            "scene_index": scene.index,
+                            "image_id": match.image_id,
+                            "image_url": match.url,
+                            "blob_url": match.url,
+                            "reused": True,
+                            "similarity": match.similarity
+                        })
+                        return
+
+                await events.put({"status": "scene_processing", "scene_index": scene.index})
+                try:
+                    with log_duration(logger, "generate", scene_index=scene.index):
+                        result = await generate_fn(
+                            prompt=scene.text,
+                            size=size,
+                            quality=quality,
+                            style=style
+                        )
+                except Exception as e:
+                    await events.put({"status": "scene_error", "scene_index": scene.index, "message": str(e)})
+                    return
+
+            # 세마포어를 놓은 뒤 큐에 넣어 업로드 대기 중에도 다음 장면 생성이 시작되게 함
+            await upload_queue.put((scene, result))
+
+        async def producer():
+            try:
+                await asyncio.gather(*(generate(scene) for scene in scenes))
+            finally:
+                for _ in range(self.upload_concurrency):
+                    await upload_queue.put(None)
+
+        async def consumer():
+            while True:
+                item = await upload_queue.get()
+                if item is None:
+                    return
+                scene, result = item
+                try:
+                    with log_duration(logger, "upload", scene_index=scene.index):
+                        blob_result = await self.storage_service.upload_image_from_url(
+                            image_url=result["url"],
+                            prompt=scene.text
+                        )
+                    if on_uploaded is not None:
+                        await on_uploaded(scene.text, result, blob_result)
+                    await events.put({
+                        "status": "scene_completed",
+                        "scene_index": scene.index,
+                        "image_id": blob_result["image_id"],
+                        "image_url": result["url"],
+                        "blob_url": blob_result["image_url"],
+                        "revised_prompt": result.get("revised_prompt")
+                    })
+                except Exception as e:
+                    await events.put({"status": "scene_error", "scene_index": scene.index, "message": str(e)})
+
+        async def consumers():
+            try:
+                await asyncio.gather(*(consumer() for _ in range(self.upload_concurrency)))
+            finally:
+                await events.put(None)
+
+        tasks = [asyncio.create_task(producer()), asyncio.create_task(consumers())]
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                if event["status"] == "scene_completed":
+                    succeeded += 1
+                yield event
+
+            yield {
+                "status": "passage_completed",
+                "total": len(scenes),
+                "succeeded": succeeded,
+                "elapsed_seconds": round(time.perf_counter() - started, 3)
+            }
+        finally:
+            # 클라이언트가 스트림을 중간에 닫으면 남은 생성/업로드를 취소
+            if not all(task.done() for task in tasks):
+                metrics.inc("passages_cancelled")
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
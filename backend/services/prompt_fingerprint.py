@@ -0,0 +1,221 @@
+import re
+import random
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 사용자가 습관적으로 붙이는 앞머리 문구 (정규화 시 제거)
+LEADING_PHRASES = [
+    "a detailed illustration of",
+    "an illustration of",
+    "illustration of",
+    "다음 장면을 그려줘",
+    "다음 장면을 그려 줘",
+    "이 장면을 그려줘",
+    "그려줘",
+]
+NON_WORD_PATTERN = re.compile(r"[^\w]+", re.UNICODE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+NUM_BINS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_BINS // LSH_BANDS
+SHINGLE_SIZE = 3
+MASK64 = (1 << 64) - 1
+
+_rng = random.Random(20240101)
+_BIN_MASKS = [_rng.getrandbits(64) for _ in range(NUM_BINS)]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    프롬프트 정규화
+
+    유니코드 정규화(NFKC), 소문자화, 앞머리 문구 제거, 구두점 제거, 공백 통일
+    """
+    text = unicodedata.normalize("NFKC", prompt or "").lower().strip()
+
+    stripped = True
+    while stripped:
+        stripped = False
+        for phrase in LEADING_PHRASES:
+            if text.startswith(phrase):
+                text = text[len(phrase):].lstrip(" :,.-")
+                stripped = True
+
+    text = NON_WORD_PATTERN.sub(" ", text)
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def prompt_digest(prompt: str) -> str:
+    """정규화된 프롬프트의 SHA-256 (정확 일치 키)"""
+    return hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+
+def minhash_signature(normalized: str) -> Tuple[int, ...]:
+    """
+    one-permutation MinHash 서명
+
+    공백을 제거한 문자 3-gram을 한 번씩만 해시해 NUM_BINS개의 구간에 나눠 최솟값을 취하고,
+    빈 구간은 다음 구간 값으로 채운다(densification). 프롬프트 길이에 선형이다.
+    서명은 프로세스 메모리 안에서만 비교하므로 내장 hash()를 사용한다.
+    """
+    compact = normalized.replace(" ", "")
+    if len(compact) < SHINGLE_SIZE:
+        shingles = {compact} if compact else set()
+    else:
+        shingles = {compact[i:i + SHINGLE_SIZE] for i in range(len(compact) - SHINGLE_SIZE + 1)}
+
+    bins: List[Optional[int]] = [None] * NUM_BINS
+    for shingle in shingles:
+        value = hash(shingle) & MASK64
+        index = value % NUM_BINS
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+
+    if all(b is None for b in bins):
+        return tuple([0] * NUM_BINS)
+
+    signature = []
+    for index in range(NUM_BINS):
+        offset = 0
+        while bins[(index + offset) % NUM_BINS] is None:
+            offset += 1
+        # 빌려 온 값은 구간별 마스크로 섞어 다른 구간 값과 구분
+        signature.append((bins[(index + offset) % NUM_BINS] ^ _BIN_MASKS[offset]) & MASK64)
+    return tuple(signature)
+
+
+def estimate_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """서명에서 추정한 Jaccard 유사도"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_BINS
+
+
+@dataclass
+class FingerprintMatch:
+    image_id: str
+    url: Optional[str]
+    prompt: str
+    similarity: float
+
+
+class PromptFingerprintIndex:
+    """
+    유사 프롬프트 탐지용 인메모리 LSH 인덱스
+
+    MinHash 서명을 LSH_BANDS개 밴드로 나눠 버킷에 넣고, 같은 버킷을 공유하는 후보만 비교한다.
+    생성 옵션(size/quality/style)이 같은 항목만 재사용 대상으로 본다.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, max_entries: Optional[int] = None):
+        self.threshold = threshold if threshold is not None else settings.DUPLICATE_SIMILARITY_THRESHOLD
+        self.max_entries = max_entries if max_entries is not None else settings.DUPLICATE_INDEX_MAX_ENTRIES
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._exact: Dict[Tuple[str, str], str] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self.stats = {"lookups": 0, "exact_hits": 0, "similar_hits": 0}
+
+    @staticmethod
+    def _option_key(options: Optional[dict]) -> str:
+        options = options or {}
+        return "|".join(str(options.get(k) or "") for k in ("size", "quality", "style"))
+
+    def add(self, image_id: str, prompt: str, url: Optional[str] = None, options: Optional[dict] = None):
+        if image_id in self._entries:
+            self.remove(image_id)
+
+        normalized = normalize_prompt(prompt)
+        if not normalized:
+            return
+
+        option_key = self._option_key(options)
+        signature = minhash_signature(normalized)
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+        self._entries[image_id] = {
+            "prompt": prompt,
+            "url": url,
+            "option_key": option_key,
+            "signature": signature,
+            "digest": digest
+        }
+        self._exact[(digest, option_key)] = image_id
+        for band in range(LSH_BANDS):
+            key = (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+            self._buckets.setdefault(key, set()).add(image_id)
+
+        while len(self._entries) > self.max_entries:
+            self.remove(next(iter(self._entries)))
+
+    def remove(self, image_id: str):
+        entry = self._entries.pop(image_id, None)
+        if entry is None:
+            return
+
+        exact_key = (entry["digest"], entry["option_key"])
+        if self._exact.get(exact_key) == image_id:
+            del self._exact[exact_key]
+
+        signature = entry["signature"]
+        for band in range(LSH_BANDS):
+            key = (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(image_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def on_index_record(self, record: dict):
+        """PromptIndex 리스너 - 추가/삭제 기록을 LSH 인덱스에 반영 (Archive 계층 이미지는 바로 읽을 수 없으므로 제외)"""
+        if record.get("op") == "delete" or record.get("tier") == "Archive":
+            self.remove(record["image_id"])
+        elif record.get("op") == "tier":
+            return
+        else:
+            self.add(record["image_id"], record.get("prompt") or "", record.get("url"), record.get("options"))
+
+    def find(self, prompt: str, options: Optional[dict] = None, threshold: Optional[float] = None) -> Optional[FingerprintMatch]:
+        """threshold 이상으로 유사한 기존 이미지 검색 (없으면 None)"""
+        self.stats["lookups"] += 1
+        threshold = self.threshold if threshold is None else threshold
+
+        normalized = normalize_prompt(prompt)
+        if not normalized:
+            return None
+
+        option_key = self._option_key(options)
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+        exact_id = self._exact.get((digest, option_key))
+        if exact_id is not None:
+            self.stats["exact_hits"] += 1
+            entry = self._entries[exact_id]
+            return FingerprintMatch(exact_id, entry["url"], entry["prompt"], 1.0)
+
+        signature = minhash_signature(normalized)
+        candidates: Set[str] = set()
+        for band in range(LSH_BANDS):
+            candidates |= self._buckets.get((band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]), set())
+
+        best: Optional[FingerprintMatch] = None
+        for image_id in candidates:
+            entry = self._entries[image_id]
+            if entry["option_key"] != option_key:
+                continue
+            similarity = estimate_similarity(signature, entry["signature"])
+            if similarity >= threshold and (best is None or similarity > best.similarity):
+                best = FingerprintMatch(image_id, entry["url"], entry["prompt"], similarity)
+
+        if best is not None:
+            self.stats["similar_hits"] += 1
+        return best
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "entries": len(self._entries), "threshold": self.threshold}
@@ -0,0 +1,362 @@
+import os
+import re
+import json
+import fcntl
+import asyncio
+import logging
+import unicodedata
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import aiofiles
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+# 한글/한자/가나 - 띄어쓰기가 불규칙하므로 문자 n-gram으로 색인
+CJK_PATTERN = re.compile(r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u4e00-\u9fff\uac00-\ud7af]")
+
+IndexListener = Callable[[dict], None]
+
+
+def tokenize(text: str) -> Set[str]:
+    """
+    검색용 토큰화
+
+    - 한글 등 CJK 단어는 문자 bigram (한 글자 단어는 그대로)
+    - 그 외(영문/숫자) 단어는 소문자 단어 그대로
+    """
+    tokens: Set[str] = set()
+    if not text:
+        return tokens
+
+    normalized = unicodedata.normalize("NFKC", text).lower()
+    for word in WORD_PATTERN.findall(normalized):
+        if CJK_PATTERN.search(word):
+            if len(word) == 1:
+                tokens.add(word)
+            else:
+                tokens.update(word[i:i + 2] for i in range(len(word) - 1))
+        elif len(word) > 1:
+            tokens.add(word)
+    return tokens
+
+
+class PromptIndex:
+    """
+    생성 프롬프트 사이드카 인덱스 + 역색인 검색
+
+    Blob 메타데이터에는 한글 프롬프트를 저장할 수 없으므로(400 에러) 프롬프트, revised_prompt,
+    생성 옵션을 append-only JSONL 파일에 기록하고 메모리에 역색인을 유지한다.
+    여러 워커가 같은 파일에 append하며, 각 워커는 파일 끝에서 새로 추가된 줄만 읽어 반영한다.
+    append는 잠금 파일의 공유 flock, 압축(파일 교체)은 배타 flock 안에서 수행해 압축 중 추가된 기록이 사라지지 않게 한다.
+    톰스톤/중복 줄이 PROMPT_INDEX_COMPACT_* 기준을 넘으면 갱신 주기(없으면 기록 직후)마다 압축한다.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = os.path.abspath(path or settings.PROMPT_INDEX_PATH)
+        self.lock_path = f"{self.path}.lock"
+        self.entries: Dict[str, dict] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._tokens: Dict[str, Set[str]] = {}
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._stale_lines = 0
+        self._lock = asyncio.Lock()
+        self._listeners: List[IndexListener] = []
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: IndexListener):
+        """엔트리 추가/삭제 기록마다 호출할 콜백 등록 (다른 인덱스를 동기화하는 용도)"""
+        self._listeners.append(listener)
+
+    async def load(self):
+        """시작 시 사이드카 파일 전체 로드 (필요하면 압축)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        await self.refresh()
+        await self._maybe_compact()
+        logger.info("PromptIndex loaded: %s entries", len(self.entries))
+
+    async def start(self):
+        """PROMPT_INDEX_REFRESH_INTERVAL마다 파일 끝을 읽는 백그라운드 갱신 시작 (유사 프롬프트 재사용이 다른 프로세스의 기록도 보게 함)"""
+        if settings.PROMPT_INDEX_REFRESH_INTERVAL > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(settings.PROMPT_INDEX_REFRESH_INTERVAL)
+            try:
+                await self.refresh()
+                await self._maybe_compact()
+            except Exception as e:
+                logger.warning("PromptIndex refresh failed: %s", e)
+
+    async def add(
+        self,
+        image_id: str,
+        prompt: str,
+        revised_prompt: Optional[str] = None,
+        url: Optional[str] = None,
+        options: Optional[dict] = None,
+        created_at: Optional[str] = None
+    ) -> dict:
+        """생성 결과 기록"""
+        record = {
+            "op": "add",
+            "image_id": image_id,
+            "prompt": prompt,
+            "revised_prompt": revised_prompt,
+            "url": url,
+            "options": options or {},
+            "created_at": created_at or datetime.utcnow().isoformat()
+        }
+        await self._append(record)
+        return record
+
+    async def remove(self, image_id: str):
+        """이미지 삭제 시 톰스톤 기록"""
+        await self.refresh()
+        if image_id in self.entries:
+            await self._append({"op": "delete", "image_id": image_id})
+
+    async def remove_many(self, image_ids: Iterable[str]):
+        """여러 이미지의 톰스톤을 한 번에 기록 (정리 작업용)"""
+        await self.refresh()
+        await self._append_many([
+            {"op": "delete", "image_id": image_id} for image_id in image_ids if image_id in self.entries
+        ])
+
+    async def set_tier(self, image_ids: Iterable[str], tier: str):
+        """액세스 계층 변경 기록 (Archive 이미지는 재사용 대상에서 빠짐)"""
+        await self.refresh()
+        await self._append_many([
+            {"op": "tier", "image_id": image_id, "tier": tier} for image_id in image_ids if image_id in self.entries
+        ])
+
+    def get(self, image_id: str) -> Optional[dict]:
+        return self.entries.get(image_id)
+
+    async def search(self, query: str, limit: int = 20, offset: int = 0) -> dict:
+        """
+        프롬프트 검색
+
+        모든 질의 토큰을 포함하는 항목을 우선 반환하고, 없으면 일치 토큰 수 기준으로 부분 일치 결과를 반환한다.
+        """
+        await self.refresh()
+
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return {"images": [], "total": 0}
+
+        postings = sorted((self._postings.get(t, set()) for t in query_tokens), key=len)
+
+        if postings[0]:
+            matched = set(postings[0])
+            for posting in postings[1:]:
+                matched &= posting
+                if not matched:
+                    break
+        else:
+            matched = set()
+
+        if matched:
+            scored = [(len(query_tokens), image_id) for image_id in matched]
+        else:
+            counts: Dict[str, int] = {}
+            for posting in postings:
+                for image_id in posting:
+                    counts[image_id] = counts.get(image_id, 0) + 1
+            scored = [(count, image_id) for image_id, count in counts.items()]
+
+        scored.sort(key=lambda item: (item[0], self.entries[item[1]].get("created_at") or ""), reverse=True)
+
+        images = []
+        for score, image_id in scored[offset:offset + limit]:
+            entry = self.entries[image_id]
+            images.append({
+                "image_id": image_id,
+                "url": entry.get("url"),
+                "prompt": entry.get("prompt"),
+                "revised_prompt": entry.get("revised_prompt"),
+                "options": entry.get("options"),
+                "created_at": entry.get("created_at"),
+                "score": round(score / len(query_tokens), 3)
+            })
+
+        return {"images": images, "total": len(scored)}
+
+    async def refresh(self):
+        """다른 워커가 파일 끝에 추가한 줄을 읽어 반영 (파일이 교체되었으면 전체 재로드)"""
+        async with self._lock:
+            try:
+                stat = await asyncio.to_thread(os.stat, self.path)
+            except FileNotFoundError:
+                return
+
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                self._reset()
+                self._inode = stat.st_ino
+
+            if stat.st_size == self._offset:
+                return
+
+            async with aiofiles.open(self.path, "rb") as f:
+                await f.seek(self._offset)
+                data = await f.read()
+
+            # 아직 쓰는 중인 마지막 줄은 다음 번에 읽음
+            end = data.rfind(b"\n") + 1
+            if end == 0:
+                return
+            self._offset += end
+            self._apply_lines(data[:end].splitlines())
+
+    def _needs_compaction(self) -> bool:
+        return self._stale_lines > max(
+            settings.PROMPT_INDEX_COMPACT_MIN_STALE,
+            len(self.entries) * settings.PROMPT_INDEX_COMPACT_RATIO
+        )
+
+    async def _maybe_compact(self):
+        if self._needs_compaction():
+            await self.compact(only_if_needed=True)
+
+    async def compact(self, only_if_needed: bool = False):
+        """
+        톰스톤/중복을 제거한 스냅샷으로 파일 교체 (다른 워커는 inode 변경을 보고 재로드)
+
+        only_if_needed면 잠금을 얻은 뒤 다시 확인해, 그 사이 다른 워커가 압축했으면 건너뛴다.
+        """
+        # 배타 잠금 동안 다른 워커의 append는 대기하므로, 잠금 후 끝까지 읽은 스냅샷에 빠지는 기록이 없음
+        lock_fd = await asyncio.to_thread(self._lock_file, fcntl.LOCK_EX)
+        try:
+            await self.refresh()
+            if only_if_needed and not self._needs_compaction():
+                return
+            async with self._lock:
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                async with aiofiles.open(tmp_path, "w", encoding="utf-8") as f:
+                    for entry in self.entries.values():
+                        await f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                stat = await asyncio.to_thread(self._replace, tmp_path)
+
+                self._inode = stat.st_ino
+                self._offset = stat.st_size
+                self._stale_lines = 0
+        finally:
+            await asyncio.to_thread(self._unlock_file, lock_fd)
+        logger.info("PromptIndex compacted: %s entries", len(self.entries))
+
+    def _replace(self, tmp_path: str) -> os.stat_result:
+        os.replace(tmp_path, self.path)
+        return os.stat(self.path)
+
+    def _lock_file(self, operation: int) -> int:
+        """잠금 파일에 flock (블로킹이므로 스레드에서 호출)"""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    @staticmethod
+    def _unlock_file(fd: int):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _write_locked(self, data: bytes):
+        """공유 잠금 안에서 O_APPEND 한 번의 write (압축 중이면 교체가 끝난 뒤 새 파일에 기록)"""
+        lock_fd = self._lock_file(fcntl.LOCK_SH)
+        try:
+            with open(self.path, "ab") as f:
+                f.write(data)
+        finally:
+            self._unlock_file(lock_fd)
+
+    async def _append(self, record: dict):
+        await self._append_many([record])
+
+    async def _append_many(self, records: List[dict]):
+        if not records:
+            return
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        # O_APPEND + 한 번의 write로 여러 워커의 기록이 섞이지 않게 함
+        await asyncio.to_thread(self._write_locked, data)
+        await self.refresh()
+        # 백그라운드 갱신이 없으면(예열 CLI 등) 기록할 때 압축 필요 여부를 확인
+        if self._refresh_task is None:
+            await self._maybe_compact()
+
+    def _reset(self):
+        self.entries.clear()
+        self._postings.clear()
+        self._tokens.clear()
+        self._offset = 0
+        self._stale_lines = 0
+
+    def _apply_lines(self, lines: Iterable[bytes]):
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning("Skipping corrupt prompt index line")
+                continue
+
+            image_id = record.get("image_id")
+            if not image_id:
+                continue
+
+            if record.get("op") == "tier":
+                entry = self.entries.get(image_id)
+                if entry is None:
+                    continue
+                # 엔트리에 계층만 반영 (압축 시 add 기록에 tier 필드로 남음)
+                entry["tier"] = record.get("tier")
+                self._stale_lines += 1
+                record = {**entry, "op": "tier"}
+            elif image_id in self.entries:
+                self._unindex(image_id)
+                self._stale_lines += 1
+
+            if record.get("op") == "delete":
+                self._stale_lines += 1
+            elif record.get("op") != "tier":
+                self.entries[image_id] = record
+                self._index(image_id, record)
+
+            for listener in self._listeners:
+                try:
+                    listener(record)
+                except Exception as e:
+                    logger.warning("PromptIndex listener failed: %s", e)
+
+    def _index(self, image_id: str, record: dict):
+        tokens = tokenize(record.get("prompt") or "") | tokenize(record.get("revised_prompt") or "")
+        self._tokens[image_id] = tokens
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(image_id)
+
+    def _unindex(self, image_id: str):
+        self.entries.pop(image_id, None)
+        for token in self._tokens.pop(image_id, set()):
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.discard(image_id)
+                if not posting:
+                    del self._postings[token]
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self.entries), "tokens": len(self._postings)}
@@ -0,0 +1,169 @@
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+from config import settings
+from services.metrics import metrics
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # 공유 저장소 백엔드를 쓰지 않으면 redis 패키지는 선택 사항
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    retry_after: float = 0.0
+
+
+class InMemoryRateLimitBackend:
+    """워커 프로세스 단위 토큰 버킷 (오래 쓰지 않은 키는 LRU로 정리)"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float, cost: float) -> RateLimitResult:
+        return await self.take_all([key], rate, burst, cost)
+
+    async def take_all(self, keys: Sequence[str], rate: float, burst: float, cost: float) -> RateLimitResult:
+        """
+        모든 키에 cost만큼 토큰이 있으면 한꺼번에 차감, 하나라도 부족하면 아무것도 차감하지 않음
+
+        burst보다 큰 cost는 버킷이 가득 찼을 때 허용하고 초과분은 음수 잔량(빚)으로 남긴다.
+        """
+        now = time.monotonic()
+        needed = min(cost, burst)
+        levels = {}
+        for key in keys:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            levels[key] = min(burst, tokens + (now - updated) * rate)
+
+        shortfall = max((needed - tokens for tokens in levels.values()), default=0.0)
+        allowed = shortfall <= 0
+        for key, tokens in levels.items():
+            self._buckets[key] = (tokens - cost if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return RateLimitResult(True) if allowed else RateLimitResult(False, shortfall / rate)
+
+    async def close(self):
+        pass
+
+
+class RedisRateLimitBackend:
+    """
+    Redis 공유 토큰 버킷 (레플리카/워커 전체에 한도 적용)
+
+    Lua 스크립트로 모든 키의 읽기-계산-쓰기를 원자적으로 수행하며(전부 차감 또는 차감 없음),
+    시간은 Redis 서버 시계를 사용한다.
+    """
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local needed = math.min(cost, burst)
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local levels = {}
+    local shortfall = 0
+    for i, key in ipairs(KEYS) do
+        local data = redis.call('HMGET', key, 'tokens', 'ts')
+        local tokens = tonumber(data[1]) or burst
+        local ts = tonumber(data[2]) or now
+        tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+        levels[i] = tokens
+        shortfall = math.max(shortfall, needed - tokens)
+    end
+    local allowed = 0
+    if shortfall <= 0 then
+        allowed = 1
+    end
+    for i, key in ipairs(KEYS) do
+        local tokens = levels[i]
+        if allowed == 1 then
+            tokens = tokens - cost
+        end
+        redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+        redis.call('PEXPIRE', key, math.ceil((burst - tokens) / rate * 1000) + 1000)
+    end
+    local retry = 0
+    if allowed == 0 then
+        retry = shortfall / rate
+    end
+    return {allowed, tostring(retry)}
+    """
+
+    def __init__(self, url: str, prefix: str = "artelligence:ratelimit:"):
+        if redis_asyncio is None:
+            raise ValueError("RATE_LIMIT_BACKEND=redis를 사용하려면 redis 패키지가 필요합니다")
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: float, cost: float) -> RateLimitResult:
+        return await self.take_all([key], rate, burst, cost)
+
+    async def take_all(self, keys: Sequence[str], rate: float, burst: float, cost: float) -> RateLimitResult:
+        allowed, retry = await self._script(keys=[self.prefix + key for key in keys], args=[rate, burst, cost])
+        return RateLimitResult(bool(int(allowed)), float(retry))
+
+    async def close(self):
+        await self._client.close()
+
+
+def create_rate_limit_backend():
+    backend = settings.RATE_LIMIT_BACKEND.lower()
+    if backend == "memory":
+        return InMemoryRateLimitBackend()
+    if backend == "redis":
+        return RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+    raise ValueError(f"지원하지 않는 RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+
+
+class RateLimiter:
+    """
+    키(API 키 / 클라이언트 ID / IP)별 토큰 버킷 요청 제한
+
+    공유 저장소 장애 시에는 서비스 전체가 막히지 않도록 요청을 허용한다 (fail-open).
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        rate_per_minute: Optional[float] = None,
+        burst: Optional[float] = None
+    ):
+        self.backend = backend or create_rate_limit_backend()
+        self.rate = (rate_per_minute if rate_per_minute is not None else settings.RATE_LIMIT_GENERATE_PER_MINUTE) / 60
+        self.burst = burst if burst is not None else settings.RATE_LIMIT_GENERATE_BURST
+        self.enabled = settings.RATE_LIMIT_ENABLED
+
+    async def check(self, *keys: str, cost: float = 1) -> RateLimitResult:
+        """
+        모든 키의 버킷에서 cost만큼 차감, 하나라도 부족하면 거부 (거부 시 어느 키에서도 차감하지 않음)
+
+        cost는 요청이 일으키는 DALL-E 호출 수 (발췌문은 장면 수)
+        """
+        if not self.enabled or not keys:
+            return RateLimitResult(True)
+
+        try:
+            result = await self.backend.take_all(keys, self.rate, self.burst, cost)
+        except Exception as e:
+            logger.warning("Rate limit backend error, allowing request: %s", e)
+            metrics.inc("rate_limit_backend_errors")
+            return RateLimitResult(True)
+        if not result.allowed:
+            metrics.inc("rate_limited_requests")
+        return result
+
+    async def close(self):
+        await self.backend.close()
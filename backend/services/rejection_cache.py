@@ -0,0 +1,65 @@
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import settings
+from services.metrics import metrics
+from services.prompt_fingerprint import prompt_digest
+
+logger = logging.getLogger(__name__)
+
+
+class RejectionCache:
+    """
+    콘텐츠 정책으로 거부된 프롬프트 캐시
+
+    정규화한 프롬프트의 SHA-256(prompt_digest)을 키로 거부 사유와 원래 왕복 시간을 ttl 동안 보관한다.
+    같은(정규화 기준) 프롬프트로 다시 요청하면 DALL-E를 호출하지 않고 바로 거부한다.
+    프롬프트 원문은 저장하지 않으며, 항목 수는 LRU로 제한한다.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries or settings.REJECTION_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.REJECTION_CACHE_TTL
+        # digest -> (기록 시각, 거부 사유, 원래 왕복 시간)
+        self._entries: "OrderedDict[str, Tuple[float, str, float]]" = OrderedDict()
+        self.stats = {"hits": 0, "recorded": 0}
+
+    def get(self, prompt: str) -> Optional[str]:
+        """최근 거부된 프롬프트면 거부 사유, 아니면 None (적중 시 절약한 왕복 수/시간 집계)"""
+        if not settings.ENABLE_REJECTION_CACHE:
+            return None
+        digest = prompt_digest(prompt)
+        item = self._entries.get(digest)
+        if item is None:
+            return None
+
+        recorded_at, reason, round_trip = item
+        if time.monotonic() - recorded_at > self.ttl:
+            del self._entries[digest]
+            return None
+
+        self._entries.move_to_end(digest)
+        self.stats["hits"] += 1
+        metrics.inc("content_policy_rejections_avoided")
+        metrics.inc("content_policy_seconds_avoided", round_trip)
+        return reason
+
+    def add(self, prompt: str, reason: str, round_trip: float = 0.0):
+        if not settings.ENABLE_REJECTION_CACHE:
+            return
+        digest = prompt_digest(prompt)
+        self._entries[digest] = (time.monotonic(), reason, round_trip)
+        self._entries.move_to_end(digest)
+        self.stats["recorded"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl
+        }
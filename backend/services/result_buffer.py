@@ -0,0 +1,376 @@
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import settings
+from services.metrics import metrics
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # 공유 저장소 백엔드를 쓰지 않으면 redis 패키지는 선택 사항
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+RESULT_POLL_INTERVAL = 0.5
+
+class _ClientBuffer:
+    __slots__ = ("next_seq", "events", "updated")
+
+    def __init__(self, max_events: int):
+        self.next_seq = 1
+        self.events: Deque[Tuple[float, dict]] = deque(maxlen=max_events)
+        self.updated = time.monotonic()
+
+
+class InMemoryResultBackend:
+    """
+    워커 프로세스 단위 저장소 (단일 워커 또는 같은 client_id를 같은 워커로 보내는 sticky session 전용)
+
+    클라이언트 수와 결과 수는 LRU로 제한한다.
+    """
+
+    def __init__(
+        self,
+        max_events: Optional[int] = None,
+        max_clients: Optional[int] = None,
+        max_results: Optional[int] = None
+    ):
+        self.max_events = max_events or settings.WS_REPLAY_MAX_EVENTS
+        self.max_clients = max_clients or settings.WS_REPLAY_MAX_CLIENTS
+        self.max_results = max_results or settings.GENERATION_RESULT_MAX_ENTRIES
+        self._clients: "OrderedDict[str, _ClientBuffer]" = OrderedDict()
+        self._results: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._markers: Dict[str, Tuple[float, str]] = {}
+
+    async def append(self, client_id: str, message: dict, ttl: float) -> dict:
+        now = time.monotonic()
+        buffer = self._clients.get(client_id)
+        if buffer is None:
+            buffer = self._clients[client_id] = _ClientBuffer(self.max_events)
+        else:
+            self._clients.move_to_end(client_id)
+
+        message = {**message, "seq": buffer.next_seq}
+        buffer.next_seq += 1
+        buffer.events.append((now, message))
+        buffer.updated = now
+
+        self._evict(now, ttl)
+        return message
+
+    async def events_after(self, client_id: str, last_seq: int, ttl: float) -> List[dict]:
+        buffer = self._clients.get(client_id)
+        if buffer is None:
+            return []
+        cutoff = time.monotonic() - ttl
+        return [message for ts, message in buffer.events if ts >= cutoff and message["seq"] > last_seq]
+
+    async def put_result(self, key: str, result: dict, ttl: float):
+        self._results[key] = (time.monotonic() + ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    async def get_result(self, key: str) -> Optional[dict]:
+        item = self._results.get(key)
+        if item is None:
+            return None
+        expires_at, result = item
+        if time.monotonic() >= expires_at:
+            del self._results[key]
+            return None
+        return result
+
+    async def set_marker(self, key: str, token: str, ttl: float):
+        self._markers[key] = (time.monotonic() + ttl, token)
+
+    async def get_marker(self, key: str) -> Optional[str]:
+        item = self._markers.get(key)
+        if item is None:
+            return None
+        expires_at, token = item
+        if time.monotonic() >= expires_at:
+            del self._markers[key]
+            return None
+        return token
+
+    async def clear_marker(self, key: str, token: Optional[str] = None):
+        if token is None or await self.get_marker(key) == token:
+            self._markers.pop(key, None)
+
+    async def refresh_markers(self, markers: Dict[str, str], ttl: float):
+        expires_at = time.monotonic() + ttl
+        for key, token in markers.items():
+            if await self.get_marker(key) == token:
+                self._markers[key] = (expires_at, token)
+
+    def _evict(self, now: float, ttl: float):
+        cutoff = now - ttl
+        while self._clients:
+            client_id, buffer = next(iter(self._clients.items()))
+            if len(self._clients) > self.max_clients or buffer.updated < cutoff:
+                del self._clients[client_id]
+            else:
+                break
+        while self._results:
+            expires_at, _ = next(iter(self._results.values()))
+            if expires_at > now:
+                break
+            self._results.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        return {"clients": len(self._clients), "results": len(self._results), "markers": len(self._markers)}
+
+    async def close(self):
+        pass
+
+
+class RedisResultBackend:
+    """
+    Redis 공유 저장소 (워커/레플리카 전체에서 재전송 버퍼, 결과, 진행 중/연결 표시를 공유)
+
+    재전송 메시지는 client_id별 sorted set에 seq를 점수로 넣고 최근 max_events개만 남긴다.
+    seq는 INCR로 매기므로 어느 워커가 보내도 client_id 안에서 이어진다.
+    """
+
+    # 값이 token과 같을 때만 지우거나 만료 시간을 늘림 (다른 워커의 새 연결 표시를 건드리지 않도록)
+    CLEAR_IF_MATCH = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+    REFRESH_IF_MATCH = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+    def __init__(self, url: str, prefix: str = "artelligence:ws:", max_events: Optional[int] = None):
+        if redis_asyncio is None:
+            raise ValueError("WS_STATE_BACKEND=redis를 사용하려면 redis 패키지가 필요합니다")
+        self.prefix = prefix
+        self.max_events = max_events or settings.WS_REPLAY_MAX_EVENTS
+        self._client = redis_asyncio.from_url(url)
+        self._clear_if_match = self._client.register_script(self.CLEAR_IF_MATCH)
+
+    async def append(self, client_id: str, message: dict, ttl: float) -> dict:
+        seq_key, events_key = self._client_keys(client_id)
+        ttl_ms = int(ttl * 1000)
+        seq = await self._client.incr(seq_key)
+        message = {**message, "seq": seq}
+
+        pipe = self._client.pipeline(transaction=False)
+        pipe.zadd(events_key, {json.dumps([time.time(), message]): seq})
+        pipe.zremrangebyrank(events_key, 0, -(self.max_events + 1))
+        pipe.pexpire(events_key, ttl_ms)
+        pipe.pexpire(seq_key, ttl_ms)
+        await pipe.execute()
+        return message
+
+    async def events_after(self, client_id: str, last_seq: int, ttl: float) -> List[dict]:
+        _, events_key = self._client_keys(client_id)
+        cutoff = time.time() - ttl
+        events = []
+        for value in await self._client.zrangebyscore(events_key, f"({last_seq}", "+inf"):
+            ts, message = json.loads(value)
+            if ts >= cutoff:
+                events.append(message)
+        return events
+
+    async def put_result(self, key: str, result: dict, ttl: float):
+        await self._client.set(f"{self.prefix}result:{key}", json.dumps(result), px=int(ttl * 1000))
+
+    async def get_result(self, key: str) -> Optional[dict]:
+        value = await self._client.get(f"{self.prefix}result:{key}")
+        return json.loads(value) if value is not None else None
+
+    async def set_marker(self, key: str, token: str, ttl: float):
+        await self._client.set(self.prefix + key, token, px=int(ttl * 1000))
+
+    async def get_marker(self, key: str) -> Optional[str]:
+        value = await self._client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    async def clear_marker(self, key: str, token: Optional[str] = None):
+        if token is None:
+            await self._client.delete(self.prefix + key)
+        else:
+            await self._clear_if_match(keys=[self.prefix + key], args=[token])
+
+    async def refresh_markers(self, markers: Dict[str, str], ttl: float):
+        if not markers:
+            return
+        pipe = self._client.pipeline(transaction=False)
+        for key, token in markers.items():
+            pipe.eval(self.REFRESH_IF_MATCH, 1, self.prefix + key, token, int(ttl * 1000))
+        await pipe.execute()
+
+    def _client_keys(self, client_id: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(client_id.encode("utf-8")).hexdigest()
+        return f"{self.prefix}seq:{digest}", f"{self.prefix}events:{digest}"
+
+    def snapshot(self) -> dict:
+        return {}
+
+    async def close(self):
+        await self._client.close()
+
+
+def create_result_backend():
+    backend = settings.WS_STATE_BACKEND.lower()
+    if backend == "memory":
+        return InMemoryResultBackend()
+    if backend == "redis":
+        return RedisResultBackend(settings.WS_STATE_REDIS_URL)
+    raise ValueError(f"지원하지 않는 WS_STATE_BACKEND: {settings.WS_STATE_BACKEND}")
+
+
+class ResultBuffer:
+    """
+    WebSocket 재연결용 단기 결과 버퍼
+
+    - 클라이언트별로 보낸 메시지에 순번(seq)을 붙여 최근 WS_REPLAY_MAX_EVENTS개를 ttl 동안 보관한다.
+      `/ws/{client_id}?last_seq=N`으로 재연결하면 N 이후 메시지를 다시 보낸다.
+    - 완료/실패 결과는 (client_id, request_id)로도 ttl 동안 조회할 수 있다.
+      request_id는 클라이언트가 정하므로 다른 클라이언트의 결과와 섞이지 않게 client_id로 나눈다.
+    - 진행 중인 생성 작업과 연결된 client_id도 표시해 둔다. 연결 표시는 연결마다 token을 두어
+      끊긴 연결이 다른 워커의 새 연결 표시를 지우지 않게 한다.
+
+    memory 백엔드는 워커 프로세스 안에서만 보이므로 워커가 여럿이면 sticky session이 필요하다.
+    redis 백엔드는 재연결/결과 조회가 다른 워커로 가도 같은 상태를 본다.
+    공유 저장소 장애 시에는 메시지 전달이 막히지 않도록 버퍼 없이 처리한다 (fail-open).
+    """
+
+    def __init__(self, backend=None, ttl: Optional[float] = None):
+        self.backend = backend or create_result_backend()
+        self.ttl = ttl or settings.WS_REPLAY_TTL
+        self.stats = {"recorded": 0, "replayed": 0}
+
+    @property
+    def shared(self) -> bool:
+        """다른 워커의 연결/작업까지 보이는지"""
+        return not isinstance(self.backend, InMemoryResultBackend)
+
+    @staticmethod
+    def _key(client_id: str, request_id: str) -> str:
+        return hashlib.sha256(f"{client_id}\n{request_id}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _presence_key(client_id: str) -> str:
+        return "presence:" + hashlib.sha256(client_id.encode("utf-8")).hexdigest()
+
+    def _backend_error(self, action: str, error: Exception):
+        logger.warning("Result buffer backend error (%s): %s", action, error)
+        metrics.inc("ws_state_backend_errors")
+
+    async def record(self, client_id: str, message: dict) -> dict:
+        """메시지에 seq를 붙여 버퍼에 넣고 반환 (저장소 장애 시 seq 없이 그대로 반환)"""
+        try:
+            message = await self.backend.append(client_id, message, self.ttl)
+        except Exception as e:
+            self._backend_error("record", e)
+            return message
+        self.stats["recorded"] += 1
+        return message
+
+    async def replay(self, client_id: str, last_seq: int) -> List[dict]:
+        """last_seq 이후의 (만료되지 않은) 메시지 목록"""
+        try:
+            events = await self.backend.events_after(client_id, last_seq, self.ttl)
+        except Exception as e:
+            self._backend_error("replay", e)
+            return []
+        self.stats["replayed"] += len(events)
+        return events
+
+    async def store_result(self, client_id: str, request_id: str, result: dict):
+        try:
+            await self.backend.put_result(self._key(client_id, request_id), result, self.ttl)
+        except Exception as e:
+            self._backend_error("store_result", e)
+
+    async def get_result(self, client_id: str, request_id: str) -> Optional[dict]:
+        try:
+            return await self.backend.get_result(self._key(client_id, request_id))
+        except Exception as e:
+            self._backend_error("get_result", e)
+            return None
+
+    async def wait_result(self, client_id: str, request_id: str, timeout: float) -> Optional[dict]:
+        """다른 워커에서 진행 중인 작업의 결과를 timeout 동안 기다림 (작업 표시가 사라지거나 시간이 지나면 None)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            result = await self.get_result(client_id, request_id)
+            if result is not None:
+                return result
+            if time.monotonic() >= deadline or not await self.is_inflight(client_id, request_id):
+                # 결과 보관 직후 작업 표시가 지워졌을 수 있으므로 한 번 더 확인
+                return await self.get_result(client_id, request_id)
+            await asyncio.sleep(RESULT_POLL_INTERVAL)
+
+    async def mark_inflight(self, client_id: str, request_id: str):
+        try:
+            await self.backend.set_marker(
+                "inflight:" + self._key(client_id, request_id), "1", settings.GENERATION_INFLIGHT_TTL
+            )
+        except Exception as e:
+            self._backend_error("mark_inflight", e)
+
+    async def clear_inflight(self, client_id: str, request_id: str):
+        try:
+            await self.backend.clear_marker("inflight:" + self._key(client_id, request_id))
+        except Exception as e:
+            self._backend_error("clear_inflight", e)
+
+    async def is_inflight(self, client_id: str, request_id: str) -> bool:
+        try:
+            return await self.backend.get_marker("inflight:" + self._key(client_id, request_id)) is not None
+        except Exception as e:
+            self._backend_error("is_inflight", e)
+            return False
+
+    async def set_presence(self, client_id: str, token: str):
+        try:
+            await self.backend.set_marker(self._presence_key(client_id), token, settings.WS_PRESENCE_TTL)
+        except Exception as e:
+            self._backend_error("set_presence", e)
+
+    async def refresh_presence(self, tokens: Dict[str, str]):
+        """client_id -> token (하트비트마다 호출, token이 바뀐 client_id는 건드리지 않음)"""
+        markers = {self._presence_key(client_id): token for client_id, token in tokens.items()}
+        try:
+            await self.backend.refresh_markers(markers, settings.WS_PRESENCE_TTL)
+        except Exception as e:
+            self._backend_error("refresh_presence", e)
+
+    async def clear_presence(self, client_id: str, token: str):
+        try:
+            await self.backend.clear_marker(self._presence_key(client_id), token)
+        except Exception as e:
+            self._backend_error("clear_presence", e)
+
+    async def is_present(self, client_id: str) -> bool:
+        """어느 워커에든 client_id가 연결돼 있는지 (확인할 수 없으면 연결된 것으로 봄)"""
+        try:
+            return await self.backend.get_marker(self._presence_key(client_id)) is not None
+        except Exception as e:
+            self._backend_error("is_present", e)
+            return True
+
+    async def close(self):
+        await self.backend.close()
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            **self.backend.snapshot(),
+            "backend": settings.WS_STATE_BACKEND.lower(),
+            "ttl_seconds": self.ttl
+        }
@@ -0,0 +1,150 @@
+import re
+import math
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 장면 전환 표시 줄 (***, * * *, ---, ###, ◆◆, ◇, ~~~ 등)
+SCENE_BREAK_PATTERN = re.compile(r"^\s*(?:[*#~=\-]\s*){3,}$|^\s*[◆◇■□●○★☆※]+\s*$")
+PARAGRAPH_SPLIT_PATTERN = re.compile(r"\n\s*\n")
+# 문장 경계: 종결 부호(닫는 따옴표 포함) 뒤 공백
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?。！？…])[\"'”’」』)]*\s+")
+
+
+@dataclass
+class Scene:
+    index: int
+    text: str
+
+
+@dataclass
+class PassageSplit:
+    """장면 분할 결과 (max_scenes를 넘어 생성하지 않는 뒤쪽 장면 수/글자 수 포함)"""
+    scenes: List[Scene]
+    dropped_scenes: int = 0
+    dropped_chars: int = 0
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped_scenes > 0
+
+
+def _split_sentences(paragraph: str, max_chars: int) -> List[str]:
+    """너무 긴 문단을 문장 단위로 max_chars 이하 조각으로 나눔"""
+    pieces: List[str] = []
+    current = ""
+    for sentence in SENTENCE_SPLIT_PATTERN.split(paragraph):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            # 문장 부호 없이 긴 문장은 강제로 자름
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _sections(text: str) -> List[List[str]]:
+    """장면 전환 표시를 기준으로 구역을 나누고, 구역마다 문단 목록 반환"""
+    sections: List[List[str]] = [[]]
+    buffer: List[str] = []
+
+    def flush():
+        if buffer:
+            block = "\n".join(buffer)
+            sections[-1].extend(p.strip() for p in PARAGRAPH_SPLIT_PATTERN.split(block) if p.strip())
+            buffer.clear()
+
+    for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        if SCENE_BREAK_PATTERN.match(line):
+            flush()
+            sections.append([])
+        else:
+            buffer.append(line)
+    flush()
+    return [s for s in sections if s]
+
+
+def _pack(sections: List[List[str]], target: int) -> List[str]:
+    """구역마다 조각(문단 또는 문장 묶음)을 target 길이까지 이어 붙인 장면 목록"""
+    chunks: List[str] = []
+    for units in sections:
+        current = ""
+        for unit in units:
+            if current and len(current) + 1 + len(unit) > target:
+                chunks.append(current)
+                current = unit
+            else:
+                current = f"{current}\n{unit}".strip()
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def split_passage(
+    text: str,
+    max_scenes: Optional[int] = None,
+    max_chars: Optional[int] = None
+) -> PassageSplit:
+    """
+    긴 소설 발췌문을 장면 단위로 분할 (로컬 휴리스틱, 외부 호출 없음)
+
+    1. 장면 전환 표시(***, ---, ◆ 등)는 항상 장면 경계가 된다.
+    2. 구역 안에서는 문단을 이어 붙여 목표 길이(전체 길이 / max_scenes, 최대 max_chars)를 채운다.
+    3. max_chars보다 긴 문단은 문장 경계에서 나눈다.
+    4. 장면이 max_scenes를 넘으면 목표 길이를 max_chars까지 늘려 다시 나눈다.
+    5. 그래도 max_scenes를 넘으면 뒤쪽 장면은 생성하지 않고 dropped_scenes/dropped_chars로 알린다
+       (마지막 장면에 합치면 프롬프트 길이 제한을 넘으므로).
+    """
+    max_scenes = max_scenes or settings.PASSAGE_MAX_SCENES
+    max_chars = max_chars or settings.PASSAGE_SCENE_MAX_CHARS
+
+    sections = _sections(text)
+    total_chars = sum(len(p) for section in sections for p in section)
+    if total_chars == 0:
+        return PassageSplit([])
+
+    target = min(max_chars, max(settings.PASSAGE_SCENE_MIN_CHARS, math.ceil(total_chars / max_scenes)))
+    units = [
+        [
+            unit
+            for paragraph in section
+            for unit in ([paragraph] if len(paragraph) <= max_chars else _split_sentences(paragraph, max_chars))
+        ]
+        for section in sections
+    ]
+    chunks = _pack(units, target)
+    # 문단 경계에 맞춰 채우다 보면 장면 수가 넘칠 수 있으므로, 버리기 전에 max_chars까지 목표 길이를 늘려 봄
+    while len(chunks) > max_scenes and target < max_chars:
+        target = min(max_chars, math.ceil(target * 1.25))
+        chunks = _pack(units, target)
+
+    dropped = chunks[max_scenes:]
+    if dropped:
+        logger.info("Passage split into %s scenes, keeping first %s", len(chunks), max_scenes)
+
+    return PassageSplit(
+        scenes=[Scene(index=i, text=chunk) for i, chunk in enumerate(chunks[:max_scenes])],
+        dropped_scenes=len(dropped),
+        dropped_chars=sum(len(chunk) for chunk in dropped)
+    )
+
+
+def split_scenes(
+    text: str,
+    max_scenes: Optional[int] = None,
+    max_chars: Optional[int] = None
+) -> List[Scene]:
+    """split_passage의 장면 목록만 반환"""
+    return split_passage(text, max_scenes, max_chars).scenes
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from azure.identity.aio import DefaultAzureCredential
+from azure.keyvault.secrets.aio import SecretClient
+from config import settings, KEY_VAULT_SECRETS
+
+logger = logging.getLogger(__name__)
+
+RotationCallback = Callable[[Dict[str, str]], Awaitable[None]]
+
+# 갱신 실패 후 다시 시도하기까지의 기본 간격 (초, 실패가 이어지면 백그라운드 갱신은 지수 백오프)
+ERROR_RETRY_INTERVAL = 30
+
+
+class SecretsProvider:
+    """
+    Key Vault 시크릿 캐시 + 백그라운드 갱신
+
+    - 시크릿을 메모리에 TTL과 함께 캐시하고, 만료 전에 백그라운드에서 다시 읽는다.
+    - 값이 바뀌면 settings를 갱신하고 등록된 콜백(클라이언트 교체)을 호출한다.
+    - 갱신 주기에 지터를 주어 여러 워커/레플리카가 동시에 Key Vault를 두드리지 않게 한다.
+    - 갱신 실패 시 기존 값을 계속 사용한다 (stale-while-error).
+    """
+
+    def __init__(
+        self,
+        vault_url: Optional[str] = None,
+        ttl: Optional[int] = None,
+        jitter: Optional[float] = None,
+    ):
+        self.vault_url = vault_url if vault_url is not None else settings.AZURE_KEY_VAULT_URL
+        self.ttl = ttl if ttl is not None else settings.SECRET_REFRESH_INTERVAL
+        self.jitter = jitter if jitter is not None else settings.SECRET_REFRESH_JITTER
+        self.enabled = bool(settings.USE_KEY_VAULT and self.vault_url)
+
+        # 환경 변수로 직접 지정된 값은 Key Vault 값으로 덮어쓰지 않는다
+        self._managed_fields = [
+            field for field in KEY_VAULT_SECRETS if not os.getenv(field)
+        ]
+
+        self._cache: Dict[str, str] = {
+            field: getattr(settings, field) for field in KEY_VAULT_SECRETS
+        }
+        self._expires_at = time.monotonic() + self.ttl
+        self._callbacks: List[RotationCallback] = []
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._credential: Optional[DefaultAzureCredential] = None
+        self._client: Optional[SecretClient] = None
+
+    def subscribe(self, callback: RotationCallback):
+        """시크릿 변경 시 호출할 콜백 등록 (변경된 필드 딕셔너리를 인자로 받음)"""
+        self._callbacks.append(callback)
+
+    async def get(self, field: str) -> str:
+        """
+        캐시된 시크릿 조회 (요청 단위 조회용)
+
+        캐시가 만료되었으면 한 번만 갱신하고, 동시에 들어온 요청은 같은 갱신 결과를 기다린다.
+        갱신에 실패하면 요청을 실패시키지 않고 기존 값을 돌려준다 (재시도는 ERROR_RETRY_INTERVAL 뒤).
+        """
+        if self.enabled and time.monotonic() >= self._expires_at:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Secret refresh failed, serving cached values: %s", e)
+        return self._cache.get(field, "")
+
+    async def refresh(self) -> Dict[str, str]:
+        """Key Vault에서 시크릿을 다시 읽고 변경된 값을 반영"""
+        if not self.enabled or not self._managed_fields:
+            return {}
+
+        async with self._refresh_lock:
+            # 다른 코루틴이 방금 갱신했거나 갱신에 실패해 재시도를 미뤘다면 건너뜀
+            if time.monotonic() < self._expires_at:
+                return {}
+
+            client = self._get_client()
+            changed: Dict[str, str] = {}
+
+            try:
+                for field in self._managed_fields:
+                    secret = await client.get_secret(KEY_VAULT_SECRETS[field])
+                    if secret.value and secret.value != self._cache.get(field):
+                        changed[field] = secret.value
+            except Exception:
+                # 기다리던 요청들이 차례로 Key Vault를 다시 두드리지 않도록 다음 시도를 미룸
+                self._expires_at = time.monotonic() + self._next_delay(min(self.ttl, ERROR_RETRY_INTERVAL))
+                raise
+
+            for field, value in changed.items():
+                self._cache[field] = value
+                setattr(settings, field, value)
+
+            self._expires_at = time.monotonic() + self.ttl
+
+        if changed:
+            logger.info("Secrets rotated: %s", ', '.join(sorted(changed)))
+            for callback in self._callbacks:
+                try:
+                    await callback(changed)
+                except Exception as e:
+                    logger.error("Secret rotation callback failed: %s", e)
+
+        return changed
+
+    async def start(self):
+        """백그라운드 갱신 태스크 시작"""
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._refresh_loop())
+        logger.info("SecretsProvider started (ttl=%ss)", self.ttl)
+
+    async def stop(self):
+        """백그라운드 갱신 태스크 종료 및 리소스 정리"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        if self._credential is not None:
+            await self._credential.close()
+            self._credential = None
+
+    def _get_client(self) -> SecretClient:
+        if self._client is None:
+            self._credential = DefaultAzureCredential()
+            self._client = SecretClient(vault_url=self.vault_url, credential=self._credential)
+        return self._client
+
+    def _next_delay(self, base: float) -> float:
+        # 레플리카마다 갱신 시점이 흩어지도록 ±jitter 비율만큼 무작위화
+        return max(1.0, base * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    async def _refresh_loop(self):
+        failures = 0
+        while True:
+            if failures:
+                # 실패 시 지수 백오프 (최대 TTL)
+                delay = self._next_delay(min(self.ttl, ERROR_RETRY_INTERVAL * 2 ** (failures - 1)))
+            else:
+                delay = self._next_delay(self.ttl)
+            await asyncio.sleep(delay)
+
+            try:
+                # 만료 시점을 당겨 refresh()가 건너뛰지 않도록 함
+                self._expires_at = time.monotonic()
+                await self.refresh()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                logger.warning("Secret refresh failed (attempt %s), keeping cached values: %s", failures, e)
@@ -0,0 +1,220 @@
+import re
+import asyncio
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Tuple
+
+from config import settings
+from services.http_pool import get_http_session
+
+logger = logging.getLogger(__name__)
+
+# 날짜 파티션 이름 (YYYYMMDD)
+PARTITION_PATTERN = re.compile(r"^\d{8}$")
+# 내용 주소 저장 객체 디렉토리/접두사 (파티션 이름이 아니므로 목록 조회에 나타나지 않음)
+OBJECTS_PREFIX = "objects"
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+def partition_prefix(date_from: Optional[str], date_to: Optional[str]) -> str:
+    """날짜 범위의 공통 접두사 (예: 20250101~20251231 -> "2025"), 파티션 목록 조회 범위를 좁히는 데 사용"""
+    if not date_from or not date_to:
+        return ""
+    prefix = []
+    for a, b in zip(date_from, date_to):
+        if a != b:
+            break
+        prefix.append(a)
+    return "".join(prefix)
+
+
+def content_digest(data: bytes) -> str:
+    """이미지 바이트의 SHA-256 (내용 주소 저장 객체 이름)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def in_date_range(partition: str, date_from: Optional[str], date_to: Optional[str]) -> bool:
+    if date_from and partition < date_from:
+        return False
+    if date_to and partition > date_to:
+        return False
+    return True
+
+
+class MaintenanceLockLost(Exception):
+    """정리 작업 도중 잠금(lease)을 잃음 (다른 레플리카가 실행할 수 있으므로 작업을 멈춤)"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"정리 작업 잠금을 잃었습니다 ({reason})")
+        self.reason = reason
+
+
+@dataclass
+class ImageStream:
+    """이미지 바이트 스트림 (다운로드 라우트용)"""
+    image_id: str
+    size: int  # 전체 이미지 크기
+    content_type: str
+    etag: Optional[str]
+    chunks: AsyncIterator[bytes]  # 요청한 범위의 바이트 청크
+
+
+class BaseStorageService(ABC):
+    """
+    이미지 스토리지 인터페이스
+
+    image_id는 백엔드와 무관하게 `YYYYMMDD/<uuid>.<ext>` 형태의 논리 경로다.
+    CONTENT_ADDRESSED_STORAGE를 켜면 바이트는 SHA-256 이름의 객체로 한 번만 저장되고
+    image_id는 그 객체를 가리키는 참조가 된다 (참조가 모두 삭제되면 객체도 삭제).
+    """
+
+    # 액세스 계층(Hot/Cool/Archive) 변경 지원 여부
+    supports_tiering = False
+
+    @abstractmethod
+    async def upload_image(
+        self,
+        image_data: bytes,
+        prompt: str,
+        file_extension: str = "png",
+        digest: Optional[str] = None
+    ) -> dict:
+        """
+        이미지 바이트 업로드, {"image_id", "image_url", "deduplicated"} 반환
+
+        digest는 호출한 쪽이 받으면서 계산해 둔 SHA-256 (없으면 내용 주소 저장 시 여기서 계산)
+        """
+
+    @abstractmethod
+    async def list_partitions(self, prefix: str = "") -> List[str]:
+        """prefix로 시작하는 최상위 파티션 목록 (objects 등 날짜가 아닌 이름은 호출한 쪽에서 PARTITION_PATTERN으로 거름)"""
+
+    @abstractmethod
+    async def scan_partition(self, partition: str) -> List[dict]:
+        """파티션 하나의 이미지 목록 (최신순)"""
+
+    @abstractmethod
+    async def get_image_metadata(self, image_id: str) -> Optional[dict]:
+        """이미지 메타데이터 조회, 없으면 None"""
+
+    @abstractmethod
+    async def delete_image(self, image_id: str) -> bool:
+        """이미지 삭제, 없으면 False"""
+
+    @abstractmethod
+    async def open_image_stream(
+        self,
+        image_id: str,
+        offset: int = 0,
+        length: Optional[int] = None
+    ) -> Optional[ImageStream]:
+        """이미지 바이트 스트림 열기 (offset부터 length 바이트), 없으면 None"""
+
+    async def list_images(
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> dict:
+        """
+        이미지 목록 조회 (갤러리용)
+
+        날짜 파티션을 최신순으로 몇 개씩 동시에 스캔하고, offset+limit개가 모이면 멈춘다.
+        전체 이력을 훑지 않으므로 total은 스캔한 파티션까지의 개수이며,
+        뒤에 파티션이 더 남아 있으면 has_more가 True다.
+
+        Args:
+            date_from: 시작 날짜 (YYYYMMDD, 포함)
+            date_to: 종료 날짜 (YYYYMMDD, 포함)
+        """
+        try:
+            partitions = await self.list_partitions(partition_prefix(date_from, date_to))
+            partitions = sorted(
+                (p for p in partitions if PARTITION_PATTERN.match(p) and in_date_range(p, date_from, date_to)),
+                reverse=True
+            )
+
+            needed = offset + limit
+            concurrency = max(1, settings.LIST_PARTITION_CONCURRENCY)
+            collected: List[dict] = []
+            scanned = 0
+
+            while scanned < len(partitions) and len(collected) < needed:
+                wave = partitions[scanned:scanned + concurrency]
+                results = await asyncio.gather(*(self.scan_partition(p) for p in wave))
+                for items in results:
+                    collected.extend(items)
+                scanned += len(wave)
+
+            return {
+                "images": collected[offset:needed],
+                "total": len(collected),
+                "has_more": scanned < len(partitions) or len(collected) > needed
+            }
+
+        except Exception as e:
+            logger.error("Error listing images: %s", e)
+            # 에러 시 빈 목록 반환 (앱 죽음 방지)
+            return {"images": [], "total": 0, "has_more": False}
+
+    async def delete_images(self, image_ids: List[str]) -> List[str]:
+        """여러 이미지 삭제, 실제로 삭제된 image_id 목록 반환 (기본 구현은 하나씩 삭제)"""
+        deleted = []
+        for image_id in image_ids:
+            if await self.delete_image(image_id):
+                deleted.append(image_id)
+        return deleted
+
+    async def set_tier(self, image_ids: List[str], tier: str) -> List[str]:
+        """여러 이미지의 액세스 계층 변경, 변경된 image_id 목록 반환"""
+        raise NotImplementedError("이 스토리지 백엔드는 액세스 계층 변경을 지원하지 않습니다")
+
+    @asynccontextmanager
+    async def maintenance_lock(self):
+        """
+        정리 작업 잠금 (여러 워커/레플리카 중 하나만 실행)
+
+        잠금을 얻으면 True, 다른 곳에서 실행 중이면 False를 yield한다.
+        실행 도중 잠금을 잃으면 본문을 멈추고 MaintenanceLockLost를 던진다.
+        """
+        yield True
+
+    async def close(self):
+        """리소스 정리"""
+
+    async def rebuild_client(self, changed: dict = None):
+        """시크릿 교체 시 클라이언트 재생성 (필요한 백엔드만 구현)"""
+
+    async def download_image(self, image_url: str) -> Tuple[bytes, Optional[str]]:
+        """
+        URL에서 이미지를 다운로드해 (바이트, 내용 주소 저장 시 SHA-256) 반환
+        """
+        # 공용 연결 풀 사용 (세션이 자동 압축 해제를 하지 않으므로 압축 없이 요청)
+        # 내용 주소 저장 시에는 받는 동안 청크마다 해시를 갱신해 업로드 전에 다시 읽지 않음
+        hasher = hashlib.sha256() if settings.CONTENT_ADDRESSED_STORAGE else None
+        chunks = []
+        async with get_http_session().get(image_url, headers={"Accept-Encoding": "identity"}) as response:
+            if response.status != 200:
+                raise Exception(f"이미지 다운로드 실패: {response.status}")
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                chunks.append(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+        return b"".join(chunks), hasher.hexdigest() if hasher is not None else None
+
+    async def upload_image_from_url(self, image_url: str, prompt: str) -> dict:
+        """
+        URL에서 이미지를 다운로드하여 업로드
+        """
+        try:
+            image_data, digest = await self.download_image(image_url)
+            # 백엔드별 upload_image 재사용
+            return await self.upload_image(image_data, prompt, digest=digest)
+
+        except Exception as e:
+            logger.error("Failed to upload image from URL: %s", e)
+            raise Exception(f"URL 업로드 실패: {str(e)}")
@@ -1,20 +1,98 @@
 import os
+import time
+import asyncio
 import uuid
 import logging
-import aiohttp
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import List, Optional
+from urllib.parse import quote
+from azure.core import MatchConditions
+from azure.core.exceptions import HttpResponseError, ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport
 from azure.storage.blob.aio import BlobServiceClient
 from azure.storage.blob import ContentSettings
 from config import settings
+from services.http_pool import get_http_session
+from services.logging_config import SAMPLED
+from services.metrics import metrics
+from services.storage_base import BaseStorageService, ImageStream, MaintenanceLockLost, OBJECTS_PREFIX, content_digest
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
 
-class StorageService:
+# Blob batch 요청 하나에 담을 수 있는 최대 하위 요청 수
+BLOB_BATCH_LIMIT = 256
+# 정리 작업 잠금용 Blob (파티션 디렉토리가 아니므로 목록 조회에 나타나지 않음)
+MAINTENANCE_LOCK_BLOB = ".maintenance.lock"
+MAINTENANCE_LEASE_SECONDS = 60
+# 내용 주소 저장: 참조 Blob 메타데이터 키 / 객체 참조 수 메타데이터 키 / 참조 수 갱신 경합 시 재시도 횟수
+DIGEST_METADATA_KEY = "content_sha256"
+LENGTH_METADATA_KEY = "content_length"
+REFCOUNT_METADATA_KEY = "refcount"
+REFCOUNT_MAX_ATTEMPTS = 8
+
+
+class SharedSessionTransport(AioHttpTransport):
+    """
+    워커 공용 aiohttp 세션(연결 풀)을 쓰는 Azure SDK 전송 계층
+
+    클라이언트를 교체해도 연결 풀은 유지되며, 세션은 앱 종료 시 close_http_session()으로 닫힌다.
+    """
+
+    async def open(self):
+        if self.session is None or self.session.closed:
+            self.session = get_http_session()
+        await super().open()
+
+    async def close(self):
+        self.session = None
+
+
+def create_blob_service_client(connection_string: str) -> BlobServiceClient:
+    """
+    공용 연결 풀과 업로드 블록 크기 설정을 적용한 BlobServiceClient
+
+    transport를 직접 넘기면 SDK는 클라이언트 인자의 connection_timeout/read_timeout을 무시하므로
+    타임아웃은 전송 계층을 만들 때 넘긴다.
+    """
+    transport = SharedSessionTransport(
+        connection_timeout=settings.HTTP_CONNECT_TIMEOUT,
+        read_timeout=settings.STORAGE_UPLOAD_TIMEOUT
+    )
+    return BlobServiceClient.from_connection_string(
+        connection_string,
+        transport=transport,
+        max_single_put_size=settings.BLOB_MAX_SINGLE_PUT_SIZE,
+        max_block_size=settings.BLOB_MAX_BLOCK_SIZE
+    )
+
+
+def blob_url(container_url: str, blob_name: str) -> str:
+    """컨테이너 URL로 Blob URL 생성 (BlobClient.url과 같은 인코딩, SAS 쿼리 유지) - 목록 조회에서 Blob마다 클라이언트를 만들지 않음"""
+    base, _, query = container_url.partition("?")
+    url = f"{base.rstrip('/')}/{quote(blob_name, safe='~/')}"
+    return f"{url}?{query}" if query else url
+
+
+class StorageService(BaseStorageService):
+    """
+    Azure Blob Storage 백엔드
+
+    내용 주소 저장 시 바이트는 `objects/<digest>.<ext>` Blob에 한 번만 올리고 (메타데이터 refcount),
+    이미지 경로에는 digest를 메타데이터로 가진 0바이트 참조 Blob을 만든다.
+    참조 수는 ETag 조건부 갱신으로 여러 워커/레플리카가 동시에 바꿔도 어긋나지 않으며,
+    조회/스트리밍/삭제는 참조 Blob의 메타데이터를 보고 객체로 이어진다.
+    """
+
+    supports_tiering = True
+
     def __init__(self):
         # 환경 변수에서 설정 가져오기
         self.connect_str = settings.AZURE_STORAGE_CONNECTION_STRING
         self.container_name = settings.AZURE_STORAGE_CONTAINER_NAME
+        # 참조 Blob(0바이트)의 계층을 바꿔도 저장 비용이 줄지 않으므로 내용 주소 저장 시 계층 이동은 끔
+        self.supports_tiering = not settings.CONTENT_ADDRESSED_STORAGE
 
         if not self.connect_str:
             logger.error("AZURE_STORAGE_CONNECTION_STRING is not set")
@@ -22,25 +100,62 @@ class StorageService:
 
         try:
             # 비동기 클라이언트 초기화
-            self.blob_service_client = BlobServiceClient.from_connection_string(self.connect_str)
+            self.blob_service_client = create_blob_service_client(self.connect_str)
+            self._container_ready = False
             logger.info("StorageService initialized successfully")
         except Exception as e:
-            logger.error(f"Storage Service initialization failed: {str(e)}")
+            logger.error("Storage Service initialization failed: %s", e)
             raise e
 
+    async def rebuild_client(self, changed: dict = None):
+        """
+        시크릿 교체 시 BlobServiceClient 재생성
+        
+        새 클라이언트로 참조를 한 번에 바꾸고, 진행 중인 업로드가 끝날 시간을 준 뒤 이전 클라이언트를 닫는다.
+        """
+        if changed is not None and "AZURE_STORAGE_CONNECTION_STRING" not in changed:
+            return
+
+        new_client = create_blob_service_client(settings.AZURE_STORAGE_CONNECTION_STRING)
+        old_client = self.blob_service_client
+        self.connect_str = settings.AZURE_STORAGE_CONNECTION_STRING
+        self.blob_service_client = new_client
+        self._container_ready = False
+        logger.info("BlobServiceClient swapped")
+        asyncio.create_task(self._close_later(old_client))
+
+    async def _close_later(self, client: BlobServiceClient):
+        await asyncio.sleep(settings.CLIENT_SWAP_GRACE_PERIOD)
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning("Failed to close previous BlobServiceClient: %s", e)
+
     async def _ensure_container_exists(self):
-        """컨테이너가 존재하는지 확인하고 없으면 생성"""
+        """컨테이너가 존재하는지 확인하고 없으면 생성 (한 번 확인하면 업로드마다 다시 묻지 않음)"""
         try:
             container_client = self.blob_service_client.get_container_client(self.container_name)
+            if self._container_ready:
+                return container_client
             if not await container_client.exists():
-                await container_client.create_container()
-                logger.info(f"Container '{self.container_name}' created")
+                try:
+                    await container_client.create_container()
+                    logger.info("Container '%s' created", self.container_name)
+                except ResourceExistsError:
+                    pass
+            self._container_ready = True
             return container_client
         except Exception as e:
-            logger.error(f"Container check/create failed: {str(e)}")
+            logger.error("Container check/create failed: %s", e)
             raise e
 
-    async def upload_image(self, image_data: bytes, prompt: str, file_extension: str = "png") -> dict:
+    async def upload_image(
+        self,
+        image_data: bytes,
+        prompt: str,
+        file_extension: str = "png",
+        digest: Optional[str] = None
+    ) -> dict:
         """
         이미지 바이트 데이터를 Azure Blob Storage에 업로드
         (한글 프롬프트 400 에러 방지를 위해 메타데이터 제외)
@@ -57,93 +172,178 @@ class StorageService:
                 if isinstance(image_data, str):
                     image_data = image_data.encode('utf-8')
 
-            logger.info(f"Uploading blob: {file_name} (Size: {len(image_data)} bytes)")
+            logger.info("Uploading blob: %s (Size: %s bytes)", file_name, len(image_data), extra=SAMPLED)
+
+            content_settings = ContentSettings(
+                content_type=f"image/{file_extension}",
+                cache_control="no-cache"
+            )
+
+            if settings.CONTENT_ADDRESSED_STORAGE:
+                digest = digest or await asyncio.to_thread(content_digest, image_data)
+                object_client = container_client.get_blob_client(self._object_name(digest, file_extension))
+                deduplicated = await self._acquire_object(object_client, image_data, content_settings)
+                # 참조 Blob (digest/크기만 ASCII 메타데이터로 저장)
+                # 올리지 못하면 방금 올린 참조 수를 되돌림 (그대로 두면 객체가 영영 삭제되지 않음)
+                try:
+                    await blob_client.upload_blob(
+                        data=b"",
+                        overwrite=True,
+                        metadata={DIGEST_METADATA_KEY: digest, LENGTH_METADATA_KEY: str(len(image_data))},
+                        content_settings=content_settings
+                    )
+                except BaseException:
+                    try:
+                        await asyncio.shield(self._release_object(object_client.blob_name))
+                    except Exception as e:
+                        logger.warning("Failed to release content object %s: %s", object_client.blob_name, e)
+                    raise
+                if deduplicated:
+                    metrics.inc("storage_dedup_hits")
+                    metrics.inc("storage_dedup_bytes_saved", len(image_data))
+                return {
+                    "image_id": file_name,
+                    "image_url": object_client.url,
+                    "deduplicated": deduplicated
+                }
 
             # 업로드 실행 (metadata 제거, ContentSettings 적용)
+            # BLOB_MAX_SINGLE_PUT_SIZE보다 큰 이미지(HD 등)는 블록으로 나눠 병렬 업로드
             await blob_client.upload_blob(
                 data=image_data,
+                length=len(image_data),
                 overwrite=True,
-                content_settings=ContentSettings(
-                    content_type=f"image/{file_extension}",
-                    cache_control="no-cache"
-                )
+                max_concurrency=settings.BLOB_UPLOAD_MAX_CONCURRENCY,
+                content_settings=content_settings
             )
             
             return {
                 "image_id": file_name,
-                "image_url": blob_client.url
+                "image_url": blob_client.url,
+                "deduplicated": False
             }
             
         except Exception as e:
-            logger.error(f"Failed to upload image: {str(e)}")
+            logger.error("Failed to upload image: %s", e)
             raise Exception(f"이미지 업로드 실패: {str(e)}")
 
-    async def upload_image_from_url(self, image_url: str, prompt: str) -> dict:
-        """
-        URL에서 이미지를 다운로드하여 업로드
-        """
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as response:
-                    if response.status != 200:
-                        raise Exception(f"이미지 다운로드 실패: {response.status}")
-                    image_data = await response.read()
-            
-            # 위에서 만든 upload_image 함수 재사용
-            return await self.upload_image(image_data, prompt)
-            
-        except Exception as e:
-            logger.error(f"Failed to upload image from URL: {str(e)}")
-            raise Exception(f"URL 업로드 실패: {str(e)}")
+    @staticmethod
+    def _object_name(digest: str, file_extension: str) -> str:
+        return f"{OBJECTS_PREFIX}/{digest}.{file_extension}"
 
-    async def list_images(self, limit: int = 20, offset: int = 0) -> dict:
+    async def _acquire_object(self, object_client, image_data: bytes, content_settings: ContentSettings) -> bool:
         """
-        이미지 목록 조회 (갤러리용)
+        내용 주소 객체의 참조 수를 1 올림 (없으면 refcount=1로 업로드), 기존 객체를 재사용했으면 True
+
+        업로드는 '없을 때만'(overwrite=False), 갱신은 읽은 ETag와 같을 때만 성공하므로
+        경합하면 다시 읽어 재시도한다. 삭제 직후라 갱신할 객체가 없으면 새로 올린다.
         """
-        try:
-            container_client = self.blob_service_client.get_container_client(self.container_name)
-            
-            # 컨테이너가 없으면 빈 목록 반환
+        for _ in range(REFCOUNT_MAX_ATTEMPTS):
+            try:
+                props = await object_client.get_blob_properties()
+            except ResourceNotFoundError:
+                try:
+                    await object_client.upload_blob(
+                        data=image_data,
+                        length=len(image_data),
+                        overwrite=False,
+                        max_concurrency=settings.BLOB_UPLOAD_MAX_CONCURRENCY,
+                        metadata={REFCOUNT_METADATA_KEY: "1"},
+                        content_settings=content_settings
+                    )
+                    return False
+                except ResourceExistsError:
+                    continue
+
+            refcount = int(props.metadata.get(REFCOUNT_METADATA_KEY, "0")) + 1
+            try:
+                await object_client.set_blob_metadata(
+                    {REFCOUNT_METADATA_KEY: str(refcount)},
+                    etag=props.etag,
+                    match_condition=MatchConditions.IfNotModified
+                )
+                return True
+            except (ResourceModifiedError, ResourceNotFoundError):
+                continue
+        raise Exception(f"객체 참조 수 갱신 경합: {object_client.blob_name}")
+
+    async def _release_object(self, object_name: str):
+        """내용 주소 객체의 참조 수를 1 내림, 0이 되면 그 상태(ETag)일 때만 객체 삭제"""
+        object_client = self.blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=object_name
+        )
+        for _ in range(REFCOUNT_MAX_ATTEMPTS):
+            try:
+                props = await object_client.get_blob_properties()
+                refcount = int(props.metadata.get(REFCOUNT_METADATA_KEY, "1")) - 1
+                if refcount <= 0:
+                    await object_client.delete_blob(etag=props.etag, match_condition=MatchConditions.IfNotModified)
+                else:
+                    await object_client.set_blob_metadata(
+                        {REFCOUNT_METADATA_KEY: str(refcount)},
+                        etag=props.etag,
+                        match_condition=MatchConditions.IfNotModified
+                    )
+                return
+            except ResourceNotFoundError:
+                return
+            except ResourceModifiedError:
+                continue
+        logger.warning("Gave up releasing content object %s after contention", object_name)
+
+    def _resolve(self, image_id: str, metadata: Optional[dict]) -> Optional[str]:
+        """참조 Blob이면 내용 주소 객체 이름, 일반 Blob이면 None"""
+        digest = (metadata or {}).get(DIGEST_METADATA_KEY)
+        if not digest:
+            return None
+        return self._object_name(digest, image_id.rsplit(".", 1)[-1])
+
+    async def list_partitions(self, prefix: str = "") -> List[str]:
+        """최상위 가상 디렉토리(YYYYMMDD/) 목록을 walk_blobs로 조회"""
+        container_client = self.blob_service_client.get_container_client(self.container_name)
+
+        # 컨테이너가 없으면 빈 목록 (있는 것을 한 번 확인하면 다시 묻지 않음)
+        if not self._container_ready:
             if not await container_client.exists():
-                return {"images": [], "total": 0}
+                return []
+            self._container_ready = True
+
+        partitions = []
+        async for item in container_client.walk_blobs(name_starts_with=prefix or None, delimiter="/"):
+            if item.name.endswith("/"):
+                partitions.append(item.name.rstrip("/"))
+        return partitions
+
+    async def scan_partition(self, partition: str) -> List[dict]:
+        """파티션 하나의 Blob 목록 (생성 시간 기준 내림차순)"""
+        container_client = self.blob_service_client.get_container_client(self.container_name)
+
+        blobs = []
+        # include=['metadata']를 제거하여 속도 향상 및 에러 방지
+        # (내용 주소 저장 시에는 참조 Blob의 실제 크기/객체를 알아야 하므로 ASCII 메타데이터만 있는 상태로 포함)
+        include = ["metadata"] if settings.CONTENT_ADDRESSED_STORAGE else None
+        async for blob in container_client.list_blobs(name_starts_with=f"{partition}/", include=include):
+            blobs.append(blob)
+
+        blobs.sort(key=lambda x: x.creation_time, reverse=True)
+
+        images = []
+        container_url = container_client.url
+        for blob in blobs:
+            object_name = self._resolve(blob.name, blob.metadata)
+            images.append({
+                "image_id": blob.name,
+                "url": blob_url(container_url, object_name or blob.name),
+                "created_at": blob.creation_time.isoformat() if blob.creation_time else None,
+                "size": int(blob.metadata[LENGTH_METADATA_KEY]) if object_name else blob.size,
+                "blob_name": blob.name,
+                "tier": blob.blob_tier,
+                # 스토리지 계정에서 마지막 액세스 시간 추적을 켠 경우에만 값이 있음
+                "last_accessed_at": blob.last_accessed_on.isoformat() if blob.last_accessed_on else None
+            })
+        return images
 
-            blobs = []
-            # 모든 블록 리스팅 (include=['metadata']를 제거하여 속도 향상 및 에러 방지)
-            async for blob in container_client.list_blobs():
-                blobs.append(blob)
-            
-            # 최신순 정렬 (생성 시간 기준 내림차순)
-            blobs.sort(key=lambda x: x.creation_time, reverse=True)
-            
-            total = len(blobs)
-            
-            # 페이지네이션 적용
-            start = offset
-            end = min(offset + limit, total)
-            paginated_blobs = blobs[start:end]
-            
-            images = []
-            for blob in paginated_blobs:
-                # URL 생성
-                blob_client = container_client.get_blob_client(blob.name)
-                
-                images.append({
-                    "image_id": blob.name,
-                    "url": blob_client.url,
-                    "created_at": blob.creation_time.isoformat() if blob.creation_time else None,
-                    "size": blob.size,
-                    "blob_name": blob.name
-                })
-                
-            return {
-                "images": images,
-                "total": total
-            }
-            
-        except Exception as e:
-            logger.error(f"Error listing images: {str(e)}")
-            # 에러 시 빈 목록 반환 (앱 죽음 방지)
-            return {"images": [], "total": 0}
     async def get_image_metadata(self, image_id: str) -> dict:
         """이미지 메타데이터 조회"""
         try:
@@ -153,38 +353,208 @@ class StorageService:
                 blob=image_id
             )
             
-            if not await blob_client.exists():
+            try:
+                props = await blob_client.get_blob_properties()
+            except ResourceNotFoundError:
                 return None
 
-            props = await blob_client.get_blob_properties()
+            object_name = self._resolve(image_id, props.metadata)
+            if object_name:
+                # 내용 주소 객체: 크기는 참조 메타데이터, ETag는 digest (바이트가 같으면 항상 같음)
+                return {
+                    "image_id": image_id,
+                    "url": blob_url(self.blob_service_client.get_container_client(self.container_name).url, object_name),
+                    "size": int(props.metadata[LENGTH_METADATA_KEY]),
+                    "created_at": props.creation_time.isoformat() if props.creation_time else None,
+                    "content_type": props.content_settings.content_type,
+                    "etag": f'"{props.metadata[DIGEST_METADATA_KEY]}"'
+                }
             
             return {
                 "image_id": image_id,
                 "url": blob_client.url,
                 "size": props.size,
                 "created_at": props.creation_time.isoformat() if props.creation_time else None,
-                "content_type": props.content_settings.content_type
+                "content_type": props.content_settings.content_type,
+                "etag": props.etag
             }
         except Exception as e:
-            logger.error(f"Error getting image metadata: {str(e)}")
+            logger.error("Error getting image metadata: %s", e)
             return None
         
     async def delete_image(self, image_id: str) -> bool:
-        """이미지 삭제"""
+        """이미지 삭제 (참조 Blob이면 내용 주소 객체의 참조 수도 내림)"""
         try:
             blob_client = self.blob_service_client.get_blob_client(
                 container=self.container_name,
                 blob=image_id
             )
             
-            if await blob_client.exists():
+            try:
+                props = await blob_client.get_blob_properties()
                 await blob_client.delete_blob()
-                return True
-            return False
+            except ResourceNotFoundError:
+                return False
+
+            object_name = self._resolve(image_id, props.metadata)
+            if object_name:
+                await self._release_object(object_name)
+            return True
         except Exception as e:
-            logger.error(f"Error deleting image {image_id}: {str(e)}")
+            logger.error("Error deleting image %s: %s", image_id, e)
             return False
 
+    async def delete_images(self, image_ids: List[str]) -> List[str]:
+        """Blob batch API로 최대 256개씩 한 번에 삭제 (내용 주소 저장 시에는 참조 수를 맞추기 위해 하나씩 삭제)"""
+        if settings.CONTENT_ADDRESSED_STORAGE:
+            return await super().delete_images(image_ids)
+        container_client = self.blob_service_client.get_container_client(self.container_name)
+        deleted = []
+        for start in range(0, len(image_ids), BLOB_BATCH_LIMIT):
+            chunk = image_ids[start:start + BLOB_BATCH_LIMIT]
+            responses = await container_client.delete_blobs(*chunk, raise_on_any_failure=False)
+            deleted.extend(await self._succeeded(chunk, responses))
+        return deleted
+
+    async def set_tier(self, image_ids: List[str], tier: str) -> List[str]:
+        """Blob batch API로 최대 256개씩 액세스 계층 변경"""
+        container_client = self.blob_service_client.get_container_client(self.container_name)
+        changed = []
+        for start in range(0, len(image_ids), BLOB_BATCH_LIMIT):
+            chunk = image_ids[start:start + BLOB_BATCH_LIMIT]
+            responses = await container_client.set_standard_blob_tier_blobs(tier, *chunk, raise_on_any_failure=False)
+            changed.extend(await self._succeeded(chunk, responses))
+        return changed
+
+    @staticmethod
+    async def _succeeded(names: List[str], responses) -> List[str]:
+        """batch 하위 응답 중 성공(2xx)한 요청의 Blob 이름 (응답은 요청 순서와 같음)"""
+        succeeded = []
+        index = 0
+        async for response in responses:
+            if 200 <= response.status_code < 300:
+                succeeded.append(names[index])
+            elif response.status_code != 404:
+                logger.warning("Batch operation failed for %s: %s", names[index], response.status_code)
+            index += 1
+        return succeeded
+
+    @asynccontextmanager
+    async def maintenance_lock(self):
+        """잠금 Blob의 lease로 레플리카 전체에서 하나만 실행 (실행 중 주기적으로 갱신)"""
+        container_client = await self._ensure_container_exists()
+        blob_client = container_client.get_blob_client(MAINTENANCE_LOCK_BLOB)
+        try:
+            await blob_client.upload_blob(b"", overwrite=False)
+        except ResourceExistsError:
+            pass
+
+        try:
+            lease = await blob_client.acquire_lease(lease_duration=MAINTENANCE_LEASE_SECONDS)
+        except HttpResponseError as e:
+            if e.status_code == 409:
+                yield False
+                return
+            raise
+
+        # 갱신에 실패해 lease가 만료되기 전에 본문(정리 작업)을 취소함 (다른 레플리카와 동시에 지우지 않도록)
+        owner = asyncio.current_task()
+        lost: List[str] = []
+
+        async def renew():
+            interval = MAINTENANCE_LEASE_SECONDS / 3
+            renewed_at = time.monotonic()
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await lease.renew()
+                    renewed_at = time.monotonic()
+                    continue
+                except Exception as e:
+                    taken = isinstance(e, HttpResponseError) and e.status_code == 409
+                    if not taken and time.monotonic() - renewed_at + interval < MAINTENANCE_LEASE_SECONDS:
+                        logger.warning("Failed to renew maintenance lease, retrying: %s", e)
+                        continue
+                    logger.error("Maintenance lease lost, stopping run: %s", e)
+                    metrics.inc("maintenance_lease_lost")
+                    lost.append(str(e))
+                    owner.cancel()
+                    return
+
+        renew_task = asyncio.create_task(renew())
+        try:
+            yield True
+        except asyncio.CancelledError:
+            if not lost:
+                raise
+            owner.uncancel()
+            raise MaintenanceLockLost(lost[0])
+        finally:
+            renew_task.cancel()
+            await asyncio.gather(renew_task, return_exceptions=True)
+            if not lost:
+                try:
+                    await lease.release()
+                except Exception as e:
+                    logger.warning("Failed to release maintenance lease: %s", e)
+
+    async def open_image_stream(
+        self,
+        image_id: str,
+        offset: int = 0,
+        length: Optional[int] = None
+    ) -> Optional[ImageStream]:
+        """Blob을 청크 단위로 스트리밍 (전체를 메모리에 올리지 않음)"""
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=image_id
+        )
+
+        try:
+            props = await blob_client.get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+
+        size, etag = props.size, props.etag
+        object_name = self._resolve(image_id, props.metadata)
+        if object_name:
+            # 참조 Blob -> 내용 주소 객체에서 스트리밍
+            blob_client = self.blob_service_client.get_blob_client(
+                container=self.container_name,
+                blob=object_name
+            )
+            size, etag = int(props.metadata[LENGTH_METADATA_KEY]), f'"{props.metadata[DIGEST_METADATA_KEY]}"'
+
+        try:
+            # SDK는 length가 있으면 offset=None을 허용하지 않음 (bytes=0-N 요청)
+            downloader = await blob_client.download_blob(
+                offset=offset if offset or length is not None else None,
+                length=length
+            )
+        except ResourceNotFoundError:
+            return None
+
+        return ImageStream(
+            image_id=image_id,
+            size=size,
+            content_type=props.content_settings.content_type or "application/octet-stream",
+            etag=etag,
+            chunks=downloader.chunks()
+        )
+
     async def close(self):
         """리소스 정리"""
-        await self.blob_service_client.close()
\ No newline at end of file
+        await self.blob_service_client.close()
+
+
+def create_storage_service() -> BaseStorageService:
+    """STORAGE_BACKEND 설정에 맞는 스토리지 서비스 생성"""
+    backend = settings.STORAGE_BACKEND.lower()
+
+    if backend == "azure":
+        return StorageService()
+    if backend == "local":
+        from services.local_storage_service import LocalStorageService
+        return LocalStorageService()
+
+    raise ValueError(f"지원하지 않는 STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+pytest 공통 설정
+
+config가 import되기 전에 로컬 스토리지와 임시 경로를 쓰도록 환경 변수를 잡고,
+backend 디렉토리를 import 경로에 넣는다 (실행: backend에서 `python -m pytest -q`).
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+_ROOT = tempfile.mkdtemp(prefix="artelligence-tests-")
+
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_PATH"] = os.path.join(_ROOT, "images")
+os.environ["IMAGE_CACHE_DIR"] = os.path.join(_ROOT, "cache")
+os.environ["PROMPT_INDEX_PATH"] = os.path.join(_ROOT, "prompt_index.jsonl")
+os.environ["AZURE_OPENAI_API_KEY"] = "test"
+os.environ["AZURE_OPENAI_ENDPOINT"] = "http://127.0.0.1:9"
+os.environ["LOG_LEVEL"] = "WARNING"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings  # noqa: E402
+
+
+# 인메모리 Blob 클라이언트도 연결 문자열은 파싱되어야 하므로 형식만 맞춘 값
+FAKE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=testaccount;AccountKey=dGVzdA==;"
+    "BlobEndpoint=http://127.0.0.1:10000/testaccount;"
+)
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    from services.local_storage_service import LocalStorageService
+    return LocalStorageService(root=str(tmp_path / "images"))
+
+
+@pytest.fixture
+def azure_storage(monkeypatch):
+    """benchmarks의 인메모리 Blob 클라이언트를 쓰는 StorageService"""
+    from benchmarks.fake_blob import InMemoryBlobServiceClient
+    from services.storage_service import StorageService
+    monkeypatch.setattr(settings, "AZURE_STORAGE_CONNECTION_STRING", FAKE_CONNECTION_STRING)
+    storage = StorageService()
+    storage.blob_service_client = InMemoryBlobServiceClient()
+    return storage
+
+
+async def read_stream(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream.chunks])
+
+
+class FakeWebSocket:
+    """ConnectionManager가 쓰는 메서드만 흉내 낸 WebSocket (send_delay로 느린 클라이언트 재현)"""
+
+    def __init__(self, send_delay: float = 0.0):
+        self.send_delay = send_delay
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.close_code = code
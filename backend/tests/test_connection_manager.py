@@ -0,0 +1,94 @@
+import asyncio
+
+from conftest import FakeWebSocket
+from services.connection_manager import (
+    CLOSE_IDLE,
+    CLOSE_REPLACED,
+    CLOSE_SLOW_CONSUMER,
+    CLOSE_TRY_AGAIN_LATER,
+    ConnectionManager,
+)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+def test_messages_are_sent_in_order():
+    async def scenario():
+        manager = ConnectionManager(queue_size=8)
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "c")
+        for i in range(5):
+            await manager.send_message("c", {"i": i})
+        await _settle()
+        return websocket.sent
+
+    assert [message["i"] for message in asyncio.run(scenario())] == [0, 1, 2, 3, 4]
+
+
+def test_full_queue_closes_only_the_slow_client():
+    async def scenario():
+        manager = ConnectionManager(queue_size=2, send_timeout=5)
+        slow, fast = FakeWebSocket(send_delay=1), FakeWebSocket()
+        await manager.connect(slow, "slow")
+        await manager.connect(fast, "fast")
+        for i in range(5):
+            await manager.send_message("slow", {"i": i})
+            await manager.send_message("fast", {"i": i})
+            await asyncio.sleep(0.01)
+        await _settle()
+        return manager, slow, fast
+
+    manager, slow, fast = asyncio.run(scenario())
+    assert slow.close_code == CLOSE_SLOW_CONSUMER
+    assert fast.close_code is None and len(fast.sent) == 5
+    assert list(manager.active_connections) == ["fast"]
+
+
+def test_reconnect_replaces_previous_socket():
+    async def scenario():
+        manager = ConnectionManager()
+        first, second = FakeWebSocket(), FakeWebSocket()
+        old = await manager.connect(first, "c")
+        new = await manager.connect(second, "c")
+        await _settle()
+        # 이전 연결의 핸들러가 늦게 정리해도 새 연결은 남아야 함
+        await manager.disconnect("c", old)
+        return manager, first, new
+
+    manager, first, new = asyncio.run(scenario())
+    assert first.close_code == CLOSE_REPLACED
+    assert manager.active_connections["c"] is new
+
+
+def test_connection_limit_rejects_new_clients():
+    async def scenario():
+        manager = ConnectionManager(max_connections=1)
+        await manager.connect(FakeWebSocket(), "a")
+        rejected = FakeWebSocket()
+        return await manager.connect(rejected, "b"), rejected
+
+    connection, rejected = asyncio.run(scenario())
+    assert connection is None
+    assert rejected.close_code == CLOSE_TRY_AGAIN_LATER
+
+
+def test_heartbeat_pings_and_reaps_idle_clients():
+    async def scenario():
+        manager = ConnectionManager(heartbeat_interval=0.02, idle_timeout=0.1)
+        active, idle = FakeWebSocket(), FakeWebSocket()
+        active_connection = await manager.connect(active, "active")
+        await manager.connect(idle, "idle")
+        await manager.start()
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            manager.touch(active_connection)
+        await manager.stop()
+        return active, idle
+
+    active, idle = asyncio.run(scenario())
+    assert idle.close_code == CLOSE_IDLE
+    assert any(message["status"] == "ping" for message in active.sent)
+    assert active.close_code == 1001
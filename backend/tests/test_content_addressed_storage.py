@@ -0,0 +1,104 @@
+import asyncio
+import os
+
+import pytest
+
+from benchmarks.fake_blob import InMemoryBlobClient
+from conftest import read_stream
+from config import settings
+from services.storage_base import OBJECTS_PREFIX, content_digest
+
+IMAGE = b"\x89PNG same bytes"
+
+
+@pytest.fixture(autouse=True)
+def content_addressed(monkeypatch):
+    monkeypatch.setattr(settings, "CONTENT_ADDRESSED_STORAGE", True)
+
+
+def _blobs(storage) -> dict:
+    return storage.blob_service_client.get_container_client(settings.AZURE_STORAGE_CONTAINER_NAME)._blobs
+
+
+def _object_name() -> str:
+    return f"{OBJECTS_PREFIX}/{content_digest(IMAGE)}.png"
+
+
+def _fail_reference_uploads(monkeypatch):
+    """objects/ 아래(내용 주소 객체)는 그대로 올리고 참조 Blob 업로드만 실패시킴"""
+    original_upload = InMemoryBlobClient.upload_blob
+
+    async def failing_reference_upload(self, data, **kwargs):
+        if not self.blob_name.startswith(f"{OBJECTS_PREFIX}/"):
+            raise ConnectionError("reference upload failed")
+        return await original_upload(self, data, **kwargs)
+
+    monkeypatch.setattr(InMemoryBlobClient, "upload_blob", failing_reference_upload)
+
+
+def test_local_same_bytes_share_one_hardlinked_object(local_storage):
+    async def scenario():
+        first = await local_storage.upload_image(IMAGE, "prompt")
+        second = await local_storage.upload_image(IMAGE, "prompt")
+        object_path = local_storage._object_path(content_digest(IMAGE), "png")
+        links_before = os.stat(object_path).st_nlink
+        body = await read_stream(await local_storage.open_image_stream(second["image_id"]))
+
+        await local_storage.delete_image(first["image_id"])
+        kept = os.path.exists(object_path)
+        await local_storage.delete_image(second["image_id"])
+        removed = not os.path.exists(object_path)
+        return first, second, links_before, body, kept, removed
+
+    first, second, links_before, body, kept, removed = asyncio.run(scenario())
+    assert first["deduplicated"] is False
+    assert second["deduplicated"] is True
+    assert links_before == 3  # 객체 파일 + 참조 2개
+    assert body == IMAGE
+    assert kept is True
+    assert removed is True
+
+
+def test_azure_refcount_follows_references(azure_storage):
+    async def scenario():
+        first = await azure_storage.upload_image(IMAGE, "prompt")
+        second = await azure_storage.upload_image(IMAGE, "prompt")
+        blobs = _blobs(azure_storage)
+        refcounts = [blobs[_object_name()][0].metadata["refcount"]]
+        reference_size = blobs[second["image_id"]][0].size
+        body = await read_stream(await azure_storage.open_image_stream(second["image_id"]))
+
+        await azure_storage.delete_image(first["image_id"])
+        refcounts.append(blobs[_object_name()][0].metadata["refcount"])
+        await azure_storage.delete_image(second["image_id"])
+        return first, second, refcounts, reference_size, body, _object_name() in blobs
+
+    first, second, refcounts, reference_size, body, object_left = asyncio.run(scenario())
+    assert (first["deduplicated"], second["deduplicated"]) == (False, True)
+    assert first["image_url"] == second["image_url"]
+    assert refcounts == ["2", "1"]
+    assert reference_size == 0
+    assert body == IMAGE
+    assert object_left is False
+
+
+def test_azure_failed_reference_upload_releases_refcount(azure_storage, monkeypatch):
+    async def scenario():
+        await azure_storage.upload_image(IMAGE, "prompt")
+        _fail_reference_uploads(monkeypatch)
+        with pytest.raises(Exception, match="이미지 업로드 실패"):
+            await azure_storage.upload_image(IMAGE, "prompt")
+        return _blobs(azure_storage)[_object_name()][0].metadata["refcount"]
+
+    assert asyncio.run(scenario()) == "1"
+
+
+def test_azure_failed_first_upload_leaves_no_object(azure_storage, monkeypatch):
+    _fail_reference_uploads(monkeypatch)
+
+    async def scenario():
+        with pytest.raises(Exception, match="이미지 업로드 실패"):
+            await azure_storage.upload_image(IMAGE, "prompt")
+        return dict(_blobs(azure_storage))
+
+    assert asyncio.run(scenario()) == {}
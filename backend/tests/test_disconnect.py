@@ -0,0 +1,113 @@
+import asyncio
+
+import main
+from services.metrics import metrics
+
+
+def _counter(name):
+    return metrics.value(name)
+
+
+async def _job(seconds):
+    await asyncio.sleep(seconds)
+    return "done"
+
+
+def test_generating_job_is_cancelled_on_disconnect(monkeypatch):
+    monkeypatch.setattr(main.settings, "CLIENT_DISCONNECT_POLL_INTERVAL", 0.01)
+    wasted = _counter("generations_wasted")
+
+    async def scenario():
+        task = asyncio.create_task(_job(10))
+        stage = {"name": "generating"}
+
+        async def disconnected():
+            return True
+
+        abandoned = await main._wait_unless_disconnected(task, disconnected, stage)
+        await asyncio.gather(task, return_exceptions=True)
+        return abandoned, task
+
+    abandoned, task = asyncio.run(scenario())
+    assert abandoned is True
+    assert task.cancelled()
+    assert _counter("generations_wasted") == wasted + 1
+
+
+def test_uploading_job_runs_to_completion(monkeypatch):
+    monkeypatch.setattr(main.settings, "CLIENT_DISCONNECT_POLL_INTERVAL", 0.01)
+
+    async def scenario():
+        task = asyncio.create_task(_job(0.05))
+
+        async def disconnected():
+            return True
+
+        abandoned = await main._wait_unless_disconnected(task, disconnected, {"name": "uploading"})
+        return abandoned, await task
+
+    assert asyncio.run(scenario()) == (True, "done")
+
+
+def test_connected_client_gets_result(monkeypatch):
+    monkeypatch.setattr(main.settings, "CLIENT_DISCONNECT_POLL_INTERVAL", 0.01)
+
+    async def scenario():
+        task = asyncio.create_task(_job(0.03))
+
+        async def disconnected():
+            return False
+
+        return await main._wait_unless_disconnected(task, disconnected, {"name": "generating"}), task.result()
+
+    assert asyncio.run(scenario()) == (False, "done")
+
+
+def test_idempotent_job_keeps_running(monkeypatch):
+    monkeypatch.setattr(main.settings, "CLIENT_DISCONNECT_POLL_INTERVAL", 0.01)
+
+    async def scenario():
+        task = asyncio.create_task(_job(0.05))
+
+        async def disconnected():
+            return True
+
+        await main._wait_unless_disconnected(task, disconnected, {"name": "queued"}, keep_running=True)
+        return await task
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def _abandon_after_grace(client_id):
+    """끊긴 연결의 생성 작업 하나를 유예 시간 뒤 정리하고 작업 태스크 반환"""
+    async def scenario():
+        task = asyncio.create_task(_job(0.2))
+        main._abandon_after_grace(client_id, {task: {"name": "generating"}})
+        await asyncio.gather(*main._grace_tasks)
+        await asyncio.gather(task, return_exceptions=True)
+        return task
+
+    return asyncio.run(scenario())
+
+
+def test_grace_period_cancels_job_when_client_does_not_return(monkeypatch):
+    monkeypatch.setattr(main.settings, "WS_RESUME_GRACE_PERIOD", 0.01)
+    assert _abandon_after_grace("gone").cancelled()
+
+
+def test_grace_period_keeps_job_when_client_reconnected_to_another_worker(monkeypatch):
+    monkeypatch.setattr(main.settings, "WS_RESUME_GRACE_PERIOD", 0.01)
+    # 다른 워커의 연결이 공유 저장소에 남긴 표시
+    asyncio.run(main.result_buffer.set_presence("elsewhere", "other-worker"))
+    try:
+        task = _abandon_after_grace("elsewhere")
+    finally:
+        asyncio.run(main.result_buffer.clear_presence("elsewhere", "other-worker"))
+    assert task.result() == "done"
+
+
+def test_memory_backend_with_several_workers_does_not_cancel(monkeypatch):
+    monkeypatch.setattr(main.settings, "WS_RESUME_GRACE_PERIOD", 0.01)
+    monkeypatch.setattr(main.settings, "WEB_CONCURRENCY", 4)
+    # 다른 워커에 재연결했는지 알 수 없으므로 끝까지 진행
+    assert _abandon_after_grace("unknown").result() == "done"
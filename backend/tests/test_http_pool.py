@@ -0,0 +1,51 @@
+import asyncio
+
+from conftest import FAKE_CONNECTION_STRING
+from config import settings
+from services.http_pool import close_http_session, get_http_session
+from services.storage_service import SharedSessionTransport, create_blob_service_client
+
+
+def test_session_is_shared_and_recreated_after_close():
+    async def scenario():
+        first = get_http_session()
+        same = get_http_session()
+        connector_limit = first.connector.limit
+        await close_http_session()
+        second = get_http_session()
+        await close_http_session()
+        return first, same, second, connector_limit
+
+    first, same, second, connector_limit = asyncio.run(scenario())
+    assert first is same
+    assert first.closed
+    assert second is not first
+    assert connector_limit == settings.HTTP_POOL_MAX_CONNECTIONS
+
+
+def test_blob_client_transport_carries_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_CONNECT_TIMEOUT", 7.0)
+    monkeypatch.setattr(settings, "STORAGE_UPLOAD_TIMEOUT", 45)
+    client = create_blob_service_client(FAKE_CONNECTION_STRING)
+    transport = client._pipeline._transport
+    assert isinstance(transport, SharedSessionTransport)
+    assert transport.connection_config.timeout == 7.0
+    assert transport.connection_config.read_timeout == 45
+
+
+def test_transport_uses_shared_session_and_leaves_it_open():
+    async def scenario():
+        transport = SharedSessionTransport()
+        await transport.open()
+        session = transport.session
+        await transport.close()
+        shared = get_http_session()
+        closed_by_transport = session.closed
+        await close_http_session()
+        return session, shared, closed_by_transport, transport.session
+
+    session, shared, closed_by_transport, after_close = asyncio.run(scenario())
+    assert session is shared
+    assert closed_by_transport is False
+    assert after_close is None
+
@@ -0,0 +1,175 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import services.idempotency as idempotency_module
+from config import settings
+from services.idempotency import (
+    COMPLETED,
+    IN_PROGRESS,
+    IdempotencyStore,
+    InMemoryIdempotencyBackend,
+    RedisIdempotencyBackend,
+    request_fingerprint,
+)
+
+RESPONSE = {"success": True, "image_id": "20250101/abc.png"}
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_ENABLED", True)
+    monkeypatch.setattr(idempotency_module, "WAIT_POLL_INTERVAL", 0.01)
+
+
+def _store() -> IdempotencyStore:
+    return IdempotencyStore(backend=InMemoryIdempotencyBackend(max_entries=10))
+
+
+class _BrokenBackend:
+    async def claim(self, key, record, ttl):
+        raise ConnectionError("backend down")
+
+    async def get(self, key):
+        raise ConnectionError("backend down")
+
+    async def put(self, key, record, ttl):
+        raise ConnectionError("backend down")
+
+    async def delete(self, key):
+        raise ConnectionError("backend down")
+
+
+def test_fingerprint_ignores_key_order():
+    assert request_fingerprint({"a": 1, "b": "그림"}) == request_fingerprint({"b": "그림", "a": 1})
+    assert request_fingerprint({"a": 1}) != request_fingerprint({"a": 2})
+
+
+def test_completed_response_is_replayed_for_same_key():
+    store = _store()
+
+    async def scenario():
+        claimed = await store.begin("client", "key-1", "fp")
+        in_progress = await store.begin("client", "key-1", "fp")
+        await store.complete("client", "key-1", "fp", RESPONSE)
+        replayed = await store.begin("client", "key-1", "fp")
+        return claimed, in_progress, replayed
+
+    claimed, in_progress, replayed = asyncio.run(scenario())
+    assert claimed is None
+    assert in_progress["state"] == IN_PROGRESS
+    assert replayed == {"state": COMPLETED, "fingerprint": "fp", "response": RESPONSE}
+    assert store.stats["claimed"] == 1 and store.stats["replayed"] == 1
+
+
+def test_keys_are_scoped_and_fingerprint_checked():
+    store = _store()
+
+    async def scenario():
+        await store.begin("client-a", "key-1", "fp")
+        other_scope = await store.begin("client-b", "key-1", "fp")
+        mismatch = await store.begin("client-a", "key-1", "other-fp")
+        return other_scope, mismatch
+
+    other_scope, mismatch = asyncio.run(scenario())
+    assert other_scope is None
+    assert mismatch["fingerprint"] == "fp"
+    assert store.stats["mismatches"] == 1
+
+
+def test_release_lets_retry_run_again():
+    store = _store()
+
+    async def scenario():
+        await store.begin("client", "key-1", "fp")
+        await store.release("client", "key-1")
+        return await store.begin("client", "key-1", "fp")
+
+    assert asyncio.run(scenario()) is None
+    assert store.stats["claimed"] == 2
+
+
+def test_wait_returns_completion_failure_or_timeout():
+    store = _store()
+
+    async def finish_later(delay, release=False):
+        await asyncio.sleep(delay)
+        if release:
+            await store.release("client", "failed")
+        else:
+            await store.complete("client", "done", "fp", RESPONSE)
+
+    async def scenario():
+        for key in ("done", "failed", "slow"):
+            await store.begin("client", key, "fp")
+        asyncio.create_task(finish_later(0.05))
+        asyncio.create_task(finish_later(0.05, release=True))
+        done = await store.wait("client", "done", timeout=1.0)
+        failed = await store.wait("client", "failed", timeout=1.0)
+        slow = await store.wait("client", "slow", timeout=0.05)
+        return done, failed, slow
+
+    done, failed, slow = asyncio.run(scenario())
+    assert done["response"] == RESPONSE
+    assert failed is None
+    assert slow["state"] == IN_PROGRESS
+    assert store.stats["conflicts"] == 1
+
+
+def test_inflight_claim_expires(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(idempotency_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    store = _store()
+
+    async def scenario():
+        await store.begin("client", "key-1", "fp")
+        now.value += settings.IDEMPOTENCY_INFLIGHT_TTL + 1
+        return await store.begin("client", "key-1", "fp")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_backend_errors_fail_open():
+    store = IdempotencyStore(backend=_BrokenBackend())
+
+    async def scenario():
+        claimed = await store.begin("client", "key-1", "fp")
+        await store.complete("client", "key-1", "fp", RESPONSE)
+        await store.release("client", "key-1")
+        waited = await store.wait("client", "key-1", timeout=0.1)
+        return claimed, waited
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_disabled_store_never_claims(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_ENABLED", False)
+    store = _store()
+
+    async def scenario():
+        await store.begin("client", "key-1", "fp")
+        return await store.begin("client", "key-1", "fp")
+
+    assert asyncio.run(scenario()) is None
+    assert len(store.backend) == 0
+
+
+def test_redis_backend_claims_once():
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisIdempotencyBackend.__new__(RedisIdempotencyBackend)
+    backend.prefix = "test:"
+    backend._client = fakeredis.aioredis.FakeRedis()
+    store = IdempotencyStore(backend=backend)
+
+    async def scenario():
+        claimed = await store.begin("client", "key-1", "fp")
+        existing = await store.begin("client", "key-1", "fp")
+        await store.complete("client", "key-1", "fp", RESPONSE)
+        replayed = await store.begin("client", "key-1", "fp")
+        return claimed, existing, replayed
+
+    claimed, existing, replayed = asyncio.run(scenario())
+    assert claimed is None
+    assert existing["state"] == IN_PROGRESS
+    assert replayed["response"] == RESPONSE
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import settings
+from services.image_cache import ImageCache
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-3", (0, 4)),
+    ("bytes=4-", (4, 10)),
+    ("bytes=-3", (7, 10)),
+    ("bytes=-30", (0, 10)),
+    ("bytes=5-100", (5, 10)),
+    ("bytes=0-1,4-5", None),  # 다중 범위는 전체 응답
+    ("items=0-3", None),
+    ("bytes=a-3", None),
+])
+def test_parse_range(header, expected):
+    assert main._parse_range(header, 10) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=10-", "bytes=5-4", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        main._parse_range(header, 10)
+
+
+def test_etag_matches():
+    assert main._etag_matches('"a", W/"b"', '"b"')
+    assert main._etag_matches("*", '"a"')
+    assert not main._etag_matches('"a"', '"b"')
+    assert not main._etag_matches(None, '"a"')
+
+
+async def _chunks(data: bytes, size: int = 3):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _drain(iterator):
+    return b"".join([chunk async for chunk in iterator])
+
+
+def test_tee_caches_complete_stream(tmp_path):
+    cache = ImageCache(root=str(tmp_path), max_bytes=1024, max_entry_bytes=1024)
+
+    async def scenario():
+        served = await _drain(cache.tee("a.png", '"e"', 10, "image/png", _chunks(b"0123456789")))
+        entry = await cache.get("a.png")
+        cached = await _drain(await cache.open(entry, 2, 5))
+        return served, entry, cached
+
+    served, entry, cached = asyncio.run(scenario())
+    assert served == b"0123456789"
+    assert entry.etag == '"e"' and entry.size == 10
+    assert cached == b"234"
+    assert cache.stats["hits"] == 1
+
+
+def test_tee_skips_incomplete_stream(tmp_path):
+    cache = ImageCache(root=str(tmp_path), max_bytes=1024, max_entry_bytes=1024)
+    asyncio.run(_drain(cache.tee("a.png", None, 20, "image/png", _chunks(b"0123456789"))))
+    assert asyncio.run(cache.get("a.png")) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_entries_are_shared_between_workers(tmp_path):
+    first = ImageCache(root=str(tmp_path), max_bytes=1024, max_entry_bytes=1024)
+    second = ImageCache(root=str(tmp_path), max_bytes=1024, max_entry_bytes=1024)
+    asyncio.run(_drain(first.tee("a.png", None, 10, "image/png", _chunks(b"0123456789"))))
+    assert asyncio.run(second.get("a.png")) is not None
+
+
+def test_invalidate_removes_entries_filled_by_other_worker(tmp_path):
+    first = ImageCache(root=str(tmp_path), max_bytes=1024, max_entry_bytes=1024)
+    second = ImageCache(root=str(tmp_path), max_bytes=1024, max_entry_bytes=1024)
+
+    async def scenario():
+        await _drain(first.tee("a.png", None, 10, "image/png", _chunks(b"0123456789")))
+        await second.invalidate("a.png")
+        return await first.get("a.png")
+
+    assert asyncio.run(scenario()) is None
+    assert list(tmp_path.iterdir()) == []
+    assert first.snapshot()["bytes"] == 0
+
+
+def test_shared_directory_stays_under_cap(tmp_path):
+    workers = [ImageCache(root=str(tmp_path), max_bytes=25, max_entry_bytes=25) for _ in range(2)]
+
+    async def scenario():
+        for index in range(6):
+            cache = workers[index % 2]
+            await _drain(cache.tee(f"{index}.png", None, 10, "image/png", _chunks(b"0123456789")))
+
+    asyncio.run(scenario())
+    on_disk = sum(path.stat().st_size for path in tmp_path.glob("*.bin"))
+    assert on_disk <= 25
+    assert asyncio.run(workers[1].get("5.png")) is not None
+    assert asyncio.run(workers[0].get("0.png")) is None
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "image_cache", ImageCache(root=str(tmp_path / "cache")))
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def stored_image():
+    return asyncio.run(main.storage_service.upload_image(b"0123456789", "prompt"))["image_id"]
+
+
+def test_download_range_request(client, stored_image):
+    response = client.get(f"/api/v1/images/{stored_image}/download", headers={"Range": "bytes=0-3"})
+    assert response.status_code == 206
+    assert response.content == b"0123"
+    assert response.headers["content-range"] == "bytes 0-3/10"
+
+    etag = response.headers["etag"]
+    assert client.get(f"/api/v1/images/{stored_image}/download", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_download_works_without_proxy(client, stored_image, monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_IMAGE_PROXY", False)
+    assert client.get(f"/api/v1/images/{stored_image}/content").status_code == 404
+    response = client.get(f"/api/v1/images/{stored_image}/download")
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
@@ -0,0 +1,127 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from config import settings
+
+PARTITIONS = ("20250101", "20250102", "20250103")
+PER_PARTITION = 3
+
+
+def _created_at(partition: str, index: int) -> datetime:
+    # 파티션 안에서는 index가 작을수록 최신
+    return datetime.strptime(partition, "%Y%m%d").replace(tzinfo=timezone.utc) + timedelta(hours=12 - index)
+
+
+async def _seed_local(storage):
+    for partition in PARTITIONS:
+        for index in range(PER_PARTITION):
+            path = storage._path_for(f"{partition}/{index}{partition}.png")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"x")
+            created = _created_at(partition, index).timestamp()
+            os.utime(path, (created, created))
+
+
+async def _seed_azure(storage):
+    container = storage.blob_service_client.get_container_client(settings.AZURE_STORAGE_CONTAINER_NAME)
+    await container.create_container()
+    for partition in PARTITIONS:
+        for index in range(PER_PARTITION):
+            blob = container.get_blob_client(f"{partition}/{index}{partition}.png")
+            await blob.upload_blob(b"x")
+            (await blob.get_blob_properties()).creation_time = _created_at(partition, index)
+
+
+def _expected() -> list:
+    """최신 파티션부터, 파티션 안에서는 최신순"""
+    return [
+        f"{partition}/{index}{partition}.png"
+        for partition in reversed(PARTITIONS)
+        for index in range(PER_PARTITION)
+    ]
+
+
+@pytest.fixture(params=["local", "azure"])
+def storage(request):
+    backend = request.getfixturevalue(f"{request.param}_storage")
+    seed = _seed_local if request.param == "local" else _seed_azure
+    asyncio.run(seed(backend))
+    return backend
+
+
+@pytest.fixture
+def scanned(storage, monkeypatch):
+    """scan_partition이 호출된 파티션 목록"""
+    calls = []
+    original = storage.scan_partition
+
+    async def spy(partition):
+        calls.append(partition)
+        return await original(partition)
+
+    monkeypatch.setattr(storage, "scan_partition", spy)
+    return calls
+
+
+def _ids(result) -> list:
+    return [image["image_id"] for image in result["images"]]
+
+
+def test_page_crossing_partitions_stops_at_offset_plus_limit(storage, scanned, monkeypatch):
+    monkeypatch.setattr(settings, "LIST_PARTITION_CONCURRENCY", 1)
+    result = asyncio.run(storage.list_images(limit=3, offset=2))
+    assert _ids(result) == _expected()[2:5]
+    assert result["has_more"] is True
+    # offset+limit(5)개는 파티션 두 개로 채워지므로 가장 오래된 파티션은 훑지 않음
+    assert scanned == ["20250103", "20250102"]
+    assert result["total"] == 6
+
+
+def test_last_page_has_no_more(storage, scanned, monkeypatch):
+    monkeypatch.setattr(settings, "LIST_PARTITION_CONCURRENCY", 1)
+    partial = asyncio.run(storage.list_images(limit=4, offset=6))
+    exact = asyncio.run(storage.list_images(limit=4, offset=5))
+    assert _ids(partial) == _expected()[6:]
+    assert partial["has_more"] is False
+    assert _ids(exact) == _expected()[5:]
+    assert exact["has_more"] is False
+
+
+def test_page_ending_on_partition_boundary_reports_more(storage, scanned, monkeypatch):
+    monkeypatch.setattr(settings, "LIST_PARTITION_CONCURRENCY", 1)
+    result = asyncio.run(storage.list_images(limit=3, offset=3))
+    assert _ids(result) == _expected()[3:6]
+    assert result["has_more"] is True
+    assert scanned == ["20250103", "20250102"]
+
+
+def test_partitions_are_scanned_in_waves(storage, scanned, monkeypatch):
+    monkeypatch.setattr(settings, "LIST_PARTITION_CONCURRENCY", 2)
+    first = asyncio.run(storage.list_images(limit=4))
+    waves_for_first = list(scanned)
+    scanned.clear()
+    everything = asyncio.run(storage.list_images(limit=20))
+
+    assert _ids(first) == _expected()[:4]
+    assert waves_for_first == ["20250103", "20250102"]
+    assert _ids(everything) == _expected()
+    assert everything["has_more"] is False
+    assert scanned == ["20250103", "20250102", "20250101"]
+
+
+@pytest.mark.parametrize("date_from, date_to, partitions", [
+    ("20250102", "20250102", ["20250102"]),
+    ("20250102", None, ["20250103", "20250102"]),
+    (None, "20250102", ["20250102", "20250101"]),
+    ("20250104", None, []),
+])
+def test_date_filters_limit_partitions(storage, scanned, date_from, date_to, partitions):
+    result = asyncio.run(storage.list_images(limit=20, date_from=date_from, date_to=date_to))
+    assert sorted({image_id.split("/")[0] for image_id in _ids(result)}, reverse=True) == partitions
+    assert len(result["images"]) == PER_PARTITION * len(partitions)
+    assert result["has_more"] is False
+    assert sorted(scanned, reverse=True) == partitions
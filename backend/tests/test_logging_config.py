@@ -0,0 +1,53 @@
+import logging
+import queue
+
+from fastapi.testclient import TestClient
+
+import main
+from services.logging_config import NonBlockingQueueHandler, SamplingFilter, _trace_id_from
+
+
+def _record(level=logging.INFO, sampled=True, request_id=None):
+    record = logging.LogRecord("test", level, __file__, 1, "message", None, None)
+    if sampled:
+        record.sample = True
+    record.request_id = request_id
+    return record
+
+
+def test_sampling_keeps_warnings_and_unmarked_records():
+    drop_all = SamplingFilter(0)
+    assert drop_all.filter(_record(level=logging.WARNING))
+    assert drop_all.filter(_record(sampled=False))
+    assert not drop_all.filter(_record())
+
+
+def test_sampling_decision_is_stable_per_request():
+    sampler = SamplingFilter(0.5)
+    decisions = {
+        request_id: {sampler.filter(_record(request_id=request_id)) for _ in range(5)}
+        for request_id in (f"req-{i}" for i in range(50))
+    }
+    assert all(len(kept) == 1 for kept in decisions.values())
+    assert 5 < sum(kept == {True} for kept in decisions.values()) < 45
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.enqueue(_record())
+    handler.enqueue(_record())
+    assert handler.dropped == 1
+
+
+def test_trace_id_from_traceparent():
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert _trace_id_from(f"00-{trace_id}-00f067aa0ba902b7-01") == trace_id
+    assert _trace_id_from("garbage") is None
+
+
+def test_request_id_header_round_trip():
+    with TestClient(main.app) as client:
+        echoed = client.get("/health", headers={"X-Request-ID": "abc-123"})
+        generated = client.get("/health", headers={"X-Request-ID": "bad id with spaces"})
+    assert echoed.headers["x-request-id"] == "abc-123"
+    assert generated.headers["x-request-id"] != "bad id with spaces"
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from config import settings
+from services.loop_monitor import LoopMonitor, sample_stacks, to_collapsed
+
+
+def test_blocked_loop_is_counted_once_per_stall(monkeypatch):
+    monkeypatch.setattr(settings, "LOOP_MONITOR_ENABLED", True)
+    monitor = LoopMonitor(interval=0.01, stall_threshold=0.1)
+
+    async def scenario():
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.4)  # 루프를 일부러 막음
+        await asyncio.sleep(0.05)
+        snapshot = monitor.snapshot()
+        await monitor.stop()
+        return snapshot
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["enabled"] is True
+    assert snapshot["stalls"] == 1
+    assert snapshot["max_lag_seconds"] >= 0.3
+    assert monitor.snapshot()["enabled"] is False
+
+
+def test_monitor_disabled_does_not_start(monkeypatch):
+    monkeypatch.setattr(settings, "LOOP_MONITOR_ENABLED", False)
+    monitor = LoopMonitor(interval=0.01, stall_threshold=0.1)
+
+    async def scenario():
+        await monitor.start()
+        started = monitor.snapshot()["enabled"]
+        await monitor.stop()
+        return started
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_sample_stacks_collapses_target_thread():
+    stop = threading.Event()
+
+    def busy_worker():
+        while not stop.is_set():
+            time.sleep(0.001)
+
+    worker = threading.Thread(target=busy_worker, name="busy")
+    worker.start()
+    try:
+        profile = sample_stacks(0.05, 0.005, thread_id=worker.ident)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profile["samples"] > 0
+    assert profile["stacks"]
+    assert all(stack.startswith("busy;") for stack in profile["stacks"])
+    assert any("busy_worker" in stack for stack in profile["stacks"])
+
+    collapsed = to_collapsed(profile)
+    first_stack, count = collapsed.splitlines()[0].rsplit(" ", 1)
+    assert first_stack in profile["stacks"]
+    assert int(count) == profile["stacks"].most_common(1)[0][1]
+
+
+def test_profile_endpoint_format_query(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin")
+    headers = {"X-Admin-Key": "admin"}
+    with TestClient(main.app) as client:
+        as_json = client.get("/api/v1/admin/profile", params={"seconds": 0.05, "format": "json"}, headers=headers)
+        collapsed = client.get("/api/v1/admin/profile", params={"seconds": 0.05}, headers=headers)
+        invalid = client.get("/api/v1/admin/profile", params={"seconds": 0.05, "format": "svg"}, headers=headers)
+    assert as_json.status_code == 200 and "stacks" in as_json.json()
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert invalid.status_code == 422
@@ -0,0 +1,112 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import services.storage_service as storage_service_module
+from benchmarks import fake_blob
+from config import settings
+from services.maintenance import AccessTracker, MaintenanceService
+
+
+def _partition(days_ago: int) -> str:
+    return (datetime.now() - timedelta(days=days_ago)).strftime("%Y%m%d")
+
+
+def _write_image(storage, image_id: str, data: bytes = b"0123456789"):
+    path = storage._path_for(image_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setattr(settings, "MAINTENANCE_OPS_PER_SECOND", 0)
+    monkeypatch.setattr(settings, "IMAGE_RETENTION_DAYS", 30)
+    monkeypatch.setattr(settings, "IMAGE_COOL_AFTER_DAYS", 0)
+    monkeypatch.setattr(settings, "IMAGE_ARCHIVE_AFTER_DAYS", 0)
+    monkeypatch.setattr(settings, "IMAGE_HOT_ACCESS_COUNT", 2)
+
+
+def test_access_tracker_counts_within_window():
+    tracker = AccessTracker(max_entries=10, window_days=1, hot_count=2)
+    tracker.record("a.png")
+    assert not tracker.is_hot("a.png")
+    tracker.record("a.png")
+    assert tracker.is_hot("a.png")
+    assert not tracker.is_hot("a.png", now=tracker._entries["a.png"][0] + 2 * 86400)
+
+
+def test_dry_run_reports_without_deleting(local_storage, policy):
+    old = f"{_partition(40)}/aa-old.png"
+    recent = f"{_partition(1)}/bb-new.png"
+    _write_image(local_storage, old)
+    _write_image(local_storage, recent)
+    service = MaintenanceService(local_storage, AccessTracker())
+
+    report = asyncio.run(service.run(dry_run=True))
+    assert report["actions"]["delete"] == {"images": 1, "bytes": 10}
+    assert report["samples"]["delete"] == [old]
+    assert os.path.exists(local_storage._path_for(old))
+
+
+def test_run_deletes_expired_images_and_skips_hot_ones(local_storage, policy):
+    partition = _partition(40)
+    expired, hot = f"{partition}/aa-expired.png", f"{partition}/bb-hot.png"
+    recent = f"{_partition(1)}/cc-recent.png"
+    for image_id in (expired, hot, recent):
+        _write_image(local_storage, image_id)
+
+    tracker = AccessTracker()
+    tracker.record(hot)
+    tracker.record(hot)
+    deleted = []
+
+    async def on_deleted(image_ids):
+        deleted.extend(image_ids)
+
+    service = MaintenanceService(local_storage, tracker, on_deleted=on_deleted)
+    report = asyncio.run(service.run(dry_run=False))
+    assert report["status"] == "completed"
+    assert report["skipped_hot"] == 1
+    assert deleted == [expired]
+    assert not os.path.exists(local_storage._path_for(expired))
+    assert os.path.exists(local_storage._path_for(hot))
+    assert os.path.exists(local_storage._path_for(recent))
+
+
+def test_local_lock_allows_one_holder(local_storage):
+    async def scenario():
+        async with local_storage.maintenance_lock() as first:
+            async with local_storage.maintenance_lock() as second:
+                return first, second
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_run_stops_when_lease_is_lost(azure_storage, policy, monkeypatch):
+    monkeypatch.setattr(storage_service_module, "MAINTENANCE_LEASE_SECONDS", 0.3)
+
+    async def failing_renew(self, **kwargs):
+        raise RuntimeError("renew failed")
+
+    monkeypatch.setattr(fake_blob._FakeLease, "renew", failing_renew)
+    service = MaintenanceService(azure_storage, AccessTracker())
+
+    async def slow_run(dry_run):
+        await asyncio.sleep(5)
+        return {"status": "completed"}
+
+    monkeypatch.setattr(service, "_run", slow_run)
+
+    async def scenario():
+        started = asyncio.get_running_loop().time()
+        report = await service.run(dry_run=False)
+        return report, asyncio.get_running_loop().time() - started
+
+    report, elapsed = asyncio.run(scenario())
+    assert report["status"] == "lock_lost"
+    assert elapsed < 0.3
+    assert service.last_report is report
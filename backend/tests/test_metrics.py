@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+
+import main
+from services.metrics import Metrics
+
+
+def test_counters_and_histograms_snapshot():
+    registry = Metrics()
+    registry.inc("uploads")
+    registry.inc("uploads", 2)
+    registry.observe("latency_seconds", 0.2, buckets=(0.1, 0.5))
+    registry.observe("latency_seconds", 0.7, buckets=(0.1, 0.5))
+
+    snapshot = registry.snapshot()
+    assert registry.value("uploads") == 3
+    assert registry.value("never_used") == 0
+    assert snapshot["counters"] == {"uploads": 3}
+    assert snapshot["histograms"]["latency_seconds"] == {
+        "count": 2,
+        "sum": 0.9,
+        "buckets": {"0.1": 0, "0.5": 1, "+Inf": 2}
+    }
+
+
+def test_render_uses_prometheus_text_format():
+    registry = Metrics()
+    registry.inc("uploads")
+    text = registry.render().decode()
+    assert "# TYPE uploads_total counter" in text
+    assert "uploads_total 1.0" in text
+
+
+def test_metrics_endpoint_negotiates_format():
+    main.metrics_registry.inc("metrics_endpoint_test")
+    with TestClient(main.app) as client:
+        scraped = client.get("/metrics", headers={"Accept": "text/plain;version=0.0.4"})
+        summary = client.get("/metrics")
+
+    assert scraped.headers["content-type"].startswith("text/plain")
+    assert "metrics_endpoint_test_total" in scraped.text
+    assert summary.json()["counters"]["metrics_endpoint_test"] >= 1
@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+from services.passage_pipeline import PassagePipeline
+from services.scene_splitter import Scene, split_passage, split_scenes
+
+
+def _paragraph(word: str, length: int) -> str:
+    return (word + " ") * (length // (len(word) + 1))
+
+
+def test_scene_break_markers_always_split():
+    text = "첫 장면입니다.\n\n***\n\n둘째 장면입니다.\n◆◆\n셋째 장면입니다."
+    assert [scene.text for scene in split_scenes(text)] == ["첫 장면입니다.", "둘째 장면입니다.", "셋째 장면입니다."]
+
+
+def test_paragraphs_are_merged_up_to_target_length():
+    text = "\n\n".join(_paragraph(word, 120) for word in ("alpha", "beta", "gamma", "delta"))
+    split = split_passage(text, max_scenes=2, max_chars=1500)
+    assert len(split.scenes) == 2
+    assert split.scenes[0].text.startswith("alpha") and "beta" in split.scenes[0].text
+    assert not split.truncated
+
+
+def test_long_paragraph_is_split_at_sentences():
+    sentence = "The knight rode through the forest at dawn. "
+    split = split_passage(sentence * 40, max_scenes=8, max_chars=300)
+    assert all(len(scene.text) <= 300 for scene in split.scenes)
+    assert all(scene.text.endswith(".") for scene in split.scenes)
+
+
+def test_scenes_beyond_max_scenes_are_reported():
+    text = "\n***\n".join(_paragraph(word, 400) for word in ("one", "two", "three", "four"))
+    split = split_passage(text, max_scenes=2, max_chars=1500)
+    assert [scene.index for scene in split.scenes] == [0, 1]
+    assert split.truncated
+    assert split.dropped_scenes == 2
+    assert split.dropped_chars == sum(len(_paragraph(word, 400).strip()) for word in ("three", "four"))
+
+
+def test_empty_passage():
+    split = split_passage("  \n\n ***\n")
+    assert split.scenes == [] and not split.truncated
+
+
+class FakeStorage:
+    def __init__(self):
+        self.uploaded = []
+
+    async def upload_image_from_url(self, image_url, prompt):
+        self.uploaded.append(image_url)
+        return {"image_id": f"img-{len(self.uploaded)}", "image_url": f"blob/{image_url}"}
+
+
+def test_pipeline_emits_events_per_scene():
+    scenes = [Scene(0, "reuse me"), Scene(1, "generate me"), Scene(2, "fail me")]
+    storage = FakeStorage()
+
+    async def generate(prompt, size, quality, style):
+        if prompt == "fail me":
+            raise RuntimeError("boom")
+        return {"url": f"dalle/{prompt}"}
+
+    def reuse(text, size, quality, style):
+        if text == "reuse me":
+            return SimpleNamespace(image_id="old", url="old-url", similarity=0.9)
+        return None
+
+    async def scenario():
+        pipeline = PassagePipeline(None, storage, generation_concurrency=2, upload_concurrency=1)
+        return [event async for event in pipeline.run(scenes, reuse_lookup=reuse, generate_fn=generate)]
+
+    events = asyncio.run(scenario())
+    by_scene = {event["scene_index"]: event for event in events if event["status"] != "scene_processing" and "scene_index" in event}
+    assert by_scene[0]["reused"] is True
+    assert by_scene[1]["status"] == "scene_completed" and by_scene[1]["blob_url"] == "blob/dalle/generate me"
+    assert by_scene[2]["status"] == "scene_error"
+    assert events[-1]["status"] == "passage_completed"
+    assert (events[-1]["total"], events[-1]["succeeded"]) == (3, 2)
+    assert storage.uploaded == ["dalle/generate me"]
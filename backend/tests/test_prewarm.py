@@ -0,0 +1,161 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import prewarm
+from services.image_generator import ContentPolicyError
+
+
+def test_read_items_merges_duplicates_and_skips_invalid():
+    items, skipped = prewarm.read_items([
+        "# 주석",
+        "",
+        "A castle at dawn",
+        "a castle at dawn!",
+        '{"prompt": "A castle at dawn", "size": "1792x1024"}',
+        '{"prompt": ""}',
+        "{broken json",
+    ])
+    assert [(item.prompt, item.size) for item in items] == [
+        ("A castle at dawn", "1024x1024"),
+        ("A castle at dawn", "1792x1024"),
+    ]
+    assert skipped == 3
+
+
+def test_parse_window_validates_format():
+    assert prewarm.parse_window("") is None
+    assert prewarm.parse_window("01:00-06:30") == (60, 390)
+    assert prewarm.parse_window("23:00-02:00") == (1380, 120)
+    for window in ("25:00-01:00", "01:00", "03:00-03:00"):
+        with pytest.raises(ValueError):
+            prewarm.parse_window(window)
+
+
+@pytest.mark.parametrize("window, now, expected", [
+    ((60, 360), datetime(2025, 1, 1, 2, 0), 0.0),
+    ((60, 360), datetime(2025, 1, 1, 0, 30), 1800.0),
+    ((60, 360), datetime(2025, 1, 1, 7, 0), 18 * 3600.0),
+    ((1380, 120), datetime(2025, 1, 1, 1, 0), 0.0),
+    ((1380, 120), datetime(2025, 1, 1, 22, 0), 3600.0),
+])
+def test_seconds_until_window(window, now, expected):
+    assert prewarm.seconds_until_window(window, now) == expected
+
+
+def test_adaptive_rate_halves_and_recovers():
+    rate = prewarm.AdaptiveRate(60)
+    rate.on_throttled(0)
+    rate.on_throttled(0)
+    assert rate.rate == pytest.approx(0.25)
+    for _ in range(prewarm.RECOVERY_SUCCESSES * 2):
+        rate.on_success()
+    assert rate.rate == pytest.approx(1.0)
+    assert rate.throttled == 2
+
+
+def _prewarmer(tmp_path, lines, *extra):
+    args = prewarm.parse_args(["-", "--rate", "6000", "--concurrency", "1", "--progress", str(tmp_path / "progress.jsonl"), *extra])
+    items, _ = prewarm.read_items(lines)
+    return prewarm.Prewarmer(args, items, prewarm.ProgressLog(args.progress))
+
+
+def test_rejections_do_not_consume_max_images(tmp_path):
+    prewarmer = _prewarmer(tmp_path, ["bad one", "bad two", "good three"], "--max-images", "1")
+    warmed = []
+
+    async def fake_warm(item):
+        if item.prompt.startswith("bad"):
+            raise ContentPolicyError("filtered")
+        prewarmer.counts["warmed"] += 1
+        warmed.append(item.prompt)
+        prewarmer.progress.write(item, "warmed")
+
+    prewarmer._warm = fake_warm
+
+    async def scenario():
+        try:
+            return await prewarmer.run()
+        finally:
+            await prewarmer.close()
+
+    report = asyncio.run(scenario())
+    assert warmed == ["good three"]
+    assert report["status"] == "completed"
+    assert report["totals"]["rejected"] == 2
+    assert report["totals"]["remaining"] == 0
+
+
+def test_finished_items_are_skipped_on_resume(tmp_path):
+    first = _prewarmer(tmp_path, ["bad one", "good two"])
+
+    async def fake_warm(item):
+        if item.prompt.startswith("bad"):
+            raise ContentPolicyError("filtered")
+        first.progress.write(item, "warmed")
+
+    first._warm = fake_warm
+
+    async def run(prewarmer):
+        try:
+            return await prewarmer.run()
+        finally:
+            await prewarmer.close()
+
+    asyncio.run(run(first))
+    second = _prewarmer(tmp_path, ["bad one", "good two", "new three"], "--dry-run")
+    report = asyncio.run(run(second))
+    assert report["totals"]["resumed"] == 2
+    assert report["pending"] == ["new three"]
+    assert report["status"] == "dry_run"
+
+
+def test_failed_upload_is_retried_without_generating_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(prewarm.settings, "PREWARM_MAX_ATTEMPTS", 2)
+    calls = {"generate": 0, "upload": 0}
+
+    def stub(prewarmer, upload_fails):
+        async def generate_image(prompt, **options):
+            calls["generate"] += 1
+            return {"url": "https://dalle.example/image.png", "revised_prompt": prompt}
+
+        async def download_image(image_url):
+            return b"\x89PNG generated", None
+
+        async def upload_image(image_data, prompt):
+            calls["upload"] += 1
+            if upload_fails:
+                raise ConnectionError("storage down")
+            return {"image_id": "20250101/abc.png", "image_url": "https://blob.example/abc.png"}
+
+        async def add(**fields):
+            pass
+
+        prewarmer.image_service.generate_image = generate_image
+        prewarmer.storage.download_image = download_image
+        prewarmer.storage.upload_image = upload_image
+        prewarmer.prompt_index.add = add
+
+    async def run(prewarmer):
+        try:
+            return await prewarmer.run()
+        finally:
+            await prewarmer.close()
+
+    first = _prewarmer(tmp_path, ["a lighthouse in fog"])
+    stub(first, upload_fails=True)
+    failed = asyncio.run(run(first))
+    spooled = list((tmp_path / "progress_images").iterdir())
+    spooled_bytes = [path.read_bytes() for path in spooled]
+
+    second = _prewarmer(tmp_path, ["a lighthouse in fog"])
+    stub(second, upload_fails=False)
+    warmed = asyncio.run(run(second))
+
+    assert failed["totals"]["failed"] == 1
+    assert spooled_bytes == [b"\x89PNG generated"]
+    assert warmed["totals"]["warmed"] == 1
+    # 두 번의 실행, 세 번의 업로드 시도에서 생성(과금)은 한 번
+    assert calls == {"generate": 1, "upload": 3}
+    assert not spooled[0].exists()
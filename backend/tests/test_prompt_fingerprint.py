@@ -0,0 +1,47 @@
+from services.prompt_fingerprint import PromptFingerprintIndex, normalize_prompt, prompt_digest
+
+OPTIONS = {"size": "1024x1024", "quality": "standard", "style": "vivid"}
+PROMPT = "a lonely lighthouse on a rocky cliff at night with a storm rolling in from the sea"
+
+
+def test_normalize_strips_leading_phrases_and_punctuation():
+    assert normalize_prompt("An illustration of: A Cat, sleeping!") == "a cat sleeping"
+    assert normalize_prompt("다음 장면을 그려줘 - 숲속의 집") == "숲속의 집"
+    assert prompt_digest("A cat.") == prompt_digest("a   cat")
+
+
+def test_exact_match_after_normalization():
+    index = PromptFingerprintIndex(threshold=0.85)
+    index.add("a.png", PROMPT, url="u", options=OPTIONS)
+    match = index.find("Illustration of " + PROMPT.upper() + "!", OPTIONS)
+    assert match.image_id == "a.png" and match.similarity == 1.0
+    assert index.stats["exact_hits"] == 1
+
+
+def test_similar_prompt_is_reused_only_with_same_options():
+    index = PromptFingerprintIndex(threshold=0.6)
+    index.add("a.png", PROMPT, options=OPTIONS)
+    similar = PROMPT.replace("night", "midnight")
+    assert index.find(similar, OPTIONS).image_id == "a.png"
+    assert index.find(similar, {**OPTIONS, "style": "natural"}) is None
+    assert index.find("a bowl of fruit on a kitchen table", OPTIONS) is None
+
+
+def test_index_records_add_remove_and_archive():
+    index = PromptFingerprintIndex(threshold=0.85)
+    index.on_index_record({"op": "add", "image_id": "a.png", "prompt": PROMPT, "options": OPTIONS})
+    assert index.find(PROMPT, OPTIONS) is not None
+    index.on_index_record({"op": "tier", "image_id": "a.png", "tier": "Archive"})
+    assert index.find(PROMPT, OPTIONS) is None
+
+    index.on_index_record({"op": "add", "image_id": "b.png", "prompt": PROMPT, "options": OPTIONS})
+    index.on_index_record({"op": "delete", "image_id": "b.png"})
+    assert index.find(PROMPT, OPTIONS) is None
+
+
+def test_max_entries_evicts_oldest():
+    index = PromptFingerprintIndex(threshold=0.85, max_entries=2)
+    for i, prompt in enumerate(["red fox in snow", "blue whale in ocean", "green frog on leaf"]):
+        index.add(f"{i}.png", prompt, options=OPTIONS)
+    assert index.find("red fox in snow", OPTIONS) is None
+    assert index.find("green frog on leaf", OPTIONS).image_id == "2.png"
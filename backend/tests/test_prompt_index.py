@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import pytest
+
+from config import settings
+from services.prompt_index import PromptIndex, tokenize
+
+
+@pytest.fixture
+def low_compaction_threshold(monkeypatch):
+    monkeypatch.setattr(settings, "PROMPT_INDEX_COMPACT_MIN_STALE", 5)
+    monkeypatch.setattr(settings, "PROMPT_INDEX_COMPACT_RATIO", 0.5)
+
+
+def _line_count(path) -> int:
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+
+def test_tokenize_uses_bigrams_for_korean():
+    assert tokenize("숲속의 Cat 달") == {"숲속", "속의", "cat", "달"}
+    assert tokenize("") == set()
+
+
+def test_search_prefers_full_matches(tmp_path):
+    index = PromptIndex(str(tmp_path / "index.jsonl"))
+
+    async def scenario():
+        await index.add("a.png", "푸른 숲속의 고양이")
+        await index.add("b.png", "푸른 바다")
+        full = await index.search("숲속 고양이")
+        partial = await index.search("푸른 하늘")
+        return full, partial
+
+    full, partial = asyncio.run(scenario())
+    assert [image["image_id"] for image in full["images"]] == ["a.png"]
+    assert full["images"][0]["score"] == 1.0
+    assert {image["image_id"] for image in partial["images"]} == {"a.png", "b.png"}
+
+
+def test_other_workers_see_appends_and_deletes(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    writer, reader = PromptIndex(path), PromptIndex(path)
+
+    async def scenario():
+        await writer.add("a.png", "red fox")
+        await reader.refresh()
+        seen = reader.get("a.png") is not None
+        await writer.remove("a.png")
+        await reader.refresh()
+        return seen, reader.get("a.png")
+
+    seen, after_delete = asyncio.run(scenario())
+    assert seen is True
+    assert after_delete is None
+
+
+def test_compact_keeps_appends_from_other_workers(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    compactor, writer = PromptIndex(path), PromptIndex(path)
+
+    async def scenario():
+        for i in range(20):
+            await compactor.add(f"old-{i}.png", "old prompt")
+        await compactor.remove_many([f"old-{i}.png" for i in range(10)])
+
+        async def append():
+            for i in range(50):
+                await writer.add(f"new-{i}.png", "new prompt")
+
+        await asyncio.gather(append(), compactor.compact(), compactor.compact())
+        fresh = PromptIndex(path)
+        await fresh.load()
+        return fresh
+
+    fresh = asyncio.run(scenario())
+    assert sum(image_id.startswith("new-") for image_id in fresh.entries) == 50
+    assert sum(image_id.startswith("old-") for image_id in fresh.entries) == 10
+
+
+def test_stale_lines_trigger_compaction_on_write(tmp_path, low_compaction_threshold):
+    path = tmp_path / "index.jsonl"
+    index = PromptIndex(str(path))
+
+    async def scenario():
+        for i in range(10):
+            await index.add(f"{i}.png", "prompt")
+        await index.remove_many([f"{i}.png" for i in range(2)])
+        below = _line_count(path)
+        await index.remove_many([f"{i}.png" for i in range(2, 8)])
+        return below
+
+    below = asyncio.run(scenario())
+    # 삭제 하나마다 add 줄과 톰스톤 줄 2줄이 낡음 -> 4줄은 기준(5) 미만이라 그대로 둠
+    assert below == 12
+    assert _line_count(path) == 2
+    assert set(index.entries) == {"8.png", "9.png"}
+
+
+def test_refresh_loop_compacts_lines_from_other_writers(tmp_path, low_compaction_threshold, monkeypatch):
+    monkeypatch.setattr(settings, "PROMPT_INDEX_REFRESH_INTERVAL", 0.01)
+    path = tmp_path / "index.jsonl"
+    index = PromptIndex(str(path))
+
+    async def scenario():
+        await index.load()
+        await index.start()
+        # 다른 프로세스가 기록한 중복/톰스톤 줄
+        with open(path, "a") as f:
+            for i in range(10):
+                f.write(json.dumps({"op": "add", "image_id": "same.png", "prompt": f"prompt {i}"}) + "\n")
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if _line_count(path) == 1:
+                break
+        await index.stop()
+
+    asyncio.run(scenario())
+    assert _line_count(path) == 1
+    assert index.get("same.png")["prompt"] == "prompt 9"
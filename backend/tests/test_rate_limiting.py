@@ -0,0 +1,198 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import services.rate_limiter as rate_limiter_module
+from config import settings
+from services.fair_scheduler import FairScheduler, SchedulerQueueFull
+from services.image_generator import DEFAULT_QUOTA_RETRY_AFTER, QuotaExceededError
+from services.rate_limiter import InMemoryRateLimitBackend, RateLimiter, RedisRateLimitBackend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """rate_limiter 모듈의 time.monotonic만 바꿔 토큰 충전을 직접 진행"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    backend = InMemoryRateLimitBackend()
+
+    async def take():
+        return await backend.take("k", rate=1.0, burst=3, cost=1)
+
+    results = [asyncio.run(take()) for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[-1].retry_after == pytest.approx(1.0)
+
+    clock.value += 1.0
+    assert asyncio.run(take()).allowed
+
+
+def test_take_all_is_all_or_nothing(clock):
+    backend = InMemoryRateLimitBackend()
+
+    async def scenario():
+        await backend.take("ip", rate=1.0, burst=2, cost=2)
+        denied = await backend.take_all(["client", "ip"], rate=1.0, burst=2, cost=1)
+        # ip 버킷이 비어 거부되었으므로 client 버킷은 차감되지 않아야 함
+        client = await backend.take("client", rate=1.0, burst=2, cost=2)
+        return denied, client
+
+    denied, client = asyncio.run(scenario())
+    assert not denied.allowed
+    assert client.allowed
+
+
+def test_cost_above_burst_leaves_debt(clock):
+    backend = InMemoryRateLimitBackend()
+
+    async def take(cost):
+        return await backend.take("k", rate=1.0, burst=2, cost=cost)
+
+    assert asyncio.run(take(5)).allowed
+    clock.value += 2.0
+    denied = asyncio.run(take(1))
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(2.0)
+
+
+def test_limiter_fails_open_on_backend_error(monkeypatch):
+    class BrokenBackend:
+        async def take_all(self, *args):
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    limiter = RateLimiter(backend=BrokenBackend(), rate_per_minute=1, burst=1)
+    assert asyncio.run(limiter.check("k", cost=3)).allowed
+
+
+def test_redis_script_matches_memory_backend():
+    fakeredis = pytest.importorskip("fakeredis", reason="Lua 스크립트 확인에는 fakeredis[lua]가 필요")
+    backend = RedisRateLimitBackend.__new__(RedisRateLimitBackend)
+    backend.prefix = "test:"
+    backend._client = fakeredis.aioredis.FakeRedis()
+    backend._script = backend._client.register_script(RedisRateLimitBackend.SCRIPT)
+
+    async def scenario():
+        first = await backend.take_all(["a", "b"], rate=0.001, burst=2, cost=2)
+        denied = await backend.take_all(["a", "c"], rate=0.001, burst=2, cost=1)
+        untouched = await backend.take("c", rate=0.001, burst=2, cost=2)
+        return first, denied, untouched
+
+    first, denied, untouched = asyncio.run(scenario())
+    assert first.allowed and not denied.allowed and untouched.allowed
+
+
+@pytest.mark.parametrize("trust, header, hops, expected", [
+    (False, "1.1.1.1", 1, "testclient"),
+    (True, "6.6.6.6, 2.2.2.2", 1, "2.2.2.2"),  # 왼쪽 값은 클라이언트가 위조 가능
+    (True, "6.6.6.6, 2.2.2.2, 10.0.0.1", 2, "2.2.2.2"),
+    (True, "2.2.2.2:5678", 1, "2.2.2.2"),
+    (True, "2.2.2.2", 5, "2.2.2.2"),
+])
+def test_client_ip_uses_trusted_hop(monkeypatch, trust, header, hops, expected):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED_FOR", trust)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXY_HOPS", hops)
+    conn = SimpleNamespace(headers={"x-forwarded-for": header}, client=SimpleNamespace(host="testclient"))
+    assert main._client_ip(conn) == expected
+
+
+def test_unknown_api_keys_are_not_identities(monkeypatch):
+    monkeypatch.setattr(settings, "API_KEYS", ["known"])
+    monkeypatch.setattr(settings, "API_KEY_WEIGHTS", {"heavy": 3})
+    assert main._api_key_identity("random") is None
+    assert main._api_key_identity("known")[1] == 1
+    key, weight = main._api_key_identity("heavy")
+    assert key.startswith("key:") and "heavy" not in key and weight == 3
+
+
+def test_scheduler_limits_concurrency_and_rotates_clients():
+    scheduler = FairScheduler(max_concurrency=1, max_queue_per_client=10)
+    order = []
+
+    async def job(key, name, release):
+        async with scheduler.slot(key):
+            order.append(name)
+            await release.wait()
+
+    async def scenario():
+        gate = asyncio.Event()
+        first = asyncio.create_task(job("a", "a0", gate))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(job("a", f"a{i}", gate)) for i in range(1, 4)]
+        tasks.append(asyncio.create_task(job("b", "b1", gate)))
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *tasks)
+
+    asyncio.run(scenario())
+    # 한 클라이언트가 먼저 몰아 넣어도 다른 클라이언트는 다음 차례에 실행됨
+    assert order[:3] == ["a0", "a1", "b1"]
+
+
+def test_scheduler_weight_gives_more_turns():
+    scheduler = FairScheduler(max_concurrency=1, max_queue_per_client=10)
+    order = []
+
+    async def job(key, weight, name, release):
+        async with scheduler.slot(key, weight):
+            order.append(name)
+            await release.wait()
+
+    async def scenario():
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(job("x", 1, "x", gate))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(job("heavy", 2, f"h{i}", gate)) for i in range(4)]
+        tasks += [asyncio.create_task(job("light", 1, f"l{i}", gate)) for i in range(2)]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+
+    asyncio.run(scenario())
+    assert order == ["x", "h0", "h1", "l0", "h2", "h3", "l1"]
+
+
+def test_scheduler_rejects_when_client_queue_is_full():
+    scheduler = FairScheduler(max_concurrency=1, max_queue_per_client=1)
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def hold():
+            async with scheduler.slot("a"):
+                await gate.wait()
+
+        running = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerQueueFull):
+            async with scheduler.slot("a"):
+                pass
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        gate.set()
+        await running
+        return scheduler.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["active"] == 0 and snapshot["queued"] == 0
+
+
+@pytest.mark.parametrize("retry_after, header", [(12.3, "13"), (None, str(int(DEFAULT_QUOTA_RETRY_AFTER)))])
+def test_upstream_quota_exceeded_returns_429(monkeypatch, retry_after, header):
+    async def quota_exceeded(**kwargs):
+        raise QuotaExceededError(retry_after)
+
+    monkeypatch.setattr(main.image_service, "generate_image", quota_exceeded)
+    with TestClient(main.app) as client:
+        response = client.post("/api/v1/generate", json={"prompt": "a quiet harbor", "reuse_similar": False})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == header
@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import BadRequestError
+
+import services.rejection_cache as rejection_cache_module
+from config import settings
+from services.image_generator import ContentPolicyError, ImageGeneratorService
+from services.rejection_cache import RejectionCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rejection_cache_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_rejection_matches_normalized_prompt(clock):
+    cache = RejectionCache(max_entries=10, ttl=60)
+    cache.add("An illustration of a violent scene!", "violence", round_trip=2.5)
+    assert cache.get("a violent scene") == "violence"
+    assert cache.get("a peaceful scene") is None
+    assert cache.stats == {"hits": 1, "recorded": 1}
+
+
+def test_rejection_expires_and_is_lru_limited(clock):
+    cache = RejectionCache(max_entries=2, ttl=60)
+    for prompt in ("one", "two", "three"):
+        cache.add(prompt, "hate")
+    assert cache.get("one") is None
+    assert cache.get("three") == "hate"
+    clock.value += 61
+    assert cache.get("three") is None
+
+
+def test_disabled_cache_records_nothing(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_REJECTION_CACHE", False)
+    cache = RejectionCache(max_entries=10, ttl=60)
+    cache.add("prompt", "violence")
+    assert cache.get("prompt") is None
+
+
+def _content_filter_error() -> BadRequestError:
+    request = httpx.Request("POST", "https://example.openai.azure.com/images")
+    body = {
+        "code": "content_policy_violation",
+        "inner_error": {
+            "code": "ResponsibleAIPolicyViolation",
+            "content_filter_results": {"violence": {"filtered": True}, "hate": {"filtered": False}}
+        }
+    }
+    return BadRequestError("filtered", response=httpx.Response(400, request=request), body=body)
+
+
+def test_generator_skips_dalle_for_cached_rejection():
+    service = ImageGeneratorService()
+    calls = []
+
+    async def generate(**kwargs):
+        calls.append(kwargs)
+        raise _content_filter_error()
+
+    service.client = SimpleNamespace(images=SimpleNamespace(generate=generate))
+
+    async def attempt():
+        with pytest.raises(ContentPolicyError) as error:
+            await service.generate_image("a violent scene")
+        return error.value
+
+    first = asyncio.run(attempt())
+    second = asyncio.run(attempt())
+    assert (first.reason, first.cached) == ("violence", False)
+    assert (second.reason, second.cached) == ("violence", True)
+    assert len(calls) == 1
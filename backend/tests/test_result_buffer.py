@@ -0,0 +1,229 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import services.result_buffer as result_buffer_module
+from conftest import FakeWebSocket
+from services.connection_manager import CLOSE_SLOW_CONSUMER, ConnectionManager
+from config import settings
+from services.result_buffer import InMemoryResultBackend, RedisResultBackend, ResultBuffer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(result_buffer_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def _buffer(max_events=100, max_clients=10, max_results=10) -> ResultBuffer:
+    return ResultBuffer(
+        backend=InMemoryResultBackend(max_events=max_events, max_clients=max_clients, max_results=max_results),
+        ttl=60
+    )
+
+
+def _redis_buffer(server) -> ResultBuffer:
+    """같은 server를 쓰는 버퍼끼리는 서로 다른 워커처럼 상태를 공유"""
+    fakeredis = pytest.importorskip("fakeredis", reason="Lua 스크립트 확인에는 fakeredis[lua]가 필요")
+    backend = RedisResultBackend.__new__(RedisResultBackend)
+    backend.prefix = "test:"
+    backend.max_events = 3
+    backend._client = fakeredis.aioredis.FakeRedis(server=server)
+    backend._clear_if_match = backend._client.register_script(RedisResultBackend.CLEAR_IF_MATCH)
+    return ResultBuffer(backend=backend, ttl=60)
+
+
+def test_replay_returns_messages_after_last_seq(clock):
+    buffer = _buffer(max_events=3)
+
+    async def scenario():
+        sent = [await buffer.record("c", {"i": i}) for i in range(5)]
+        return sent, await buffer.replay("c", 0), await buffer.replay("c", 4), await buffer.replay("other", 0)
+
+    sent, everything, after_four, other = asyncio.run(scenario())
+    assert [message["seq"] for message in sent] == [1, 2, 3, 4, 5]
+    # 최근 max_events개만 보관
+    assert [message["i"] for message in everything] == [2, 3, 4]
+    assert [message["i"] for message in after_four] == [4]
+    assert other == []
+
+
+def test_replay_skips_expired_messages(clock):
+    buffer = _buffer()
+
+    async def scenario():
+        await buffer.record("c", {"i": 0})
+        clock.value += 50
+        await buffer.record("c", {"i": 1})
+        clock.value += 20
+        return await buffer.replay("c", 0)
+
+    assert [message["i"] for message in asyncio.run(scenario())] == [1]
+
+
+def test_client_buffers_are_lru_limited(clock):
+    buffer = _buffer(max_clients=2)
+
+    async def scenario():
+        for client_id in ("a", "b", "c"):
+            await buffer.record(client_id, {"client": client_id})
+        return await buffer.replay("a", 0), await buffer.replay("c", 0)
+
+    evicted, kept = asyncio.run(scenario())
+    assert evicted == []
+    assert len(kept) == 1
+
+
+def test_results_are_scoped_by_client(clock):
+    buffer = _buffer(max_results=2)
+
+    async def scenario():
+        await buffer.store_result("a", "r1", {"status": "completed"})
+        found = await buffer.get_result("a", "r1"), await buffer.get_result("b", "r1")
+        await buffer.store_result("a", "r2", {})
+        await buffer.store_result("a", "r3", {})
+        evicted = await buffer.get_result("a", "r1")
+        clock.value += 61
+        return found, evicted, await buffer.get_result("a", "r3")
+
+    found, evicted, expired = asyncio.run(scenario())
+    assert found == ({"status": "completed"}, None)
+    assert evicted is None
+    assert expired is None
+
+
+def test_presence_is_cleared_only_by_its_own_connection(clock):
+    buffer = _buffer()
+
+    async def scenario():
+        await buffer.set_presence("c", "old")
+        await buffer.set_presence("c", "new")
+        # 이전 연결이 늦게 정리돼도 새 연결 표시는 남음
+        await buffer.clear_presence("c", "old")
+        kept = await buffer.is_present("c")
+        clock.value += settings.WS_PRESENCE_TTL - 1
+        await buffer.refresh_presence({"c": "new"})
+        clock.value += settings.WS_PRESENCE_TTL - 1
+        refreshed = await buffer.is_present("c")
+        clock.value += 2
+        return kept, refreshed, await buffer.is_present("c")
+
+    assert asyncio.run(scenario()) == (True, True, False)
+
+
+def test_redis_backend_shares_state_between_workers():
+    fakeredis = pytest.importorskip("fakeredis", reason="Lua 스크립트 확인에는 fakeredis[lua]가 필요")
+    server = fakeredis.FakeServer()
+    first, second = _redis_buffer(server), _redis_buffer(server)
+
+    async def scenario():
+        sent = [await worker.record("c", {"i": i}) for i, worker in enumerate([first, second, first, second, first])]
+        replayed = await second.replay("c", 1)
+
+        await first.mark_inflight("c", "req-1")
+        inflight = await second.is_inflight("c", "req-1")
+        await first.store_result("c", "req-1", {"status": "completed"})
+        await first.clear_inflight("c", "req-1")
+        result = await second.get_result("c", "req-1"), await second.is_inflight("c", "req-1")
+
+        await first.set_presence("c", "old")
+        await second.set_presence("c", "new")
+        await first.clear_presence("c", "old")
+        await first.refresh_presence({"c": "old"})
+        present = await first.is_present("c")
+        await second.clear_presence("c", "new")
+        return sent, replayed, inflight, result, present, await first.is_present("c")
+
+    sent, replayed, inflight, result, present, gone = asyncio.run(scenario())
+    assert [message["seq"] for message in sent] == [1, 2, 3, 4, 5]
+    # 최근 max_events(3)개 중 last_seq 이후
+    assert [message["i"] for message in replayed] == [2, 3, 4]
+    assert inflight is True
+    assert result == ({"status": "completed"}, False)
+    assert present is True
+    assert gone is False
+
+
+def test_wait_result_picks_up_result_from_another_worker(monkeypatch):
+    monkeypatch.setattr(result_buffer_module, "RESULT_POLL_INTERVAL", 0.01)
+    buffer = _buffer()
+
+    async def finish_later():
+        await asyncio.sleep(0.05)
+        await buffer.store_result("c", "req-1", {"status": "completed"})
+        await buffer.clear_inflight("c", "req-1")
+
+    async def scenario():
+        await buffer.mark_inflight("c", "req-1")
+        asyncio.create_task(finish_later())
+        done = await buffer.wait_result("c", "req-1", timeout=1.0)
+        missing = await buffer.wait_result("c", "req-2", timeout=1.0)
+        return done, missing
+
+    assert asyncio.run(scenario()) == ({"status": "completed"}, None)
+
+
+def test_backend_errors_fail_open():
+    class BrokenBackend(InMemoryResultBackend):
+        async def append(self, *args):
+            raise ConnectionError("backend down")
+
+        async def get_marker(self, key):
+            raise ConnectionError("backend down")
+
+    buffer = ResultBuffer(backend=BrokenBackend(), ttl=60)
+
+    async def scenario():
+        return await buffer.record("c", {"i": 0}), await buffer.is_inflight("c", "r"), await buffer.is_present("c")
+
+    # 상태를 확인할 수 없으면 연결된 것으로 보아 작업을 취소하지 않음
+    assert asyncio.run(scenario()) == ({"i": 0}, False, True)
+
+
+def test_replay_larger_than_send_queue_is_paced():
+    async def scenario():
+        buffer = _buffer()
+        manager = ConnectionManager(queue_size=16, send_timeout=2, buffer=buffer)
+        for i in range(100):
+            await buffer.record("c", {"i": i})
+        websocket = FakeWebSocket(send_delay=0.001)
+        connection = await manager.connect(websocket, "c")
+        replayed = await manager.replay(connection, 0)
+        await asyncio.sleep(0.2)
+        return replayed, websocket
+
+    replayed, websocket = asyncio.run(scenario())
+    assert replayed == 100
+    assert websocket.close_code is None
+    assert [message["i"] for message in websocket.sent] == list(range(100))
+
+
+def test_replay_to_stalled_client_closes_after_timeout():
+    async def scenario():
+        buffer = _buffer()
+        manager = ConnectionManager(queue_size=4, send_timeout=0.2, buffer=buffer)
+        for i in range(20):
+            await buffer.record("c", {"i": i})
+        websocket = FakeWebSocket(send_delay=10)
+        connection = await manager.connect(websocket, "c")
+        replayed = await manager.replay(connection, 0)
+        await asyncio.sleep(0.05)
+        return replayed, websocket
+
+    replayed, websocket = asyncio.run(scenario())
+    assert replayed < 20
+    assert websocket.close_code == CLOSE_SLOW_CONSUMER
+
+
+def test_generation_lookup_requires_matching_client():
+    asyncio.run(main.result_buffer.store_result("owner", "req-1", {"status": "completed", "request_id": "req-1"}))
+    with TestClient(main.app) as client:
+        assert client.get("/api/v1/generations/req-1").status_code == 422
+        assert client.get("/api/v1/generations/req-1", params={"client_id": "other"}).status_code == 404
+        response = client.get("/api/v1/generations/req-1", params={"client_id": "owner"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
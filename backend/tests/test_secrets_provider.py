@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+from config import settings, KEY_VAULT_SECRETS
+from services.secrets_provider import SecretsProvider
+
+
+class FakeSecretClient:
+    def __init__(self, values):
+        self.values = values
+        self.calls = 0
+
+    async def get_secret(self, name):
+        self.calls += 1
+        return SimpleNamespace(value=self.values.get(name))
+
+    async def close(self):
+        pass
+
+
+def _provider(monkeypatch, values, ttl=60):
+    monkeypatch.setattr(settings, "USE_KEY_VAULT", True)
+    for field in KEY_VAULT_SECRETS:
+        monkeypatch.delenv(field, raising=False)
+        monkeypatch.setattr(settings, field, getattr(settings, field))
+    provider = SecretsProvider(vault_url="https://vault.example", ttl=ttl, jitter=0.1)
+    provider._client = FakeSecretClient(values)
+    return provider
+
+
+def test_get_uses_cache_until_expired(monkeypatch):
+    provider = _provider(monkeypatch, {"azure-openai-api-key": "rotated"})
+    initial = settings.AZURE_OPENAI_API_KEY
+
+    async def scenario():
+        first = await provider.get("AZURE_OPENAI_API_KEY")
+        calls = provider._client.calls
+        provider._expires_at = 0
+        second = await provider.get("AZURE_OPENAI_API_KEY")
+        return first, calls, second
+
+    first, calls, second = asyncio.run(scenario())
+    assert (first, calls) == (initial, 0)
+    assert second == "rotated"
+    assert settings.AZURE_OPENAI_API_KEY == "rotated"
+
+
+def test_concurrent_refresh_reads_vault_once(monkeypatch):
+    provider = _provider(monkeypatch, {"azure-openai-api-key": "rotated"})
+    provider._expires_at = 0
+
+    async def scenario():
+        await asyncio.gather(*(provider.get("AZURE_OPENAI_API_KEY") for _ in range(10)))
+
+    asyncio.run(scenario())
+    assert provider._client.calls == len(provider._managed_fields)
+
+
+def test_rotation_callback_receives_changed_fields(monkeypatch):
+    provider = _provider(monkeypatch, {"azure-openai-api-key": "rotated"})
+    provider._expires_at = 0
+    received = []
+
+    async def on_rotate(changed):
+        received.append(changed)
+
+    provider.subscribe(on_rotate)
+    asyncio.run(provider.refresh())
+    assert received == [{"AZURE_OPENAI_API_KEY": "rotated"}]
+
+
+def test_env_value_is_not_managed(monkeypatch):
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "from-env")
+    monkeypatch.setattr(settings, "USE_KEY_VAULT", True)
+    provider = SecretsProvider(vault_url="https://vault.example", ttl=60, jitter=0.1)
+    assert "AZURE_OPENAI_API_KEY" not in provider._managed_fields
+
+
+class FailingSecretClient(FakeSecretClient):
+    async def get_secret(self, name):
+        self.calls += 1
+        raise ConnectionError("vault unavailable")
+
+
+def test_get_serves_cached_value_when_vault_fails(monkeypatch):
+    provider = _provider(monkeypatch, {})
+    provider._client = FailingSecretClient({})
+    provider._expires_at = 0
+    initial = settings.AZURE_OPENAI_API_KEY
+
+    async def scenario():
+        values = await asyncio.gather(*(provider.get("AZURE_OPENAI_API_KEY") for _ in range(5)))
+        return values, await provider.get("AZURE_OPENAI_API_KEY")
+
+    values, again = asyncio.run(scenario())
+    assert values == [initial] * 5
+    assert again == initial
+    # 실패한 갱신은 재시도 간격 동안 다시 시도하지 않음
+    assert provider._client.calls == 1
+    assert provider._expires_at > 0
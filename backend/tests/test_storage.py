@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+import pytest
+
+from conftest import read_stream
+from services.storage_base import partition_prefix
+
+
+def test_partition_prefix_narrows_listing():
+    assert partition_prefix("20250101", "20251231") == "2025"
+    assert partition_prefix("20250301", "20250315") == "202503"
+    assert partition_prefix(None, "20250315") == ""
+
+
+def test_local_upload_stream_and_delete(local_storage):
+    async def scenario():
+        uploaded = await local_storage.upload_image(b"0123456789", "prompt")
+        image_id = uploaded["image_id"]
+        meta = await local_storage.get_image_metadata(image_id)
+        whole = await read_stream(await local_storage.open_image_stream(image_id))
+        part = await read_stream(await local_storage.open_image_stream(image_id, offset=2, length=3))
+        deleted = await local_storage.delete_image(image_id)
+        gone = await local_storage.get_image_metadata(image_id)
+        return meta, whole, part, deleted, gone
+
+    meta, whole, part, deleted, gone = asyncio.run(scenario())
+    assert meta["size"] == 10 and meta["content_type"] == "image/png"
+    assert whole == b"0123456789"
+    assert part == b"234"
+    assert deleted is True
+    assert gone is None
+
+
+def test_local_rejects_paths_outside_root(local_storage):
+    with pytest.raises(ValueError):
+        local_storage._path_for("../etc/passwd")
+    assert asyncio.run(local_storage.open_image_stream("20250101/../../x.png")) is None
+
+
+def test_local_list_images_newest_partition_first(local_storage):
+    async def scenario():
+        for partition in ("20250101", "20250102", "20250103"):
+            path = local_storage._path_for(f"{partition}/abcd.png")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"x")
+        return await local_storage.list_images(limit=2)
+
+    result = asyncio.run(scenario())
+    assert [image["image_id"] for image in result["images"]] == ["20250103/abcd.png", "20250102/abcd.png"]
+    assert result["has_more"] is True
+
+
+@pytest.mark.parametrize("offset, length, expected", [
+    (0, None, b"0123456789"),
+    (0, 4, b"0123"),  # bytes=0-3: SDK는 length가 있으면 offset=None을 거부함
+    (6, None, b"6789"),
+    (3, 2, b"34"),
+])
+def test_azure_stream_ranges(azure_storage, offset, length, expected):
+    async def scenario():
+        uploaded = await azure_storage.upload_image(b"0123456789", "prompt")
+        stream = await azure_storage.open_image_stream(uploaded["image_id"], offset=offset, length=length)
+        return stream.size, await read_stream(stream)
+
+    size, data = asyncio.run(scenario())
+    assert size == 10
+    assert data == expected
+
+
+def test_azure_missing_image(azure_storage):
+    assert asyncio.run(azure_storage.open_image_stream("20250101/missing.png")) is None
+
+
+def test_local_stream_reads_ranges_across_chunks(local_storage, monkeypatch):
+    import services.local_storage_service as local_module
+    monkeypatch.setattr(local_module, "STREAM_CHUNK_SIZE", 4)
+
+    async def scenario():
+        uploaded = await local_storage.upload_image(b"0123456789", "prompt")
+        stream = await local_storage.open_image_stream(uploaded["image_id"], offset=1, length=8)
+        return [chunk async for chunk in stream.chunks]
+
+    assert asyncio.run(scenario()) == [b"1234", b"5678"]
@@ -38,9 +38,19 @@ class GeneratedImage {
 @JsonSerializable()
 class ImageListResponse {
   final List<ImageItem> images;
+
+  // 서버가 스캔한 날짜 파티션까지의 개수 (전체 이미지 수가 아님)
   final int total;
 
-  ImageListResponse({required this.images, required this.total});
+  // 다음 페이지 존재 여부 (페이지 넘김은 total 대신 이 값으로 판단)
+  @JsonKey(name: 'has_more')
+  final bool hasMore;
+
+  ImageListResponse({
+    required this.images,
+    required this.total,
+    this.hasMore = false,
+  });
 
   factory ImageListResponse.fromJson(Map<String, dynamic> json) =>
       _$ImageListResponseFromJson(json);
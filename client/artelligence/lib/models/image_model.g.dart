@@ -32,12 +32,14 @@ ImageListResponse _$ImageListResponseFromJson(Map<String, dynamic> json) =>
           .map((e) => ImageItem.fromJson(e as Map<String, dynamic>))
           .toList(),
       total: (json['total'] as num).toInt(),
+      hasMore: json['has_more'] as bool? ?? false,
     );
 
 Map<String, dynamic> _$ImageListResponseToJson(ImageListResponse instance) =>
     <String, dynamic>{
       'images': instance.images,
       'total': instance.total,
+      'has_more': instance.hasMore,
     };
 
 ImageItem _$ImageItemFromJson(Map<String, dynamic> json) => ImageItem(
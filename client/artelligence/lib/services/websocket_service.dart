@@ -9,6 +9,7 @@ class WebSocketService {
   StreamController<WebSocketMessage>? _messageController;
   String? _clientId;
   bool _isConnected = false;
+  int? _lastSeq; // 마지막으로 받은 메시지 순번 (재연결 시 놓친 메시지 재전송 요청)
 
   Stream<WebSocketMessage>? get messageStream => _messageController?.stream;
   bool get isConnected => _isConnected;
@@ -21,7 +22,10 @@ class WebSocketService {
 
     try {
       _clientId = clientId;
-      final wsUrl = ApiConfig.getWsUrl(ApiConfig.wsEndpoint(clientId));
+      var wsUrl = ApiConfig.getWsUrl(ApiConfig.wsEndpoint(clientId));
+      if (_lastSeq != null) {
+        wsUrl = '$wsUrl?last_seq=$_lastSeq';
+      }
 
       _channel = WebSocketChannel.connect(Uri.parse(wsUrl));
       _messageController = StreamController<WebSocketMessage>.broadcast();
@@ -29,7 +33,16 @@ class WebSocketService {
       _channel!.stream.listen(
         (data) {
           try {
-            final message = WebSocketMessage.fromJson(jsonDecode(data));
+            final json = jsonDecode(data);
+            // 서버 하트비트에 응답 (응답이 없으면 유휴 연결로 정리됨)
+            if (json['status'] == 'ping') {
+              _channel?.sink.add(jsonEncode({'action': 'pong'}));
+              return;
+            }
+            if (json['seq'] is int) {
+              _lastSeq = json['seq'];
+            }
+            final message = WebSocketMessage.fromJson(json);
             _messageController!.add(message);
           } catch (e) {
             print('WebSocket 메시지 파싱 오류: $e');